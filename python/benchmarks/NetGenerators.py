@@ -0,0 +1,122 @@
+import random
+from typing import Callable, Dict, List, Sequence
+import numpy as np
+from src.PetriNet import PetriNet
+
+
+def build_net(
+    place_ids: List[str],
+    arcs: Sequence[tuple],
+    marked: Sequence[str]
+) -> PetriNet:
+    """
+    PetriNet from (transition id, input places, output places) triples;
+    `marked` lists the places holding a token in M0.
+    """
+    index = {pid: i for i, pid in enumerate(place_ids)}
+    I = np.zeros((len(arcs), len(place_ids)), dtype=int)
+    O = np.zeros((len(arcs), len(place_ids)), dtype=int)
+    for t, (_, ins, outs) in enumerate(arcs):
+        for p in ins:
+            I[t, index[p]] += 1
+        for p in outs:
+            O[t, index[p]] += 1
+    M0 = np.zeros(len(place_ids), dtype=int)
+    for p in marked:
+        M0[index[p]] = 1
+    trans_ids = [tid for tid, _, _ in arcs]
+    return PetriNet(place_ids, trans_ids, [None] * len(place_ids), [None] * len(trans_ids), I, O, M0)
+
+
+def dining_philosophers(n: int) -> PetriNet:
+    """n philosophers taking the left fork then the right one (deadlocks)."""
+    places, arcs = [], []
+    for i in range(n):
+        places += [f"think{i}", f"hasleft{i}", f"eat{i}", f"fork{i}"]
+    for i in range(n):
+        j = (i + 1) % n
+        arcs.append((f"takeleft{i}", [f"think{i}", f"fork{i}"], [f"hasleft{i}"]))
+        arcs.append((f"takeright{i}", [f"hasleft{i}", f"fork{j}"], [f"eat{i}"]))
+        arcs.append((f"release{i}", [f"eat{i}"], [f"think{i}", f"fork{i}", f"fork{j}"]))
+    return build_net(places, arcs, [f"think{i}" for i in range(n)] + [f"fork{i}" for i in range(n)])
+
+
+def token_ring(n: int) -> PetriNet:
+    """
+    n stations passing one token; the holder may enter its critical section.
+    Every station also toggles an independent local bit, so the state space
+    grows as n * 2^(n+1) while the BDD stays linear.
+    """
+    places, arcs = [], []
+    for i in range(n):
+        places += [f"token{i}", f"idle{i}", f"critical{i}", f"lo{i}", f"hi{i}"]
+    for i in range(n):
+        j = (i + 1) % n
+        arcs.append((f"enter{i}", [f"token{i}", f"idle{i}"], [f"critical{i}"]))
+        arcs.append((f"leave{i}", [f"critical{i}"], [f"idle{i}", f"token{j}"]))
+        arcs.append((f"pass{i}", [f"token{i}", f"idle{i}"], [f"idle{i}", f"token{j}"]))
+        arcs.append((f"up{i}", [f"lo{i}"], [f"hi{i}"]))
+        arcs.append((f"down{i}", [f"hi{i}"], [f"lo{i}"]))
+    return build_net(places, arcs, ["token0"] + [f"idle{i}" for i in range(n)] + [f"lo{i}" for i in range(n)])
+
+
+def fork_join(stages: int, width: int = 3) -> PetriNet:
+    """
+    Cyclic pipeline: stage s forks into `width` parallel branches
+    (ready -> done each), joins, and hands the token to stage s+1.
+    """
+    places, arcs = [], []
+    for s in range(stages):
+        places.append(f"in{s}")
+        places += [f"ready{s}_{k}" for k in range(width)] + [f"done{s}_{k}" for k in range(width)]
+    for s in range(stages):
+        nxt = (s + 1) % stages
+        arcs.append((f"fork{s}", [f"in{s}"], [f"ready{s}_{k}" for k in range(width)]))
+        for k in range(width):
+            arcs.append((f"work{s}_{k}", [f"ready{s}_{k}"], [f"done{s}_{k}"]))
+        arcs.append((f"join{s}", [f"done{s}_{k}" for k in range(width)], [f"in{nxt}"]))
+    return build_net(places, arcs, ["in0"])
+
+
+def shared_resource(n: int) -> PetriNet:
+    """n processes (idle -> wait -> critical -> idle) guarded by one mutex place."""
+    places, arcs = ["mutex"], []
+    for i in range(n):
+        places += [f"idle{i}", f"wait{i}", f"cs{i}"]
+        arcs.append((f"request{i}", [f"idle{i}"], [f"wait{i}"]))
+        arcs.append((f"acquire{i}", [f"wait{i}", "mutex"], [f"cs{i}"]))
+        arcs.append((f"release{i}", [f"cs{i}"], [f"idle{i}", "mutex"]))
+    return build_net(places, arcs, ["mutex"] + [f"idle{i}" for i in range(n)])
+
+
+def random_safe(n: int, seed: int = 0, density: int = 2) -> PetriNet:
+    """
+    Random net with 4n places and 4n transitions, each with 1..density input
+    and output places; M0 is a random 0/1 vector (1-safe semantics apply).
+    """
+    rng = random.Random(seed * 1_000_003 + n)
+    places = [f"p{i}" for i in range(4 * n)]
+    arcs = []
+    for t in range(4 * n):
+        ins = rng.sample(places, rng.randint(1, density))
+        outs = rng.sample(places, rng.randint(1, density))
+        arcs.append((f"t{t}", ins, outs))
+    return build_net(places, arcs, [p for p in places if rng.random() < 0.3])
+
+
+FAMILIES: Dict[str, Callable[[int], PetriNet]] = {
+    "philosophers": dining_philosophers,
+    "token_ring": token_ring,
+    "fork_join": fork_join,
+    "mutex": shared_resource,
+    "random": random_safe,
+}
+
+# Kích thước mặc định: chạy xong trong vài giây với mọi analysis
+DEFAULT_SIZES: Dict[str, List[int]] = {
+    "philosophers": [2, 4, 6],
+    "token_ring": [2, 4, 6],
+    "fork_join": [2, 4, 6],
+    "mutex": [2, 4, 6],
+    "random": [2, 4, 6],
+}
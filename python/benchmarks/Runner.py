@@ -0,0 +1,203 @@
+import csv
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # psutil chỉ dùng để đo RSS, không bắt buộc
+    psutil = None
+
+from src.PetriNet import PetriNet
+from src.BFS import bfs_reachable_traversal
+from src.DFS import dfs_reachable_traversal
+from src.BDD import bdd_reachable_counting
+from src.Deadlock import explicit_deadlock_detector
+from src.Optimization import max_reachable_marking
+from .NetGenerators import FAMILIES, DEFAULT_SIZES
+
+ANALYSES = ("bfs", "dfs", "bdd", "deadlock", "optimization")
+
+# Cột của file CSV (và khóa của mỗi bản ghi JSON)
+FIELDS = ["family", "size", "places", "transitions", "analysis",
+          "seconds", "peak_mb", "rss_mb", "states", "bdd_nodes", "result"]
+
+
+def _measure(fn: Callable[[], object]) -> Tuple[object, float, float, Optional[float]]:
+    """
+    Run fn twice: (result, seconds, tracemalloc peak MB, RSS growth MB or None).
+
+    The first run only measures memory (tracemalloc hooks every allocation
+    and would inflate the time); its result is dropped, and the second run,
+    without tracemalloc, gives the time and the result.
+    """
+    process = psutil.Process(os.getpid()) if psutil else None
+    rss_before = process.memory_info().rss if process else 0
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss = (process.memory_info().rss - rss_before) / 2**20 if process else None
+    # Giải phóng kết quả lượt đo bộ nhớ (vd. node BDD) trước lượt đo thời gian
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    return result, seconds, peak / 2**20, rss
+
+
+def _reachable_bdd(pn: PetriNet) -> Tuple[object, int, Dict, List]:
+    """bdd_reachable_counting with fresh info / place_vars out-params per run."""
+    info, place_vars = {}, []
+    reached, count = bdd_reachable_counting(pn, info=info, place_vars=place_vars)
+    return reached, count, info, place_vars
+
+
+def _objective(pn: PetriNet) -> np.ndarray:
+    """Deterministic weights for the optimization benchmark."""
+    return (np.arange(pn.num_places) % 5) + 1
+
+
+def run_case(family: str, size: int, analyses: Sequence[str] = ANALYSES, repeat: int = 1) -> List[Dict]:
+    """
+    Time every analysis on one generated net; the best of `repeat` runs
+    is kept. Optimization reuses the Reached BDD (built untimed if "bdd"
+    is not among the analyses).
+    """
+    pn = FAMILIES[family](size)
+
+    rows = []
+    reached = place_vars = None
+    for analysis in analyses:
+        best = None
+        for _ in range(repeat):
+            row = {"family": family, "size": size, "places": pn.num_places,
+                   "transitions": pn.num_transitions, "analysis": analysis,
+                   "states": None, "bdd_nodes": None, "result": None}
+            if analysis == "bfs":
+                states, *cost = _measure(lambda: bfs_reachable_traversal(pn))
+                row["states"] = len(states)
+            elif analysis == "dfs":
+                states, *cost = _measure(lambda: dfs_reachable_traversal(pn))
+                row["states"] = len(states)
+            elif analysis == "bdd":
+                (reached, count, info, place_vars), *cost = _measure(lambda: _reachable_bdd(pn))
+                row["states"] = count
+                row["bdd_nodes"] = info.get("peak_nodes")
+            elif analysis == "deadlock":
+                dead, *cost = _measure(lambda: explicit_deadlock_detector(pn))
+                row["result"] = len(dead)
+            elif analysis == "optimization":
+                if reached is None:
+                    place_vars = []
+                    reached, _ = bdd_reachable_counting(pn, place_vars=place_vars)
+                (_, value), *cost = _measure(lambda: max_reachable_marking(place_vars, reached, _objective(pn)))
+                row["result"] = value
+            else:
+                raise ValueError(f"Unknown analysis: {analysis}")
+            row["seconds"], row["peak_mb"], row["rss_mb"] = cost
+            if best is None or row["seconds"] < best["seconds"]:
+                best = row
+        rows.append(best)
+    return rows
+
+
+def run_benchmarks(
+    families: Optional[Sequence[str]] = None,
+    sizes: Optional[Sequence[int]] = None,
+    analyses: Sequence[str] = ANALYSES,
+    repeat: int = 1,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> List[Dict]:
+    """All (family, size, analysis) rows; sizes default to DEFAULT_SIZES per family."""
+    rows = []
+    for family in families or list(FAMILIES):
+        if family not in FAMILIES:
+            raise ValueError(f"Unknown net family: {family}")
+        for size in sizes or DEFAULT_SIZES[family]:
+            for row in run_case(family, size, analyses, repeat):
+                rows.append(row)
+                if progress:
+                    progress(row)
+    return rows
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_json(rows: List[Dict], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": rows}, f, indent=2)
+
+
+def write_csv(rows: List[Dict], path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_results(path: str) -> List[Dict]:
+    """Rows from a JSON file written by write_json."""
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    rows: List[Dict],
+    baseline: List[Dict],
+    tolerance: float = 0.25,
+    min_seconds: float = 0.01
+) -> List[str]:
+    """
+    Regressions of `rows` against `baseline`, matched by (family, size, analysis).
+
+    - seconds / peak_mb more than `tolerance` (relative) above the baseline;
+      timings below `min_seconds` in both runs are ignored as noise
+    - states / result / bdd_nodes differing from the baseline (a different
+      state count or optimum is a correctness bug, not a slowdown; more BDD
+      nodes is reported as a regression)
+    """
+    base = {(r["family"], r["size"], r["analysis"]): r for r in baseline}
+    problems = []
+    for row in rows:
+        key = (row["family"], row["size"], row["analysis"])
+        old = base.get(key)
+        if old is None:
+            continue
+        name = "{}[{}] {}".format(*key)
+
+        if max(row["seconds"], old["seconds"]) >= min_seconds and \
+                row["seconds"] > old["seconds"] * (1 + tolerance):
+            problems.append(f"{name}: {old['seconds']:.4f}s -> {row['seconds']:.4f}s")
+        if row["peak_mb"] > old["peak_mb"] * (1 + tolerance) and row["peak_mb"] - old["peak_mb"] > 0.1:
+            problems.append(f"{name}: peak {old['peak_mb']:.2f} MB -> {row['peak_mb']:.2f} MB")
+        for field in ("states", "result"):
+            if old.get(field) is not None and row.get(field) != old[field]:
+                problems.append(f"{name}: {field} {old[field]} -> {row.get(field)} (MISMATCH)")
+        if old.get("bdd_nodes") and row.get("bdd_nodes") and row["bdd_nodes"] > old["bdd_nodes"]:
+            problems.append(f"{name}: bdd_nodes {old['bdd_nodes']} -> {row['bdd_nodes']}")
+    return problems
+
+
+def format_row(row: Dict) -> str:
+    extra = []
+    for field in ("states", "bdd_nodes", "result"):
+        if row.get(field) is not None:
+            extra.append(f"{field}={row[field]}")
+    return (f"{row['family']:<13}{row['size']:>4}  {row['analysis']:<13}"
+            f"{row['seconds']:>10.4f}s {row['peak_mb']:>9.2f} MB  " + " ".join(extra))
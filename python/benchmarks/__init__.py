@@ -0,0 +1,5 @@
+"""
+Scalable benchmark nets and a timing runner.
+
+Run from the python/ directory:  python -m benchmarks --help
+"""
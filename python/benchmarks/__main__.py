@@ -0,0 +1,43 @@
+import argparse
+import sys
+from .NetGenerators import FAMILIES
+from .Runner import ANALYSES, compare, format_row, load_results, run_benchmarks, write_csv, write_json
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time BFS/DFS/BDD/Deadlock/Optimization on scalable Petri net families.")
+    parser.add_argument("--families", nargs="+", choices=list(FAMILIES), help="default: all")
+    parser.add_argument("--sizes", nargs="+", type=int, help="default: per-family sizes")
+    parser.add_argument("--analyses", nargs="+", choices=ANALYSES, default=list(ANALYSES))
+    parser.add_argument("--repeat", type=int, default=1, help="keep the fastest of N runs")
+    parser.add_argument("--json", help="write results as JSON (usable as a baseline)")
+    parser.add_argument("--csv", help="write results as CSV")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown / memory growth (default 0.25)")
+    parser.add_argument("--min-seconds", type=float, default=0.01,
+                        help="ignore timings below this in both runs (default 0.01)")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmarks(args.families, args.sizes, args.analyses, args.repeat,
+                          progress=lambda row: print(format_row(row), flush=True))
+    if args.json:
+        write_json(rows, args.json)
+    if args.csv:
+        write_csv(rows, args.csv)
+
+    if args.baseline:
+        problems = compare(rows, load_results(args.baseline), args.tolerance, args.min_seconds)
+        if problems:
+            print(f"\n{len(problems)} regression(s) vs {args.baseline}:")
+            for line in problems:
+                print("  " + line)
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ from src.DFS import dfs_reachable_traversal
 from src.BDD import bdd_reachable_counting
 from src.Deadlock import deadlock_reachable_marking_detector
 from src.Optimization import max_reachable_marking
+from src.Query import reachability_query
 
 def test_main():
     print("=== TEST TOÀN DIỆN CẤU TRÚC 5 PLACES COMPACT (5 TASKS) ===")
@@ -93,7 +94,8 @@ def test_main():
     
     # Đo thời gian BDD
     start_time_bdd = time.perf_counter()
-    bdd_res, count = bdd_reachable_counting(pn)
+    place_vars = []
+    bdd_res, count = bdd_reachable_counting(pn, place_vars=place_vars)
     end_time_bdd = time.perf_counter()
     
     # Đo memory usage
@@ -117,14 +119,14 @@ def test_main():
         print("-" * 30)
 
         bdd_states = set()
-        place_map = {pid: i for i, pid in enumerate(pn.place_ids)}
+        place_map = {x: i for i, x in enumerate(place_vars)}
         
         # Duyệt qua các satisfying assignments
         for assignment in bdd_res.satisfy_all():
             fixed = {}
             for var, val in assignment.items():
-                if str(var) in place_map:
-                    fixed[place_map[str(var)]] = 1 if val else 0
+                if var in place_map:
+                    fixed[place_map[var]] = 1 if val else 0
             
             missing = [i for i in range(len(pn.place_ids)) if i not in fixed]
             num_missing = len(missing)
@@ -211,7 +213,7 @@ def test_main():
     print("\n" + "="*40)
     print("[5] KIỂM TRA DEADLOCK")
     if bdd_res:
-        deadlock_m = deadlock_reachable_marking_detector(pn, bdd_res)
+        deadlock_m = deadlock_reachable_marking_detector(pn, bdd_res, place_vars=place_vars)
         if deadlock_m:
             print(f"-> PHÁT HIỆN DEADLOCK tại marking: {deadlock_m}")
         else:
@@ -242,18 +244,21 @@ def test_main():
                 pass
         
         # 3. Chạy hàm tối ưu
-        opt_m, opt_val = max_reachable_marking(pn.place_ids, bdd_res, c)
+        opt_m, opt_val = max_reachable_marking(place_vars, bdd_res, c)
         
         if opt_m:
             print(f"\n-> Marking tối ưu tìm được: {opt_m}")
             print(f"-> Giá trị mục tiêu (c * M): {opt_val}")
-            
-            if opt_val > 0:
-                print(">> KẾT LUẬN: TASK 5 KHẢ ĐẠT (REACHABLE)!")
-            else:
-                print(">> KẾT LUẬN: KHÔNG THỂ ĐẾN TASK 5.")
         else:
             print("-> Không tìm thấy giải pháp tối ưu.")
 
+    # Truy vấn có mục tiêu: chỉ tìm đường tới marking có token ở TASK 5
+    goal = reachability_query(pn, {len(pn.place_ids) - 1: 1})
+    if goal.reachable:
+        print(f"-> Dãy bắn tới TASK 5: {[pn.trans_ids[t] for t in goal.trace]} ({goal.states} trạng thái đã sinh)")
+        print(">> KẾT LUẬN: TASK 5 KHẢ ĐẠT (REACHABLE)!")
+    else:
+        print(">> KẾT LUẬN: KHÔNG THỂ ĐẾN TASK 5.")
+
 if __name__ == "__main__":
     test_main()
\ No newline at end of file
@@ -1,10 +1,680 @@
 import collections
-from typing import Tuple, List, Optional
+import contextlib
+import functools
+import sys
+import time
+from typing import Tuple, List, Optional, Sequence, Dict, Union
 from pyeda.inter import *
+# API nội bộ của pyeda (node.root/lo/hi, _bdd, _bddnode), đã kiểm tra với pyeda 0.29.0
+from pyeda.boolalg.bdd import BDDNODEONE, BDDNODEZERO, _bdd, _bddnode
 from .PetriNet import PetriNet
+from .BitMarking import CompiledNet
+from .Invariants import PlaceCompression
+from .Stats import NULL_STATS, Stats
 import numpy as np
 
-def bdd_reachable_counting(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
+
+def bdd_model_count(f: BinaryDecisionDiagram, variables: Sequence[BinaryDecisionDiagram]) -> int:
+    """
+    Exact number of satisfying assignments of f over `variables`.
+
+    Dynamic programming over the BDD nodes (each node visited once, memo
+    table keyed by node) with Python arbitrary-precision ints. Levels follow
+    the BDD variable order (uniqid); a variable skipped on an edge doubles
+    the count of that edge.
+    """
+    order = sorted(variables, key=lambda v: v.uniqid)
+    level = {v.uniqid: i for i, v in enumerate(order)}
+    n = len(order)
+
+    def lvl(node):
+        return n if node.root < 0 else level[node.root]
+
+    memo = {BDDNODEZERO: 0, BDDNODEONE: 1}
+    with bdd_recursion_limit(n):
+        for v in f.support:
+            if v.uniqid not in level:
+                raise ValueError(f"BDD depends on {v}, which is not a counted variable")
+        for node in f.dfs_postorder():
+            if node in memo:
+                continue
+            k = lvl(node)
+            lo, hi = node.lo, node.hi
+            memo[node] = (memo[lo] << (lvl(lo) - k - 1)) + (memo[hi] << (lvl(hi) - k - 1))
+
+    root = f.node
+    return memo[root] << lvl(root)
+
+# PyEDA sắp xếp biến theo thời điểm tạo (uniqid) và giữ mọi biến đến hết
+# tiến trình. Mọi encoding dùng chung một dãy biến "level" tạo đúng thứ tự
+# 0, 1, 2, ...: thứ tự biến của một lần chạy là cách gán place vào level,
+# nên không lần chạy nào phải tạo biến mới (trừ phần dãy còn thiếu).
+_LEVELS: List[BinaryDecisionDiagram] = []
+
+ORDER_METHODS = ("pnml", "force", "dfs", "cuthill-mckee")
+
+
+def bdd_level_vars(n: int) -> List[BinaryDecisionDiagram]:
+    """
+    The first n shared level variables, level i above level i + 1.
+
+    Every encoding here places its variables on these, so BDDs from
+    different calls share variables: a BDD is only meaningful together
+    with the place variables of the call that built it.
+    """
+    while len(_LEVELS) < n:
+        _LEVELS.append(bddvar('_level', len(_LEVELS)))
+    return _LEVELS[:n]
+
+
+def bdd_node_count(f: BinaryDecisionDiagram) -> int:
+    """Number of nodes of f (terminals included)."""
+    return sum(1 for _ in f.dfs_postorder())
+
+
+@contextlib.contextmanager
+def bdd_recursion_limit(num_places: int):
+    """
+    Raise the interpreter recursion limit while the block runs, enough for
+    BDDs over `num_places` places, and restore it afterwards. pyeda's BDD
+    operations and the memoized ones here recurse once per variable level
+    (two variables per place, relprod nests an ITE at each level). The
+    analyses below use it themselves; wrap your own pyeda calls on BDDs of
+    large nets (say, more than 200 places) in it too.
+    """
+    old = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old, 4 * num_places + 100))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(old)
+
+
+def _deep_recursion(func):
+    """Run func(pn, ...) under bdd_recursion_limit(pn.num_places)."""
+    @functools.wraps(func)
+    def wrapper(pn, *args, **kwargs):
+        with bdd_recursion_limit(pn.num_places):
+            return func(pn, *args, **kwargs)
+    return wrapper
+
+
+def _place_graph(pn: PetriNet) -> List[set]:
+    """Place adjacency: p ~ q if some transition touches both."""
+    num_places = pn.num_places
+    adj = [set() for _ in range(num_places)]
+    for t in range(len(pn.preset)):
+        support = set(pn.preset[t]) | set(pn.postset[t])
+        for p in support:
+            adj[p].update(support)
+    for p in range(num_places):
+        adj[p].discard(p)
+    return adj
+
+
+def _order_dfs(pn: PetriNet) -> List[int]:
+    """Connectivity-based DFS order, starting from the marked places."""
+    adj = _place_graph(pn)
+    num_places = len(adj)
+    starts = [p for p in range(num_places) if pn.M0[p] > 0] + list(range(num_places))
+    seen = set()
+    order = []
+    for s in starts:
+        if s in seen:
+            continue
+        stack = [s]
+        while stack:
+            p = stack.pop()
+            if p in seen:
+                continue
+            seen.add(p)
+            order.append(p)
+            stack.extend(sorted(adj[p] - seen, reverse=True))
+    return order
+
+
+def _order_cuthill_mckee(pn: PetriNet) -> List[int]:
+    """Reverse Cuthill–McKee on the place graph (small bandwidth)."""
+    adj = _place_graph(pn)
+    num_places = len(adj)
+    seen = set()
+    order = []
+    for s in sorted(range(num_places), key=lambda p: len(adj[p])):
+        if s in seen:
+            continue
+        seen.add(s)
+        queue = collections.deque([s])
+        while queue:
+            p = queue.popleft()
+            order.append(p)
+            for q in sorted(adj[p] - seen, key=lambda q: len(adj[q])):
+                seen.add(q)
+                queue.append(q)
+    return order[::-1]
+
+
+def _order_force(pn: PetriNet, max_rounds: int = 50) -> List[int]:
+    """
+    FORCE heuristic: transitions are hyperedges over their places; each place
+    moves to the mean centre of gravity of its hyperedges until the total
+    hyperedge span stops decreasing.
+    """
+    num_places = pn.num_places
+    edges = [sorted(set(pn.preset[t]) | set(pn.postset[t])) for t in range(len(pn.preset))]
+    edges = [e for e in edges if len(e) > 1]
+    incident = [[] for _ in range(num_places)]
+    for k, e in enumerate(edges):
+        for p in e:
+            incident[p].append(k)
+
+    def span(order):
+        pos = {p: i for i, p in enumerate(order)}
+        return sum(max(pos[p] for p in e) - min(pos[p] for p in e) for e in edges)
+
+    order = list(range(num_places))
+    best, best_span = order, span(order)
+    for _ in range(max_rounds):
+        pos = {p: i for i, p in enumerate(order)}
+        cog = [sum(pos[p] for p in e) / len(e) for e in edges]
+        target = [
+            sum(cog[k] for k in incident[p]) / len(incident[p]) if incident[p] else pos[p]
+            for p in range(num_places)
+        ]
+        order = sorted(range(num_places), key=lambda p: (target[p], p))
+        cur = span(order)
+        if cur >= best_span:
+            break
+        best, best_span = order, cur
+    return best
+
+
+def variable_order(pn: PetriNet, method: Union[str, Sequence[int]] = "pnml") -> List[int]:
+    """
+    Place permutation used as BDD variable order.
+
+    method: "pnml" (file order), "force", "dfs", "cuthill-mckee",
+    or an explicit list of place indices.
+    """
+    num_places = pn.num_places
+    if not isinstance(method, str):
+        order = [int(p) for p in method]
+        if sorted(order) != list(range(num_places)):
+            raise ValueError("Explicit order must be a permutation of the place indices")
+        return order
+    if method == "pnml":
+        return list(range(num_places))
+    if method == "force":
+        return _order_force(pn)
+    if method == "dfs":
+        return _order_dfs(pn)
+    if method == "cuthill-mckee":
+        return _order_cuthill_mckee(pn)
+    raise ValueError(f"Unknown variable order: {method}")
+
+
+def _make_state_vars(
+    order: List[int],
+    interleave: bool,
+    extra: Sequence[int] = ()
+) -> Tuple[List[BinaryDecisionDiagram], List[BinaryDecisionDiagram]]:
+    """
+    Current (X) and next (X') variables on the shared levels, in the given
+    order. Interleaved: x_a, x'_a, x_b, x'_b, ...; otherwise all X then all
+    X'. Places in `extra` only get a current variable, on the last levels
+    (X'[p] stays None).
+    """
+    n = len(order)
+    levels = bdd_level_vars(2 * n + len(extra))
+    X: List[Optional[BinaryDecisionDiagram]] = [None] * (n + len(extra))
+    Xp: List[Optional[BinaryDecisionDiagram]] = [None] * (n + len(extra))
+    for i, p in enumerate(order):
+        if interleave:
+            X[p], Xp[p] = levels[2 * i], levels[2 * i + 1]
+        else:
+            X[p], Xp[p] = levels[i], levels[n + i]
+    for i, p in enumerate(extra):
+        X[p] = levels[2 * n + i]
+    return X, Xp
+
+
+def _linear_eq_bdd(
+    terms: Sequence[Tuple[BinaryDecisionDiagram, int]],
+    k: int,
+    TRUE: BinaryDecisionDiagram,
+    FALSE: BinaryDecisionDiagram
+) -> BinaryDecisionDiagram:
+    """BDD of Σ c·x = k over (x, c) in terms, built top-down with a memo on (level, rest)."""
+    terms = sorted(terms, key=lambda term: term[0].uniqid)
+    n = len(terms)
+    lo, hi = [0] * (n + 1), [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        c = terms[i][1]
+        lo[i] = lo[i + 1] + min(c, 0)
+        hi[i] = hi[i + 1] + max(c, 0)
+    memo: Dict = {}
+
+    def build(i, rest):
+        if rest < lo[i] or rest > hi[i]:
+            return FALSE
+        if i == n:
+            return TRUE
+        ret = memo.get((i, rest))
+        if ret is None:
+            x, c = terms[i]
+            ret = (x & build(i + 1, rest - c)) | (~x & build(i + 1, rest))
+            memo[(i, rest)] = ret
+        return ret
+
+    return build(0, k)
+
+
+def _sift_order(
+    f: BinaryDecisionDiagram,
+    X: List[BinaryDecisionDiagram],
+    order: List[int],
+    window: int = 3
+) -> List[int]:
+    """
+    Sifting-style reordering of the places for the BDD f(X).
+
+    Each place is moved to every position within `window` of its current
+    one; the position giving the smallest f is kept. Sizes are measured by
+    composing f onto the first levels, place i of the candidate on level i.
+    """
+    num_places = len(order)
+    slots = bdd_level_vars(num_places)
+
+    def size(candidate):
+        mapping = {X[p]: slots[i] for i, p in enumerate(candidate)}
+        return bdd_node_count(bdd_rename(f, mapping))
+
+    order = list(order)
+    best_size = size(order)
+    for p in list(order):
+        i = order.index(p)
+        rest = order[:i] + order[i + 1:]
+        for j in range(max(0, i - window), min(num_places, i + window + 1)):
+            if j == i:
+                continue
+            candidate = rest[:j] + [p] + rest[j:]
+            cand_size = size(candidate)
+            if cand_size < best_size:
+                order, best_size = candidate, cand_size
+    return order
+
+
+class _Relation:
+    """
+    Transition relation restricted to its support (one transition or a cluster).
+
+    R only mentions X[p]/X'[p] for places the transitions read or change;
+    every other place keeps its value implicitly. Image computation
+    quantifies only X[changed] and renames only X'[changed] -> X[changed].
+    """
+
+    def __init__(self, transitions, support, changed, R, X, Xp):
+        self.transitions = transitions
+        self.support = support
+        self.changed = changed
+        self.R = R
+        self.qroots = frozenset(X[p].uniqid for p in changed)
+        self.rename_map = {Xp[p]: X[p] for p in changed}
+        self.rename_roots = {Xp[p].uniqid: X[p].uniqid for p in changed}
+
+
+def _transition_relation(
+    pn: PetriNet,
+    t: int,
+    X: List[BinaryDecisionDiagram],
+    Xp: List[BinaryDecisionDiagram],
+    TRUE: BinaryDecisionDiagram
+) -> Tuple[BinaryDecisionDiagram, List[int], List[int]]:
+    """
+    R_t over •t ∪ t• only. Returns (R_t, support, changed places).
+    Places without a next-state variable (Xp[p] is None, implied by the
+    P-invariants) only contribute their enabling condition X[p] / ~X[p].
+    """
+    pre, post = set(pn.preset[t]), set(pn.postset[t])
+    R_t = TRUE
+    changed = []
+    for p in sorted(pre | post):
+        if Xp[p] is None:
+            R_t = bdd_and(R_t, X[p]) if p in pre else bdd_diff(R_t, X[p])
+        elif p in pre and p not in post:
+            # Token consumed: X[p]=1 (enabled), X'[p]=0 (after firing)
+            R_t &= X[p] & ~Xp[p]
+            changed.append(p)
+        elif p in post and p not in pre:
+            # Token produced: X[p]=0 (1-safe constraint), X'[p]=1
+            R_t &= ~X[p] & Xp[p]
+            changed.append(p)
+        else:
+            # Self-loop: X[p]=1 and stays 1 (no X' variable needed)
+            R_t &= X[p]
+    return R_t, sorted(pre | post), changed
+
+
+def _build_relations(
+    pn: PetriNet,
+    X: List[BinaryDecisionDiagram],
+    Xp: List[BinaryDecisionDiagram],
+    perm: List[int],
+    cluster_limit: int = 0
+) -> List[_Relation]:
+    """
+    Support-restricted relations, one per transition that can fire under
+    1-safe semantics (arc weights <= 1).
+
+    Transitions are taken in order of their top variable and greedily
+    clustered while their changed places overlap and the cluster changes
+    at most `cluster_limit` places (0 disables clustering). Inside a
+    cluster each member gets the frame X'[q] <-> X[q] for the cluster
+    places it does not change.
+    """
+    TRUE = X[0] | ~X[0]
+    pos = {p: i for i, p in enumerate(perm)}
+
+    parts = []
+    for t in range(pn.num_transitions):
+        if not pn.ordinary[t]:
+            continue
+        R_t, support, changed = _transition_relation(pn, t, X, Xp, TRUE)
+        parts.append((t, R_t, support, changed))
+    parts.sort(key=lambda part: min((pos[p] for p in part[2] if p in pos), default=len(perm)))
+
+    clusters: List[List] = []
+    for part in parts:
+        if clusters and cluster_limit > 0:
+            last = clusters[-1]
+            changed_union = set().union(*(c[3] for c in last))
+            if changed_union & set(part[3]) and len(changed_union | set(part[3])) <= cluster_limit:
+                last.append(part)
+                continue
+        clusters.append([part])
+
+    relations = []
+    for members in clusters:
+        if len(members) == 1:
+            t, R_t, support, changed = members[0]
+            relations.append(_Relation([t], support, changed, R_t, X, Xp))
+            continue
+        changed_union = sorted(set().union(*(m[3] for m in members)))
+        support_union = sorted(set().union(*(m[2] for m in members)))
+        R = X[0] & ~X[0]
+        for t, R_t, _, changed in members:
+            for q in changed_union:
+                if q not in changed:
+                    R_t = bdd_and(R_t, (X[q] & Xp[q]) | (~X[q] & ~Xp[q]))
+            R = bdd_or(R, R_t)
+        relations.append(_Relation([m[0] for m in members], support_union, changed_union, R, X, Xp))
+    return relations
+
+
+def _ite_memo(f, g, h, cache):
+    """
+    If-then-else on BDD nodes with a memo table (pyeda's _ite has none and
+    re-expands shared subgraphs, which is exponential on large DAGs).
+    """
+    if f is BDDNODEONE:
+        return g
+    if f is BDDNODEZERO:
+        return h
+    if g is h:
+        return g
+    if g is BDDNODEONE and h is BDDNODEZERO:
+        return f
+    key = (f, g, h)
+    ret = cache.get(key)
+    if ret is not None:
+        return ret
+
+    root = min(node.root for node in (f, g, h) if node.root > 0)
+    f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+    g0, g1 = (g.lo, g.hi) if g.root == root else (g, g)
+    h0, h1 = (h.lo, h.hi) if h.root == root else (h, h)
+    ret = _bddnode(root, _ite_memo(f0, g0, h0, cache), _ite_memo(f1, g1, h1, cache))
+    cache[key] = ret
+    return ret
+
+
+def bdd_or(f: BinaryDecisionDiagram, g: BinaryDecisionDiagram) -> BinaryDecisionDiagram:
+    """f | g through the memoized ITE."""
+    return _bdd(_ite_memo(f.node, BDDNODEONE, g.node, {}))
+
+
+def bdd_and(f: BinaryDecisionDiagram, g: BinaryDecisionDiagram) -> BinaryDecisionDiagram:
+    """f & g through the memoized ITE."""
+    return _bdd(_ite_memo(f.node, g.node, BDDNODEZERO, {}))
+
+
+def bdd_diff(f: BinaryDecisionDiagram, g: BinaryDecisionDiagram) -> BinaryDecisionDiagram:
+    """f & ~g through the memoized ITE (no negated copy of g is built)."""
+    return _bdd(_ite_memo(g.node, BDDNODEZERO, f.node, {}))
+
+
+def bdd_rename(f: BinaryDecisionDiagram, mapping: Dict) -> BinaryDecisionDiagram:
+    """
+    f with variable v replaced by variable mapping[v] (a memoized
+    compose for variable-to-variable maps, any target order).
+    """
+    roots = {v.uniqid: w.node for v, w in mapping.items()}
+    cache: Dict = {}
+    done: Dict = {}
+
+    def walk(node):
+        if node.root < 0:
+            return node
+        ret = done.get(node)
+        if ret is None:
+            lo, hi = walk(node.lo), walk(node.hi)
+            var = roots.get(node.root)
+            if var is None:
+                var = _bddnode(node.root, BDDNODEZERO, BDDNODEONE)
+            ret = _ite_memo(var, hi, lo, cache)
+            done[node] = ret
+        return ret
+
+    return _bdd(walk(f.node))
+
+
+def _relprod(f, g, qroots, cache):
+    """
+    Fused ∃qvars. (f ∧ g) on BDD nodes, quantifying while conjoining so the
+    full conjunction is never built.
+    """
+    if f is BDDNODEZERO or g is BDDNODEZERO:
+        return BDDNODEZERO
+    if f is BDDNODEONE and g is BDDNODEONE:
+        return BDDNODEONE
+    key = (f, g)
+    ret = cache.get(key)
+    if ret is not None:
+        return ret
+
+    root = min(node.root for node in (f, g) if node.root > 0)
+    f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+    g0, g1 = (g.lo, g.hi) if g.root == root else (g, g)
+
+    if root in qroots:
+        ret = _relprod(f0, g0, qroots, cache)
+        if ret is not BDDNODEONE:
+            ret = _ite_memo(ret, BDDNODEONE, _relprod(f1, g1, qroots, cache), cache)
+    else:
+        ret = _bddnode(root, _relprod(f0, g0, qroots, cache), _relprod(f1, g1, qroots, cache))
+    cache[key] = ret
+    return ret
+
+
+def _relabel(f, roots, cache):
+    """
+    Rename variables by relabelling nodes (roots: old uniqid -> new uniqid).
+    Only valid when the renaming keeps the relative order of every variable
+    in f, e.g. x'_p -> x_p with interleaved variables once x_p is quantified.
+    """
+    if f.root < 0:
+        return f
+    ret = cache.get(f)
+    if ret is None:
+        ret = _bddnode(roots.get(f.root, f.root),
+                       _relabel(f.lo, roots, cache), _relabel(f.hi, roots, cache))
+        cache[f] = ret
+    return ret
+
+
+class _SymbolicEncoding:
+    """
+    Variables, relations and image operator for one variable order.
+
+    With a PlaceCompression, `perm` orders the basis places only: they are
+    the state variables. Each implied place q still has a variable X[q]
+    (created last, unused during the fixpoint) and F[q] is its value as a
+    BDD over the basis (the invariant equation equal to 1); the relations
+    read F instead of X, so no X'[q] is needed. expand() conjoins
+    X[q] <-> F[q] back onto a set of states.
+    """
+
+    def __init__(self, pn: PetriNet, perm: List[int], interleave: bool, cluster_limit: int = 0,
+                 stats: Stats = NULL_STATS, compression: Optional[PlaceCompression] = None):
+        self.pn = pn
+        self.stats = stats
+        self.perm = perm
+        self.interleave = interleave
+        self.cluster_limit = cluster_limit
+        self.compression = compression
+        self.num_places = len(perm)
+        implied = compression.implied if compression is not None else []
+        self.X, self.Xp = _make_state_vars(perm, interleave, implied)
+        self.state_vars = [self.X[p] for p in perm]
+        self.TRUE = self.X[0] | ~self.X[0]
+        self.FALSE = self.X[0] & ~self.X[0]
+        self.F = list(self.X)
+        for q in implied:
+            terms = [(self.X[p], c) for p, c in compression.terms[q]]
+            self.F[q] = _linear_eq_bdd(terms, compression.denom[q] - compression.const[q],
+                                       self.TRUE, self.FALSE)
+        self.relations = _build_relations(pn, self.F, self.Xp, perm, cluster_limit)
+
+    def image(self, S: BinaryDecisionDiagram, rel: _Relation) -> BinaryDecisionDiagram:
+        """Img(S) = (∃X[changed]. S(X) ∧ R(X, X'))[X'/X] via one relprod."""
+        if not self.stats.enabled:
+            return self._image(S, rel)
+        start = time.perf_counter()
+        img = self._image(S, rel)
+        self.stats.emit("bdd.image", transitions=rel.transitions, seconds=time.perf_counter() - start,
+                        input_nodes=bdd_node_count(S), image_nodes=bdd_node_count(img))
+        return img
+
+    def _image(self, S: BinaryDecisionDiagram, rel: _Relation) -> BinaryDecisionDiagram:
+        node = _relprod(S.node, rel.R.node, rel.qroots, {})
+        if node is BDDNODEZERO:
+            return self.FALSE
+        # Rename only the changed places X' -> X (x_p, x'_p adjacent when
+        # interleaved: a plain relabel, otherwise a general compose)
+        if self.interleave:
+            return _bdd(_relabel(node, rel.rename_roots, {}))
+        return bdd_rename(_bdd(node), rel.rename_map)
+
+    def top_level(self, rel: _Relation) -> int:
+        """Position in the variable order of the highest place the relation touches."""
+        pos = {p: i for i, p in enumerate(self.perm)}
+        return min((pos[p] for p in rel.support if p in pos), default=self.num_places)
+
+    def moved_to(self, perm: List[int]) -> Tuple["_SymbolicEncoding", Dict]:
+        """Same net in a new order (same levels, new assignment), plus the X -> X_new map."""
+        enc = _SymbolicEncoding(self.pn, perm, self.interleave, self.cluster_limit, self.stats,
+                                self.compression)
+        return enc, {self.X[p]: enc.X[p] for p in self.perm}
+
+    def expand(self, S: BinaryDecisionDiagram) -> BinaryDecisionDiagram:
+        """S over the basis -> S over all places (implied places filled in)."""
+        if self.compression is None:
+            return S
+        for q in self.compression.implied:
+            f = self.F[q].node
+            same = _ite_memo(self.X[q].node, f, _ite_memo(f, BDDNODEZERO, BDDNODEONE, {}), {})
+            S = _bdd(_ite_memo(S.node, same, BDDNODEZERO, {}))
+        return S
+
+
+STRATEGIES = ("bfs", "chaining", "level-chaining")
+# Tên cũ của "level-chaining", vẫn nhận để không làm hỏng lời gọi sẵn có
+_STRATEGY_ALIASES = {"saturation": "level-chaining"}
+
+
+def bdd_trace(
+    pn: PetriNet,
+    rings: List[BinaryDecisionDiagram],
+    marking: Sequence[int],
+    place_vars: Sequence[BinaryDecisionDiagram]
+) -> Optional[List[int]]:
+    """
+    Shortest firing sequence (transition indices) from M0 to `marking`,
+    read backwards off the onion rings of bdd_reachable_counting (with the
+    place_vars of the same call): if the marking first appears in ring k,
+    one of its predecessors lies in ring k - 1, and so on down to M0. Only
+    concrete markings are handled, each step costs at most |T| membership
+    tests (one BDD path each). None if the marking is in no ring.
+    """
+    net = CompiledNet(pn)
+    place_of = {x.uniqid: p for p, x in enumerate(place_vars)}
+
+    def contains(f: BinaryDecisionDiagram, m: int) -> bool:
+        node = f.node
+        while node.root >= 0:
+            node = node.hi if m >> place_of[node.root] & 1 else node.lo
+        return node is BDDNODEONE
+
+    m = net.encode(marking)
+    k = next((i for i, ring in enumerate(rings) if contains(ring, m)), None)
+    if k is None:
+        return None
+    seq = []
+    for i in range(k - 1, -1, -1):
+        for t in net.firable:
+            prev = m ^ net.toggle[t]
+            if net.is_enabled(prev, t) and contains(rings[i], prev):
+                seq.append(t)
+                m = prev
+                break
+    seq.reverse()
+    return seq
+
+
+def compare_variable_orders(
+    pn: PetriNet,
+    methods: Sequence[Union[str, Sequence[int]]] = ORDER_METHODS,
+    interleave: bool = True
+) -> Dict[str, Dict]:
+    """
+    Run bdd_reachable_counting once per ordering method and report, for
+    each, the peak BDD node count, the final Reached size and the run time.
+    """
+    report = {}
+    for method in methods:
+        info: Dict = {}
+        start = time.perf_counter()
+        _, count = bdd_reachable_counting(pn, order=method, interleave=interleave, info=info)
+        info['seconds'] = time.perf_counter() - start
+        info['count'] = count
+        report[method if isinstance(method, str) else str(list(method))] = info
+    return report
+
+
+@_deep_recursion
+def bdd_reachable_counting(
+    pn: PetriNet,
+    frontier_counts: Optional[List[int]] = None,
+    order: Union[str, Sequence[int]] = "pnml",
+    interleave: bool = True,
+    reorder_threshold: Optional[int] = None,
+    info: Optional[Dict] = None,
+    strategy: str = "bfs",
+    cluster_limit: int = 8,
+    stats: Optional[Stats] = None,
+    compress: bool = False,
+    rings: Optional[List[BinaryDecisionDiagram]] = None,
+    place_vars: Optional[List[BinaryDecisionDiagram]] = None
+) -> Tuple[BinaryDecisionDiagram, int]:
     """
     Symbolic reachability analysis using Binary Decision Diagrams (BDDs).
     
@@ -16,136 +686,234 @@ def bdd_reachable_counting(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
     
     Optimizations:
     - Use partitioned transition relations (separate R_t per transition)
+    - R_t only over •t ∪ t• (frame is implicit), image by a fused and-exists
+      that quantifies only the places t changes; transitions whose changed
+      places overlap are clustered up to `cluster_limit` places
     - Frontier-based traversal (only explore new states)
     - Early termination on fixed point
+
+    Strategy (all run to the exact fixpoint, no iteration cap):
+    - "bfs": image of the whole frontier through every R_t per iteration
+    - "chaining": R_t applied one after another, each to the states
+      accumulated so far, so a pass can chain several firings
+    - "level-chaining": transitions grouped by their top variable level
+      and fired bottom-up; a group is run to its local fixpoint on the whole
+      Reached set and any growth restarts from the bottom group. This is
+      chaining ordered by level, not node-wise saturation (Ciardo et al.):
+      fixpoints are taken on the global BDD, not per node with a saturated
+      node cache. "saturation" is accepted as an old name for it.
+
+    Variable ordering:
+    - order: place order, see variable_order ("pnml", "force", "dfs",
+      "cuthill-mckee" or an explicit permutation)
+    - interleave: x_p and x'_p adjacent (default) instead of two blocks
+    - reorder_threshold: when Reached exceeds this many nodes, sift the
+      order (see _sift_order), rebuild the relations and double the threshold
+
+    compress: only the basis places of the P-invariants (see
+    Invariants.PlaceCompression) are state variables during the fixpoint;
+    implied places enter the relations as functions of the basis and are
+    added back to the returned BDD, so the result is the same.
+
+    If `frontier_counts` is a list, the exact number of markings found in
+    each round (M0 first; the BFS frontiers for strategy="bfs") is appended
+    to it. If `rings` is a list, the BFS onion rings are appended to it as
+    BDDs over the same variables as Reached (ring k = markings at distance
+    exactly k, M0 first), for bdd_trace; only strategy="bfs" builds rings.
+    If `info` is a dict it is filled with the final order, iteration
+    count and peak node count.
+
+    The returned BDD is over the encoding's own variables, laid out in the
+    final variable order on the shared levels (see bdd_level_vars), so it
+    keeps the size the order gave it. If `place_vars` is a list, the
+    variable of each place is appended to it (place order); pass it to
+    symbolic_deadlock_detector, max_reachable_marking, bdd_trace or
+    bdd_model_count with this BDD. A later call reuses the same levels
+    for its own places, so BDDs from different calls must not be mixed.
+
+    `stats` (see Stats.py) receives a "bdd.image" event per image
+    computation (relation, seconds, node counts), a "bdd.iteration" event
+    per round (frontier size, Reached/Frontier/New node counts), "bdd.reorder"
+    and a final "bdd.done". With the default no-op sink none of these
+    counts is computed.
     """
+    strategy = _STRATEGY_ALIASES.get(strategy, strategy)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    if rings is not None and strategy != "bfs":
+        raise ValueError("Onion rings need strategy='bfs'")
     
-    num_trans, num_places = pn.I.shape
+    num_trans, num_places = pn.num_transitions, pn.num_places
     
     if num_places == 0:
-        return None, 0
+        # Mạng không có place: đúng một marking (marking rỗng)
+        empty = expr2bdd(expr(1))
+        if frontier_counts is not None:
+            frontier_counts.append(1)
+        if rings is not None:
+            rings.append(empty)
+        return empty, 1
 
     # 1. Create BDD variables for current (X) and next (X') states
-    # Avoid PyEDA collections.Sequence warning by creating variables individually
-    X = [bddvar(f'x{i}') for i in range(num_places)]
-    Xp = [bddvar(f'xp{i}') for i in range(num_places)]
-    
-    # BDD constants
-    TRUE = X[0] | ~X[0]
-    FALSE = X[0] & ~X[0]
-    
-    # Variable renaming map: X' -> X
-    rename_map = {Xp[i]: X[i] for i in range(num_places)}
+    # 3. Build partitioned transition relations R_t(x, x')
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    perm = variable_order(pn, order)
+    compression = None
+    if compress:
+        compression = PlaceCompression(pn)
+        basis = set(compression.basis)
+        perm = [p for p in perm if p in basis]
+    enc = _SymbolicEncoding(pn, perm, interleave, cluster_limit, stats, compression)
+    if stats.enabled:
+        stats.emit("bdd.start", places=num_places, state_vars=len(enc.state_vars), transitions=num_trans,
+                   relations=len(enc.relations), strategy=strategy, interleave=interleave)
     
     # 2. Encode initial marking M0 as BDD
-    M0_bdd = TRUE
-    for i in range(num_places):
+    M0_bdd = enc.TRUE
+    for i in enc.perm:
         if pn.M0[i] > 0:
-            M0_bdd &= X[i]
+            M0_bdd &= enc.X[i]
         else:
-            M0_bdd &= ~X[i]
+            M0_bdd &= ~enc.X[i]
 
-    # 3. Build partitioned transition relations R_t(x, x')
-    # Each R_t encodes: enabling condition + state change + frame condition
-    trans_relations = []
-
-    for t in range(num_trans):
-        R_t = TRUE
-        
-        # For each place, encode the transition behavior
-        for p in range(num_places):
-            input_tokens = pn.I[t, p]
-            output_tokens = pn.O[t, p]
-            
-            if input_tokens > 0 and output_tokens == 0:
-                # Token consumed: X[p]=1 (enabled), X'[p]=0 (after firing)
-                R_t &= X[p] & ~Xp[p]
-            elif input_tokens == 0 and output_tokens > 0:
-                # Token produced: X[p]=0 (1-safe constraint), X'[p]=1
-                R_t &= ~X[p] & Xp[p]
-            elif input_tokens > 0 and output_tokens > 0:
-                # Self-loop: X[p]=1, X'[p]=1
-                R_t &= X[p] & Xp[p]
-            else:
-                # Place unchanged: X'[p] = X[p]
-                R_t &= (X[p] & Xp[p]) | (~X[p] & ~Xp[p])
-        
-        if not R_t.is_zero():
-            trans_relations.append(R_t)
-
-    # 4. Symbolic reachability computation using frontier-based traversal
+    # 4. Symbolic reachability computation
     # Pure symbolic BDD approach (no explicit state tracking)
     Reached = M0_bdd  # Set of all reached states (BDD)
-    Frontier = M0_bdd  # Set of newly discovered states (BDD)
-    
-    max_iterations = min(1000, 2 ** min(num_places, 20))
-    
-    for iteration in range(max_iterations):
-        # Compute successors of frontier states
+    Frontier = M0_bdd  # States whose successors are still to be computed
+    if frontier_counts is not None:
+        frontier_counts.append(bdd_model_count(Frontier, enc.state_vars))
+
+    track_nodes = info is not None or reorder_threshold is not None or stats.enabled
+    peak_nodes = bdd_node_count(Reached) if track_nodes else 0
+    iterations = 0
+    # Các vành BFS (onion rings), chỉ giữ khi được yêu cầu
+    layers = [M0_bdd] if rings is not None else None
+
+    def after_round(New, Current):
+        """
+        Bookkeeping after each round that found new states (may reorder).
+        Current is the set the round's images were taken of.
+        """
+        nonlocal enc, Reached, Frontier, peak_nodes, reorder_threshold, iterations, layers
+        iterations += 1
+        if layers is not None:
+            layers.append(New)
+        if frontier_counts is not None:
+            frontier_counts.append(bdd_model_count(New, enc.state_vars))
+        if not track_nodes:
+            return
+        reached_nodes = bdd_node_count(Reached)
+        new_nodes = bdd_node_count(New)
+        peak_nodes = max(peak_nodes, reached_nodes, new_nodes)
+        if stats.enabled:
+            stats.emit("bdd.iteration", iteration=iterations, frontier_states=bdd_model_count(New, enc.state_vars),
+                       reached_nodes=reached_nodes, frontier_nodes=bdd_node_count(Current),
+                       new_nodes=new_nodes, seconds=time.perf_counter() - start)
+
+        # Dynamic reordering: sift, then move everything to fresh variables
+        if reorder_threshold is not None and reached_nodes > reorder_threshold:
+            enc, move = enc.moved_to(_sift_order(Reached, enc.X, enc.perm))
+            Reached = bdd_rename(Reached, move)
+            Frontier = bdd_rename(Frontier, move)
+            if layers is not None:
+                layers = [bdd_rename(ring, move) for ring in layers]
+            reorder_threshold *= 2
+            if stats.enabled:
+                stats.emit("bdd.reorder", nodes_before=reached_nodes,
+                           nodes_after=bdd_node_count(Reached), order=enc.perm)
+
+    if strategy == "bfs":
         # Image(Frontier) = ∃X. (Frontier(X) ∧ R(X, X'))[X'/X]
-        
-        New = FALSE  # New states discovered in this iteration (BDD)
-        
-        # For each transition, compute image of frontier
-        for R_t in trans_relations:
-            # Step 1: Constrain transition to frontier states
-            # Frontier(X) ∧ R_t(X, X')
-            constrained = Frontier & R_t
-            
-            if constrained.is_zero():
-                continue
-            
-            # Step 2: Existential quantification over current state variables X
-            # ∃X. (Frontier(X) ∧ R_t(X, X'))
-            # This gives us states reachable in X' variables
-            img = constrained
-            for i in range(num_places):
-                img = img.smoothing(X[i])  # Existential quantification
-            
-            # Step 3: Rename X' to X to get successor states in X variables
-            img = img.compose(rename_map)
-            
-            # Step 4: Filter out already visited states immediately
-            img &= ~Reached
-            
-            # Step 5: Union with new states discovered so far
-            New |= img
-        
-        # Check for fixed point (no new states found)
-        if New.is_zero():
-            break
-        
-        # Update reached set and frontier (pure symbolic operations)
-        Reached |= New
-        Frontier = New
-    
-    # 5. Count reachable markings from BDD
-    # Need to properly enumerate all states, including don't-care variables
-    total_markings = 0
-    try:
-        for assignment in Reached.satisfy_all():
-            # Count how many variables are "don't care" (not in assignment)
-            # Each don't care variable can be 0 or 1, doubling the count
-            missing_vars = []
-            for i in range(num_places):
-                if X[i] not in assignment:
-                    missing_vars.append(i)
-            
-            # Each assignment represents 2^(number of don't cares) actual states
-            num_actual_states = 2 ** len(missing_vars)
-            total_markings += num_actual_states
-    except:
-        # Fallback: estimate from BDD structure if enumeration fails
-        total_markings = 0
+        while True:
+            New = enc.FALSE  # New states discovered in this iteration (BDD)
+
+            # For each transition, compute image of frontier
+            for rel in enc.relations:
+                # Filter out already visited states immediately
+                New = bdd_or(New, bdd_diff(enc.image(Frontier, rel), Reached))
+
+            # Check for fixed point (no new states found)
+            if New.is_zero():
+                break
+
+            # Update reached set and frontier (pure symbolic operations)
+            Reached = bdd_or(Reached, New)
+            Current, Frontier = Frontier, New
+            after_round(New, Current)
+
+    elif strategy == "chaining":
+        # Frontier = states added since the previous pass started; states
+        # found by R_t in this pass are already fed to the following R_t'
+        while not Frontier.is_zero():
+            Current = Frontier
+            Added = enc.FALSE
+            for rel in enc.relations:
+                img = bdd_diff(enc.image(Frontier, rel), Reached)
+                if img.is_zero():
+                    continue
+                Reached = bdd_or(Reached, img)
+                Frontier = bdd_or(Frontier, img)
+                Added = bdd_or(Added, img)
+            Frontier = Added
+            if not Added.is_zero():
+                after_round(Added, Current)
+
+    else:
+        # Level-chaining: level groups sorted bottom-up (deepest top level first)
+        def level_groups():
+            groups = collections.defaultdict(list)
+            for rel in enc.relations:
+                groups[enc.top_level(rel)].append(rel)
+            return [groups[k] for k in sorted(groups, reverse=True)]
+
+        groups = level_groups()
+        i = 0
+        while i < len(groups):
+            grew = reordered = False
+            Local = Reached
+            # Local fixpoint of group i (only new states are re-imaged)
+            while True:
+                New = enc.FALSE
+                for rel in groups[i]:
+                    New = bdd_or(New, bdd_diff(enc.image(Local, rel), Reached))
+                if New.is_zero():
+                    break
+                Reached = bdd_or(Reached, New)
+                Current, Local = Local, New
+                grew = True
+                current = enc
+                after_round(New, Current)
+                if enc is not current:
+                    # Thứ tự biến đổi → nhóm theo level cũng đổi, làm lại từ đáy
+                    groups = level_groups()
+                    reordered = True
+                    break
+            # Growth may enable lower groups again: restart from the bottom
+            i = 0 if reordered or (grew and i > 0) else i + 1
+
+    # Thêm lại các place suy ra từ P-invariant (không đổi gì nếu không nén)
+    Reached = enc.expand(Reached)
+    X = enc.X
     
-    # 6. Map x0, x1, x2... to actual place names (P1, P2, P3...)
-    if hasattr(pn, 'place_ids') and pn.place_ids:
-        var_map = {}
-        for i in range(min(num_places, len(pn.place_ids))):
-            place_var = bddvar(pn.place_ids[i])
-            var_map[X[i]] = place_var
-        
-        # Apply mapping to Reached BDD
-        Reached = Reached.compose(var_map)
+    # 5. Count reachable markings from BDD (linear in the number of nodes)
+    total_markings = bdd_model_count(Reached, X)
+
+    if info is not None:
+        info['order'] = enc.perm
+        info['interleave'] = interleave
+        info['strategy'] = strategy
+        info['iterations'] = iterations
+        info['peak_nodes'] = peak_nodes
+        info['final_nodes'] = bdd_node_count(Reached)
+    if stats.enabled:
+        stats.emit("bdd.done", states=total_markings, iterations=iterations, peak_nodes=peak_nodes,
+                   final_nodes=bdd_node_count(Reached), seconds=time.perf_counter() - start)
     
-    return Reached, total_markings
\ No newline at end of file
+    # 6. Expose the variable of each place (x_p of the final encoding)
+    if place_vars is not None:
+        place_vars.extend(X)
+    if layers is not None:
+        rings.extend(enc.expand(ring) for ring in layers)
+
+    return Reached, total_markings
@@ -1,9 +1,448 @@
 from collections import deque
+import multiprocessing as mp
+import os
+import queue as queue_mod
 import numpy as np
 from .PetriNet import PetriNet
-from typing import Set, Tuple
+from .BitMarking import CompiledNet, is_bit_packable, iter_bits
+from .VisitedStore import ADD_BATCH_KEYS, ParentLog, VisitedStore, make_store
+from .Invariants import make_packed_store
+from .Stream import ReachabilityStream
+from .Stats import NULL_STATS, Stats, rate
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+import time
 
-def bfs_reachable_traversal(pn: PetriNet) -> Set[Tuple[int, ...]]:
+def bfs_reachable_traversal(
+    pn: PetriNet,
+    engine: str = "bitmask",
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    stats: Optional[Stats] = None,
+    compress: bool = False
+) -> Set[Tuple[int, ...]]:
+    """
+    Explicit BFS over the 1-safe reachability set.
+
+    engine:
+    - "bitmask": markings are Python ints (see BitMarking.CompiledNet),
+      enabling/firing/1-safe check are a few bitwise ops per transition
+    - "frontier": level-synchronous BFS, a whole BFS level is expanded at
+      once on an (F x P) uint8 matrix with vectorized dedup (CSR-based
+      enabling for sparse nets, no dense I/O needed)
+    - "numpy":   original per-state NumPy implementation
+
+    memory_budget (bytes) bounds the visited set of the bitmask engine, see
+    VisitedStore.make_store; spill files go to spill_dir (default: tmp).
+    Only the visited set is bounded: the current and next BFS level stay in
+    RAM (successors are deduped in batches of VisitedStore.ADD_BATCH_KEYS).
+    compress=True stores only the P-invariant basis places of each marking
+    (see Invariants.PackedStore), mostly useful together with memory_budget.
+
+    stats (see Stats.py) receives one "bfs.level" event per BFS level
+    (bitmask and frontier engines) and a final "bfs.done" (every engine;
+    no depth for numpy).
+
+    All engines return the same set of marking tuples.
+    """
+    if engine == "bitmask" and is_bit_packable(pn):
+        net, visited = bfs_reachable_store(pn, memory_budget, spill_dir, stats, compress)
+        with visited:
+            # Giải mã về tuple để giữ tương thích với API cũ
+            return {net.decode(m) for m in visited}
+    if engine == "frontier" and is_bit_packable(pn):
+        return _bfs_frontier(pn, stats=stats or NULL_STATS)
+    if engine not in ("bitmask", "frontier", "numpy"):
+        raise ValueError(f"Unknown BFS engine: {engine}")
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    states = _bfs_numpy(pn)
+    if stats.enabled:
+        elapsed = time.perf_counter() - start
+        stats.emit("bfs.done", engine="numpy", states=len(states), seconds=elapsed,
+                   states_per_sec=rate(len(states), elapsed))
+    return states
+
+
+def bfs_reachable_store(
+    pn: PetriNet,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    stats: Optional[Stats] = None,
+    compress: bool = False
+) -> Tuple[CompiledNet, VisitedStore]:
+    """
+    Reachable markings kept bit-packed in a VisitedStore (no tuple set).
+
+    For state spaces that do not fit in RAM as tuples: iterate the store
+    and decode with net.decode. The caller should close() the store.
+    """
+    if not is_bit_packable(pn):
+        raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+    net = CompiledNet(pn)
+    if compress:
+        visited = make_packed_store(pn, memory_budget, spill_dir)
+    else:
+        visited = make_store(net.num_places, memory_budget, spill_dir)
+    _bfs_bitmask(net, visited, stats or NULL_STATS)
+    return net, visited
+
+
+def iter_bfs_reachable(
+    pn: PetriNet,
+    max_states: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    max_memory: Optional[int] = None,
+    stop_when: Optional[Callable[[Tuple[int, ...]], bool]] = None,
+    batch_size: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    stats: Optional[Stats] = None,
+    parents: Optional[ParentLog] = None
+) -> ReachabilityStream:
+    """
+    Streaming BFS: yields marking tuples level by level as they are found.
+
+    Budgets, early exit and the final complete/truncated status are handled
+    by Stream.ReachabilityStream; memory_budget/spill_dir only choose the
+    visited backend (spilling, not truncation) and do not bound the BFS
+    levels held in RAM.
+
+    With a ParentLog the i-th marking yielded gets id i, so
+    parents.trace(i) is a shortest firing sequence to it.
+    """
+    if not is_bit_packable(pn):
+        raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+    net = CompiledNet(pn)
+    visited = make_store(net.num_places, memory_budget, spill_dir)
+    stats = stats or NULL_STATS
+    return ReachabilityStream(net, _iter_bfs_bitmask(net, visited, stats, parents), visited,
+                              max_states, max_seconds, max_memory, stop_when, batch_size, stats)
+
+
+def _bfs_bitmask(net: CompiledNet, visited: VisitedStore, stats: Stats = NULL_STATS) -> VisitedStore:
+    for _ in _iter_bfs_bitmask(net, visited, stats):
+        pass
+    return visited
+
+
+def _iter_bfs_bitmask(net: CompiledNet, visited: VisitedStore, stats: Stats = NULL_STATS,
+                      parents: Optional[ParentLog] = None) -> Iterator[int]:
+    """
+    Yield each newly visited marking (bitmask), M0 first, in BFS level order.
+    parents, if given, records (parent id, transition) per marking in the
+    same order.
+    """
+    toggle = net.toggle
+    start = time.perf_counter()
+    depth = 0
+
+    # visited chứa các marking dạng int (bitmask)
+    visited.add(net.m0)
+    root = parents.add(-1, -1) if parents is not None else -1
+    yield net.m0
+
+    # Mỗi phần tử mang theo enabled-set của nó (bitmask theo transition)
+    # và id trong ParentLog; successor chỉ kiểm tra lại các transition bị
+    # ảnh hưởng (affected)
+    frontier = [(net.m0, net.enabled_set(net.m0), root)]
+
+    while frontier:
+        # Gom successor theo lô (tối đa ADD_BATCH_KEYS marking khác nhau) rồi
+        # dedup một lượt với visited (add_batch), enabled-set chỉ được tính
+        # cho marking thực sự mới. Successor trùng giữa hai lô bị visited loại.
+        next_frontier = []
+        successors = 0
+        last = len(frontier) - 1
+        succ = {}
+        for k, (m, E, i) in enumerate(frontier):
+            for t in iter_bits(E):
+                new_m = m ^ toggle[t]
+                if new_m not in succ:
+                    succ[new_m] = (E, t, i)
+            if len(succ) < ADD_BATCH_KEYS and k < last:
+                continue
+            successors += len(succ)
+            for new_m in visited.add_batch(succ):
+                E_p, t, i_p = succ[new_m]
+                if parents is not None:
+                    i_p = parents.add(i_p, t)
+                yield new_m
+                next_frontier.append((new_m, net.update_enabled(new_m, E_p, t), i_p))
+            succ = {}
+        frontier = next_frontier
+
+        depth += 1
+        if stats.enabled:
+            # frontier = độ sâu hàng đợi của level kế tiếp
+            elapsed = time.perf_counter() - start
+            stats.emit("bfs.level", depth=depth, frontier=len(frontier), successors=successors,
+                       visited=len(visited), states_per_sec=rate(len(visited), elapsed))
+
+    if stats.enabled:
+        elapsed = time.perf_counter() - start
+        stats.emit("bfs.done", engine="bitmask", states=len(visited), depth=depth,
+                   seconds=elapsed, states_per_sec=rate(len(visited), elapsed))
+
+
+def parallel_reachable_traversal(
+    pn: PetriNet,
+    workers: Optional[int] = None,
+    batch_size: int = 512
+) -> Set[Tuple[int, ...]]:
+    """
+    Multi-process explicit reachability (same result as bfs_reachable_traversal).
+
+    The state space is hash-partitioned: worker i owns every bit-packed
+    marking m with owner(m) == i and keeps its own visited set and inbox.
+    Successors owned by another worker are batched (batch_size markings)
+    and sent to that worker's inbox queue.
+
+    Termination detection uses a shared counter of outstanding batches:
+    a batch is counted before it is sent and uncounted only after its owner
+    has finished expanding it (children are counted first), so the counter
+    reaches 0 exactly when no work is left anywhere.
+
+    If a worker dies (non-zero exit code), the others are terminated and
+    RuntimeError is raised instead of waiting for its result forever.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or not is_bit_packable(pn):
+        return bfs_reachable_traversal(pn)
+
+    net = CompiledNet(pn)
+    ctx = mp.get_context()
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    pending = ctx.Value('q', 1)
+
+    # Batch đầu tiên: M0 gửi tới worker sở hữu nó
+    inboxes[_owner(net.m0, workers)].put([net.m0])
+
+    procs = [
+        ctx.Process(target=_parallel_worker,
+                    args=(wid, workers, net, inboxes, results, pending, batch_size))
+        for wid in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    visited = set()
+    received = 0
+    try:
+        while received < workers:
+            try:
+                visited.update(results.get(timeout=0.1))
+                received += 1
+            except queue_mod.Empty:
+                # Worker chết giữa chừng: các worker còn lại sẽ chờ mãi
+                failed = [(wid, proc.exitcode) for wid, proc in enumerate(procs)
+                          if proc.exitcode not in (None, 0)]
+                if failed:
+                    wid, code = failed[0]
+                    raise RuntimeError(f"Parallel BFS worker {wid} exited with code {code}")
+    except BaseException:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+        raise
+    finally:
+        for proc in procs:
+            proc.join()
+
+    return {net.decode(m) for m in visited}
+
+
+def _owner(m: int, workers: int) -> int:
+    """Hash partition of the state space (int hash is not salted, stable across processes)."""
+    return hash((m,)) % workers
+
+
+def _parallel_worker(wid, workers, net, inboxes, results, pending, batch_size):
+    visited = set()
+    inbox = inboxes[wid]
+    outgoing: List[List[int]] = [[] for _ in range(workers)]
+
+    def flush(owner):
+        with pending.get_lock():
+            pending.value += 1
+        inboxes[owner].put(outgoing[owner])
+        outgoing[owner] = []
+
+    while True:
+        try:
+            batch = inbox.get(timeout=0.01)
+        except queue_mod.Empty:
+            # Không còn batch nào đang chờ/đang xử lý ở bất kỳ worker nào
+            if pending.value == 0:
+                break
+            continue
+
+        stack = []
+        for m in batch:
+            if m not in visited:
+                visited.add(m)
+                stack.append(m)
+
+        while stack:
+            m = stack.pop()
+            for _, new_m in net.successors(m):
+                owner = _owner(new_m, workers)
+                if owner == wid:
+                    if new_m not in visited:
+                        visited.add(new_m)
+                        stack.append(new_m)
+                else:
+                    outgoing[owner].append(new_m)
+                    if len(outgoing[owner]) >= batch_size:
+                        flush(owner)
+
+        for owner in range(workers):
+            if outgoing[owner]:
+                flush(owner)
+
+        # Batch này xong (các batch con đã được đếm trước đó)
+        with pending.get_lock():
+            pending.value -= 1
+
+    results.put(list(visited))
+
+
+def _row_keys(M: np.ndarray) -> np.ndarray:
+    """Pack each 0/1 row of M into one fixed-width void key (sortable, hashable)."""
+    packed = np.ascontiguousarray(np.packbits(M, axis=1))
+    return packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+
+
+def _keys_to_rows(keys: np.ndarray, num_places: int) -> np.ndarray:
+    """Inverse of _row_keys."""
+    packed = keys.view(np.uint8).reshape(len(keys), -1)
+    return np.unpackbits(packed, axis=1, count=num_places)
+
+
+def _dense_expander(pn: PetriNet, max_cells: int):
+    """Successors of a block of markings via one F x T x P broadcast on I."""
+    I = pn.I.astype(np.int16)
+    O = pn.O.astype(np.int16)
+    # Giới hạn kích thước khối F x T x P khi so sánh broadcast
+    chunk = max(1, max_cells // max(1, pn.num_transitions * pn.num_places))
+
+    def expand(M: np.ndarray) -> np.ndarray:
+        # Ma trận enabled F x T: M >= I (một phép so sánh broadcast)
+        enabled = np.all(M[:, None, :] >= pn.I[None, :, :], axis=2)
+        fi, ti = np.nonzero(enabled)
+
+        # Tất cả successor cùng lúc: M' = M - I + O
+        succ = M[fi].astype(np.int16) - I[ti] + O[ti]
+
+        # Loại các marking vi phạm 1-safe
+        return succ[np.all(succ <= 1, axis=1)].astype(np.uint8)
+
+    return chunk, expand
+
+
+def _flatten_rows(rows: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Ragged lists -> (indices, indptr)."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    indices = np.array([p for r in rows for p in r], dtype=np.int64)
+    return indices, indptr
+
+
+def _sparse_expander(pn: PetriNet, max_cells: int):
+    """
+    Same successors without a dense matrix: per-transition counts of marked
+    preset places and marked produce-only places come from a cumulative sum
+    over the CSR column gather, firing flips the t's toggle places.
+    """
+    pre = [list(pn.preset[t]) for t in range(pn.num_transitions)]
+    produce = [sorted(set(pn.postset[t]) - set(pn.preset[t])) for t in range(pn.num_transitions)]
+    toggle = [sorted(set(pn.postset[t]) ^ set(pn.preset[t])) for t in range(pn.num_transitions)]
+    pre_idx, pre_ptr = _flatten_rows(pre)
+    prod_idx, prod_ptr = _flatten_rows(produce)
+    tog_idx, tog_ptr = _flatten_rows(toggle)
+    pre_len = np.diff(pre_ptr)
+    ordinary = np.array(pn.ordinary, dtype=bool)
+    chunk = max(1, max_cells // max(1, len(pre_idx) + len(prod_idx) + pn.num_transitions))
+
+    def row_counts(M, idx, ptr):
+        cs = np.zeros((len(M), len(idx) + 1), dtype=np.int32)
+        np.cumsum(M[:, idx], axis=1, out=cs[:, 1:])
+        return cs[:, ptr[1:]] - cs[:, ptr[:-1]]
+
+    def expand(M: np.ndarray) -> np.ndarray:
+        # enabled F x T: đủ token ở •t, và t• \ •t còn trống (1-safe)
+        enabled = ((row_counts(M, pre_idx, pre_ptr) == pre_len)
+                   & (row_counts(M, prod_idx, prod_ptr) == 0) & ordinary)
+        fi, ti = np.nonzero(enabled)
+
+        # M' = M XOR toggle(t): lật các place thuộc •t xor t•
+        succ = M[fi]
+        lens = np.diff(tog_ptr)[ti]
+        rows = np.repeat(np.arange(len(fi)), lens)
+        offsets = np.repeat(tog_ptr[ti] - (np.cumsum(lens) - lens), lens) + np.arange(lens.sum())
+        succ[rows, tog_idx[offsets]] ^= 1
+        return succ
+
+    return chunk, expand
+
+
+def _bfs_frontier(pn: PetriNet, max_cells: int = 1 << 24, stats: Stats = NULL_STATS) -> Set[Tuple[int, ...]]:
+    t0 = time.perf_counter()
+    depth = 0
+    num_places = pn.num_places
+    if num_places == 0:
+        # Mạng không có place: đúng một marking (marking rỗng), không có
+        # cột nào để đóng gói thành key
+        if stats.enabled:
+            elapsed = time.perf_counter() - t0
+            stats.emit("bfs.done", engine="frontier", states=1, depth=0,
+                       seconds=elapsed, states_per_sec=rate(1, elapsed))
+        return {()}
+    make_expander = _sparse_expander if pn.is_sparse else _dense_expander
+    chunk, expand = make_expander(pn, max_cells)
+
+    frontier = pn.M0.astype(np.uint8).reshape(1, num_places)
+    # visited: mảng key đã sắp xếp (sorted), tra cứu bằng searchsorted
+    visited = np.unique(_row_keys(frontier))
+
+    while len(frontier):
+        succ_blocks = []
+        for start in range(0, len(frontier), chunk):
+            succ = expand(frontier[start:start + chunk])
+            if len(succ):
+                succ_blocks.append(succ)
+
+        if not succ_blocks:
+            break
+
+        # Dedup trong level, rồi loại các marking đã thăm
+        keys = np.unique(_row_keys(np.concatenate(succ_blocks)))
+        pos = np.searchsorted(visited, keys)
+        pos_c = np.minimum(pos, len(visited) - 1)
+        new_mask = visited[pos_c] != keys
+        keys, pos = keys[new_mask], pos[new_mask]
+        if len(keys) == 0:
+            break
+
+        visited = np.insert(visited, pos, keys)
+        frontier = _keys_to_rows(keys, num_places)
+        depth += 1
+        if stats.enabled:
+            elapsed = time.perf_counter() - t0
+            stats.emit("bfs.level", depth=depth, frontier=len(frontier),
+                       successors=sum(len(b) for b in succ_blocks), visited=len(visited),
+                       states_per_sec=rate(len(visited), elapsed))
+
+    if stats.enabled:
+        elapsed = time.perf_counter() - t0
+        stats.emit("bfs.done", engine="frontier", states=len(visited), depth=depth,
+                   seconds=elapsed, states_per_sec=rate(len(visited), elapsed))
+
+    return set(map(tuple, _keys_to_rows(visited, num_places).tolist()))
+
+
+def _bfs_numpy(pn: PetriNet) -> Set[Tuple[int, ...]]:
     m0 = tuple(map(int, pn.M0))
     
     # visited chứa tất cả marking đã được duyệt
@@ -49,4 +488,4 @@ def bfs_reachable_traversal(pn: PetriNet) -> Set[Tuple[int, ...]]:
                         visited.add(new_m_tuple)
                         queue.append(new_m_tuple)
             
-    return visited
\ No newline at end of file
+    return visited
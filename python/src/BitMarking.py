@@ -0,0 +1,124 @@
+from typing import Iterable, Iterator, List, Tuple
+import numpy as np
+from .PetriNet import PetriNet
+
+
+class CompiledNet:
+    """
+    1-safe Petri net compiled to Python int bitmasks.
+
+    A marking is stored as one int where bit i is the token of place i.
+    Every transition t is precompiled into four masks:
+    - pre[t]:     places in the preset •t (must be marked)
+    - post[t]:    places in the postset t•
+    - consume[t]: •t \\ t• (cleared when t fires)
+    - produce[t]: t• \\ •t (set when t fires, must be empty before: 1-safe)
+
+    Transitions with an arc weight > 1 can never fire under 1-safe semantics
+    and are left out of `firable`.
+
+    Enabled sets are ints too (bit t <-> transition t). `affected[t]` comes
+    from PetriNet's locality index, so after firing t only those transitions
+    are re-checked (see `update_enabled`).
+    """
+
+    def __init__(self, pn: PetriNet):
+        num_trans, num_places = pn.num_transitions, pn.num_places
+        self.num_places = num_places
+        self.num_transitions = num_trans
+
+        self.pre: List[int] = [0] * num_trans
+        self.post: List[int] = [0] * num_trans
+        self.consume: List[int] = [0] * num_trans
+        self.produce: List[int] = [0] * num_trans
+        # consume | produce: các bit thay đổi khi bắn t (fire = XOR)
+        self.toggle: List[int] = [0] * num_trans
+        self.firable: List[int] = []
+
+        for t in range(num_trans):
+            pre = sum(1 << p for p in pn.preset[t])
+            post = sum(1 << p for p in pn.postset[t])
+            self.pre[t] = pre
+            self.post[t] = post
+            self.consume[t] = pre & ~post
+            self.produce[t] = post & ~pre
+            self.toggle[t] = pre ^ post
+            # Trọng số > 1 thì không bao giờ bắn được trong mạng 1-safe
+            if pn.ordinary[t]:
+                self.firable.append(t)
+
+        firable = set(self.firable)
+        self.firable_mask = self.encode(t in firable for t in range(num_trans))
+        self.affected: List[Tuple[int, ...]] = [
+            tuple(u for u in pn.affected[t] if u in firable) for t in range(num_trans)
+        ]
+        self.affected_mask: List[int] = [sum(1 << u for u in pn.affected[t]) for t in range(num_trans)]
+
+        if np.any(pn.M0 < 0) or np.any(pn.M0 > 1):
+            raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+        self.m0 = self.encode(pn.M0)
+
+    def encode(self, marking: Iterable) -> int:
+        """Pack a 0/1 marking vector into an int (bit i <-> place i)."""
+        m = 0
+        for i, v in enumerate(marking):
+            if v:
+                m |= 1 << i
+        return m
+
+    def decode(self, m: int) -> Tuple[int, ...]:
+        """Unpack an int marking back into the tuple form used by BFS/DFS."""
+        return tuple((m >> i) & 1 for i in range(self.num_places))
+
+    def is_enabled(self, m: int, t: int) -> bool:
+        """Preset marked and postset-only places empty (1-safe check)."""
+        pre = self.pre[t]
+        return (m & pre) == pre and not (m & self.produce[t])
+
+    def fire(self, m: int, t: int) -> int:
+        """Fire an enabled transition: M' = M - I + O."""
+        return m ^ self.toggle[t]
+
+    def successors(self, m: int) -> Iterator[Tuple[int, int]]:
+        """Yield (t, M') for every transition that can fire at m."""
+        pre, produce, toggle = self.pre, self.produce, self.toggle
+        for t in self.firable:
+            p = pre[t]
+            if (m & p) == p and not (m & produce[t]):
+                yield t, m ^ toggle[t]
+
+    def enabled_set(self, m: int) -> int:
+        """Bitmask of all transitions that can fire at m (full scan)."""
+        E = 0
+        pre, produce = self.pre, self.produce
+        for t in self.firable:
+            p = pre[t]
+            if (m & p) == p and not (m & produce[t]):
+                E |= 1 << t
+        return E
+
+    def update_enabled(self, new_m: int, E: int, t: int) -> int:
+        """
+        Enabled set of new_m = fire(m, t), given E = enabled_set(m).
+        Only transitions in affected[t] can change, the rest is copied.
+        """
+        E &= ~self.affected_mask[t]
+        pre, produce = self.pre, self.produce
+        for u in self.affected[t]:
+            p = pre[u]
+            if (new_m & p) == p and not (new_m & produce[u]):
+                E |= 1 << u
+        return E
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Indices of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def is_bit_packable(pn: PetriNet) -> bool:
+    """True if the initial marking is 0/1, i.e. the net can use CompiledNet."""
+    return bool(np.all((pn.M0 == 0) | (pn.M0 == 1)))
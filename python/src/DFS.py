@@ -1,9 +1,120 @@
 from collections import deque
 import numpy as np
 from .PetriNet import PetriNet
-from typing import Set, Tuple
+from .BitMarking import CompiledNet, is_bit_packable, iter_bits
+from .VisitedStore import VisitedStore, make_store
+from .Invariants import make_packed_store
+from .Stream import ReachabilityStream
+from .Stats import NULL_STATS, Stats, rate
+from typing import Callable, Iterator, Optional, Set, Tuple
+import time
 
-def dfs_reachable_traversal(pn: PetriNet) -> Set[Tuple[int, ...]]:
+def dfs_reachable_traversal(
+    pn: PetriNet,
+    engine: str = "bitmask",
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    stats: Optional[Stats] = None,
+    compress: bool = False
+) -> Set[Tuple[int, ...]]:
+    """
+    Explicit DFS over the 1-safe reachability set.
+
+    engine:
+    - "bitmask": markings are Python ints (see BitMarking.CompiledNet)
+    - "numpy":   original per-state NumPy implementation
+
+    memory_budget / spill_dir / compress: see bfs_reachable_traversal.
+    stats receives "dfs.progress" every DFS_REPORT_EVERY new states (visited
+    count, stack depth, states/sec; bitmask engine only) and a final
+    "dfs.done".
+    """
+    if engine == "bitmask" and is_bit_packable(pn):
+        net = CompiledNet(pn)
+        if compress:
+            visited = make_packed_store(pn, memory_budget, spill_dir)
+        else:
+            visited = make_store(net.num_places, memory_budget, spill_dir)
+        with _dfs_bitmask(net, visited, stats or NULL_STATS):
+            # Giải mã về tuple để giữ tương thích với API cũ
+            return {net.decode(m) for m in visited}
+    if engine not in ("bitmask", "numpy"):
+        raise ValueError(f"Unknown DFS engine: {engine}")
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    states = _dfs_numpy(pn)
+    if stats.enabled:
+        elapsed = time.perf_counter() - start
+        stats.emit("dfs.done", states=len(states), seconds=elapsed, states_per_sec=rate(len(states), elapsed))
+    return states
+
+
+def iter_dfs_reachable(
+    pn: PetriNet,
+    max_states: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    max_memory: Optional[int] = None,
+    stop_when: Optional[Callable[[Tuple[int, ...]], bool]] = None,
+    batch_size: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    stats: Optional[Stats] = None
+) -> ReachabilityStream:
+    """Streaming DFS, same options as BFS.iter_bfs_reachable."""
+    if not is_bit_packable(pn):
+        raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+    net = CompiledNet(pn)
+    visited = make_store(net.num_places, memory_budget, spill_dir)
+    stats = stats or NULL_STATS
+    return ReachabilityStream(net, _iter_dfs_bitmask(net, visited, stats), visited,
+                              max_states, max_seconds, max_memory, stop_when, batch_size, stats)
+
+
+DFS_REPORT_EVERY = 1 << 14
+
+
+def _dfs_bitmask(net: CompiledNet, visited: VisitedStore, stats: Stats = NULL_STATS) -> VisitedStore:
+    for _ in _iter_dfs_bitmask(net, visited, stats):
+        pass
+    return visited
+
+
+def _iter_dfs_bitmask(net: CompiledNet, visited: VisitedStore, stats: Stats = NULL_STATS) -> Iterator[int]:
+    """Yield each newly visited marking (bitmask), M0 first, in DFS discovery order."""
+    toggle = net.toggle
+    start = time.perf_counter()
+    # Đếm ngược tới lần báo cáo kế tiếp (không tốn gì khi stats tắt)
+    countdown = DFS_REPORT_EVERY if stats.enabled else -1
+
+    # visited chứa các marking dạng int (bitmask)
+    visited.add(net.m0)
+    add = visited.add
+    yield net.m0
+
+    # Mỗi phần tử mang theo enabled-set của nó (bitmask theo transition),
+    # successor chỉ kiểm tra lại các transition bị ảnh hưởng (affected)
+    stack = [(net.m0, net.enabled_set(net.m0))]
+
+    while stack:
+        m, E = stack.pop()
+        for t in iter_bits(E):
+            new_m = m ^ toggle[t]
+            if add(new_m):
+                yield new_m
+                stack.append((new_m, net.update_enabled(new_m, E, t)))
+                countdown -= 1
+                if countdown == 0:
+                    countdown = DFS_REPORT_EVERY
+                    elapsed = time.perf_counter() - start
+                    stats.emit("dfs.progress", visited=len(visited), stack=len(stack),
+                               states_per_sec=rate(len(visited), elapsed))
+
+    if stats.enabled:
+        elapsed = time.perf_counter() - start
+        stats.emit("dfs.done", states=len(visited), seconds=elapsed, states_per_sec=rate(len(visited), elapsed))
+
+
+def _dfs_numpy(pn: PetriNet) -> Set[Tuple[int, ...]]:
     # Chuyển marking ban đầu M0 (numpy array) thành tuple để có thể hash và lưu trong set
     m0 = tuple(map(int, pn.M0))
     
@@ -1,8 +1,19 @@
 import collections
-from typing import Tuple, List, Optional
+import time
+from typing import NamedTuple, Tuple, List, Optional
 from pyeda.inter import *
 from collections import deque
 from .PetriNet import PetriNet
+from .BDD import (bdd_diff, bdd_model_count, bdd_node_count, bdd_or, bdd_reachable_counting, bdd_recursion_limit,
+                  bdd_trace)
+from .BitMarking import CompiledNet, is_bit_packable, iter_bits
+from .VisitedStore import ADD_BATCH_KEYS, ParentLog, make_store
+from .ReachabilityGraph import ReachabilityGraph
+from .Structural import siphon_trap_check
+from .Stubborn import StubbornSets
+from .Unfolding import unfold
+from .Query import reachability_query
+from .Stats import NULL_STATS, Stats, rate
 import numpy as np
 
 
@@ -19,8 +30,177 @@ def fire(M: np.ndarray, I_t: np.ndarray, O_t: np.ndarray) -> np.ndarray:
     return M - I_t + O_t
 
 
-def deadlock_reachable_marking_detector(pn: PetriNet, bdd: BinaryDecisionDiagram) -> Optional[List[List[int]]]:
+def transition_enabled_bdd(pn: PetriNet, t: int, X: List[BinaryDecisionDiagram]) -> BinaryDecisionDiagram:
+    """
+    Enabled_t(X) under 1-safe semantics:
+    every place of •t is marked and every place of t• \\ •t is empty.
+    Transitions with an arc weight > 1 can never fire.
+    """
+    if not pn.ordinary[t]:
+        return X[0] & ~X[0] if X else expr2bdd(expr(0))
+    pre = set(pn.preset[t])
+    en = expr2bdd(expr(1))
+    for p in pn.preset[t]:
+        en &= X[p]
+    for p in pn.postset[t]:
+        if p not in pre:
+            en &= ~X[p]
+    return en
 
+
+def symbolic_deadlock_detector(
+    pn: PetriNet,
+    bdd: BinaryDecisionDiagram,
+    max_witnesses: int = 10,
+    stats: Optional[Stats] = None,
+    place_vars: Optional[List[BinaryDecisionDiagram]] = None
+) -> Tuple[BinaryDecisionDiagram, int, List[List[int]]]:
+    """
+    Deadlocks computed directly on the reachability BDD:
+
+        Dead = Reached ∧ ¬(∨_t Enabled_t)
+
+    `bdd` is the Reached BDD returned by bdd_reachable_counting and
+    `place_vars` the place variables filled in by the same call; without
+    them the variables are bddvar(place_id), for BDDs built by hand.
+    Cost depends on BDD size, not on the state count.
+
+    Returns (Dead BDD, exact number of dead markings, up to `max_witnesses`
+    decoded dead markings in sorted order).
+    """
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    X = list(place_vars) if place_vars is not None else [bddvar(pid) for pid in pn.place_ids]
+
+    with bdd_recursion_limit(pn.num_places):
+        any_enabled = expr2bdd(expr(0))
+        for t in range(len(pn.trans_ids)):
+            any_enabled = bdd_or(any_enabled, transition_enabled_bdd(pn, t, X))
+
+        dead = bdd_diff(bdd, any_enabled)
+        count = bdd_model_count(dead, X)
+        witnesses = _decode_markings(dead, X, max_witnesses)
+        if stats.enabled:
+            stats.emit("deadlock.done", mode="symbolic", dead=count, reached_nodes=bdd_node_count(bdd),
+                       enabled_nodes=bdd_node_count(any_enabled), dead_nodes=bdd_node_count(dead),
+                       seconds=time.perf_counter() - start)
+    return dead, count, witnesses
+
+
+def _decode_markings(f: BinaryDecisionDiagram, X: List[BinaryDecisionDiagram], limit: int) -> List[List[int]]:
+    """Up to `limit` markings of f, expanding don't-care places to 0/1."""
+    markings = []
+    for assignment in f.satisfy_all():
+        fixed = {i: (1 if assignment[x] else 0) for i, x in enumerate(X) if x in assignment}
+        missing = [i for i in range(len(X)) if i not in fixed]
+        for combo in range(1 << len(missing)):
+            if len(markings) >= limit:
+                return sorted(markings)
+            M = [0] * len(X)
+            for i, v in fixed.items():
+                M[i] = v
+            for j, i in enumerate(missing):
+                M[i] = (combo >> j) & 1
+            markings.append(M)
+    return sorted(markings)
+
+
+def explicit_deadlock_detector(
+    pn: PetriNet,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    graph: Optional[ReachabilityGraph] = None,
+    stats: Optional[Stats] = None,
+    traces: bool = False
+) -> List:
+    """
+    Dead markings found by explicit BFS (no BDD needed), sorted.
+    memory_budget / spill_dir bound the visited set only (see VisitedStore.make_store);
+    the current and next BFS level stay in RAM.
+    With a prebuilt ReachabilityGraph the states are read from it instead.
+    stats receives one "deadlock.level" event per BFS level and "deadlock.done".
+
+    traces=True returns (marking, shortest firing sequence) pairs instead;
+    the BFS then keeps a ParentLog (8 bytes per state) next to its store.
+    """
+    if graph is not None:
+        if traces:
+            return sorted((graph.marking(i).astype(int).tolist(), graph.trace(i)) for i in graph.deadlocks())
+        return graph.dead_markings()
+    if is_bit_packable(pn):
+        parents = ParentLog() if traces else None
+        dead = _explicit_deadlocks_bitmask(pn, memory_budget, spill_dir, stats or NULL_STATS, parents)
+        if traces:
+            return [(M, parents.trace(i)) for M, i in dead]
+        return [M for M, _ in dead]
+    if traces:
+        raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+    return _explicit_deadlocks_numpy(pn)
+
+
+def _explicit_deadlocks_bitmask(
+    pn: PetriNet,
+    memory_budget: Optional[int],
+    spill_dir: Optional[str],
+    stats: Stats = NULL_STATS,
+    parents: Optional[ParentLog] = None
+) -> List[Tuple[List[int], int]]:
+    """
+    Level-synchronous BFS on bit-packed markings, enabled sets updated
+    incrementally. Returns (dead marking, id in parents or -1), sorted.
+    """
+    net = CompiledNet(pn)
+    toggle = net.toggle
+    start = time.perf_counter()
+    depth = 0
+
+    visited = make_store(net.num_places, memory_budget, spill_dir)
+    visited.add(net.m0)
+    root = parents.add(-1, -1) if parents is not None else -1
+    frontier = [(net.m0, net.enabled_set(net.m0), root)]
+
+    dead = []
+
+    # --- BFS over reachable 1-safe markings ---
+    with visited:
+        while frontier:
+            # Successor được dedup với visited theo lô (xem _iter_bfs_bitmask)
+            next_frontier = []
+            last = len(frontier) - 1
+            succ = {}
+            for k, (m, E, i) in enumerate(frontier):
+                # Không transition nào bắn được → deadlock
+                if E == 0:
+                    dead.append((list(net.decode(m)), i))
+
+                for t in iter_bits(E):
+                    m_next = m ^ toggle[t]
+                    if m_next not in succ:
+                        succ[m_next] = (E, t, i)
+                if len(succ) < ADD_BATCH_KEYS and k < last:
+                    continue
+                for m_next in visited.add_batch(succ):
+                    E_p, t, i_p = succ[m_next]
+                    if parents is not None:
+                        i_p = parents.add(i_p, t)
+                    next_frontier.append((m_next, net.update_enabled(m_next, E_p, t), i_p))
+                succ = {}
+            frontier = next_frontier
+            depth += 1
+            if stats.enabled:
+                elapsed = time.perf_counter() - start
+                stats.emit("deadlock.level", depth=depth, frontier=len(frontier), visited=len(visited),
+                           dead=len(dead), states_per_sec=rate(len(visited), elapsed))
+
+        if stats.enabled:
+            stats.emit("deadlock.done", mode="explicit", dead=len(dead), states=len(visited),
+                       seconds=time.perf_counter() - start)
+
+    dead.sort()
+    return dead
+
+
+def _explicit_deadlocks_numpy(pn: PetriNet) -> List[List[int]]:
     def key(M):
         return tuple(int(x) for x in M.tolist())
 
@@ -28,61 +208,183 @@ def deadlock_reachable_marking_detector(pn: PetriNet, bdd: BinaryDecisionDiagram
     queue = deque([pn.M0.copy()])
     visited.add(key(pn.M0))
 
-    reachable = []
+    dead = []
 
     # --- BFS over reachable 1-safe markings ---
     while queue:
         M = queue.popleft()
-        reachable.append(M)
+        enabled = False
 
         for t in range(len(pn.trans_ids)):
             if can_fire_1safe(M, pn.I[t], pn.O[t]):
+                enabled = True
                 M_next = fire(M, pn.I[t], pn.O[t])
                 k = key(M_next)
                 if k not in visited:
                     visited.add(k)
                     queue.append(M_next)
 
-    # --- maximal markings ---
-    maximal = []
-    for M in reachable:
-        tokens = sum(M)
-        if all(
-            sum(fire(M, pn.I[t], pn.O[t])) <= tokens
-            for t in range(len(pn.trans_ids))
-            if can_fire_1safe(M, pn.I[t], pn.O[t])
-        ):
-            maximal.append(M.tolist())
-
-    max_tokens = max(sum(M) for M in maximal)
-
-    # find initial place
-    start_places = [i for i, v in enumerate(pn.M0) if v > 0]
-    if not start_places:
-        return None
-    start_idx = start_places[0]  # giả sử chỉ có một place khởi tạo
-
-    # find the first transition
-    first_transitions = [t for t in range(len(pn.trans_ids)) if pn.I[t][start_idx] == 1]
-    if not first_transitions:
-        return None
-    t_start = first_transitions[0]
-
-    # postset of the first transition
-    post_start = {i for i in range(len(pn.place_ids)) if pn.O[t_start, i] == 1}
-
-    result = []
-    for M in maximal:
-        if sum(M) != max_tokens:
-            continue
-        # yêu cầu start place luôn có token
-        if M[start_idx] != 1:
+        if not enabled:
+            dead.append(M.tolist())
+
+    dead.sort()
+    return dead
+
+
+class StubbornResult(NamedTuple):
+    """
+    dead:        reachable dead markings, sorted (all of them, as in full search)
+    states:      markings explored with stubborn sets
+    fired:       transitions fired (stubborn members over all states)
+    enabled:     enabled transitions summed over the same states
+    full_states: reachable markings, only with cross_check=True
+    verified:    full exploration found the same dead markings
+                 (None without cross_check)
+    """
+    dead: List[List[int]]
+    states: int
+    fired: int
+    enabled: int
+    full_states: Optional[int] = None
+    verified: Optional[bool] = None
+
+    @property
+    def edge_ratio(self) -> float:
+        """Share of the enabled interleavings actually explored."""
+        return self.fired / self.enabled if self.enabled else 1.0
+
+    @property
+    def state_ratio(self) -> Optional[float]:
+        """Explored / reachable markings (needs cross_check)."""
+        return self.states / self.full_states if self.full_states else None
+
+
+def stubborn_deadlock_detector(
+    pn: PetriNet,
+    cross_check: bool = False,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    max_seeds: int = 8,
+    stats: Optional[Stats] = None
+) -> StubbornResult:
+    """
+    Explicit deadlock search with partial-order reduction: in each marking
+    only the enabled part of a stubborn set (see Stubborn.StubbornSets) is
+    fired, so independent components are not interleaved in every order.
+    Every reachable dead marking is still found.
+
+    cross_check=True also runs the full search and fills full_states /
+    verified. memory_budget / spill_dir: see VisitedStore.make_store.
+    """
+    if not is_bit_packable(pn):
+        raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    net = CompiledNet(pn)
+    sets = StubbornSets(net, max_seeds)
+
+    with make_store(net.num_places, memory_budget, spill_dir) as visited:
+        dead, fired, enabled = _stubborn_search(net, sets, visited)
+        states = len(visited)
+    result = StubbornResult(dead, states, fired, enabled)
+
+    if cross_check:
+        with make_store(net.num_places, memory_budget, spill_dir) as visited:
+            full_dead, _, _ = _stubborn_search(net, None, visited)
+            result = result._replace(full_states=len(visited), verified=full_dead == dead)
+
+    if stats.enabled:
+        stats.emit("deadlock.done", mode="stubborn", dead=len(dead), states=states, fired=fired,
+                   enabled=enabled, edge_ratio=result.edge_ratio, full_states=result.full_states,
+                   verified=result.verified, seconds=time.perf_counter() - start)
+    return result
+
+
+def _stubborn_search(net: CompiledNet, sets: Optional[StubbornSets], visited) -> Tuple[List[List[int]], int, int]:
+    """DFS firing stubborn sets (all enabled transitions if sets is None)."""
+    toggle = net.toggle
+    dead = []
+    fired = enabled = 0
+
+    visited.add(net.m0)
+    stack = [(net.m0, net.enabled_set(net.m0))]
+    while stack:
+        m, E = stack.pop()
+        if E == 0:
+            dead.append(list(net.decode(m)))
             continue
+        S = sets.stubborn(m, E) if sets is not None else E
+        enabled += E.bit_count()
+        fired += S.bit_count()
+        for t in iter_bits(S):
+            m_next = m ^ toggle[t]
+            if visited.add(m_next):
+                stack.append((m_next, net.update_enabled(m_next, E, t)))
+
+    dead.sort()
+    return dead, fired, enabled
+
+
+def deadlock_reachable_marking_detector(
+    pn: PetriNet,
+    bdd: Optional[BinaryDecisionDiagram],
+    max_witnesses: int = 10,
+    graph: Optional[ReachabilityGraph] = None,
+    stats: Optional[Stats] = None,
+    structural: bool = False,
+    reduced: bool = False,
+    unfolding: bool = False,
+    traces: bool = False,
+    rings: Optional[List[BinaryDecisionDiagram]] = None,
+    place_vars: Optional[List[BinaryDecisionDiagram]] = None
+) -> Optional[List]:
+    """
+    Reachable dead markings (no transition can fire under 1-safe semantics).
+
+    With structural=True the siphon/trap condition is tried first (see
+    Structural.siphon_trap_check): when it proves deadlock freedom no state
+    is explored. Otherwise, with the Reached BDD from bdd_reachable_counting
+    (and its `place_vars`) the check is symbolic (see
+    symbolic_deadlock_detector), else it falls
+    back to explicit BFS (or reads the dead states of `graph` if one was
+    built already). reduced=True makes the explicit search use stubborn
+    sets (see stubborn_deadlock_detector). unfolding=True answers from the
+    complete finite prefix instead (see Unfolding.unfold), which stays
+    small when the net is highly concurrent.
+    Returns up to `max_witnesses` dead markings, or None if deadlock-free.
 
-        zeros = [i for i, v in enumerate(M) if v == 0]
-        # yêu cầu đúng một zero, và zero đó nằm trong postset của transition đầu tiên
-        if len(zeros) == 1 and zeros[0] in post_start:
-            result.append(M)
+    traces=True returns (marking, firing sequence from M0) pairs instead,
+    the sequence being a shortest one: from the BFS parent pointers, from
+    `graph`, or backwards through the onion rings of the symbolic
+    reachability (`rings` from the same bdd_reachable_counting call as
+    `bdd` and `place_vars`; recomputed if not given). The stubborn search keeps no shortest paths,
+    its witnesses are traced by reachability_query; the unfolding gives
+    the prefix's own firing sequence, which need not be the shortest.
+    """
+    if structural:
+        check = siphon_trap_check(pn, stats=stats)
+        if check.deadlock_free:
+            return None
+        if check.deadlock_free is False:
+            # M0 không bắn được gì: đó là marking duy nhất đạt được
+            M0 = [int(x) for x in pn.M0]
+            return [(M0, [])] if traces else [M0]
 
-    result.sort()
-    return result if result else None
\ No newline at end of file
+    if unfolding and graph is None and is_bit_packable(pn):
+        dead = unfold(pn, stats=stats).deadlocks(max_witnesses, stats)
+        if not traces:
+            dead = [M for M, _ in dead]
+    elif bdd is not None:
+        _, _, dead = symbolic_deadlock_detector(pn, bdd, max_witnesses, stats, place_vars)
+        if traces and dead:
+            if rings is None:
+                rings, place_vars = [], []
+                bdd_reachable_counting(pn, rings=rings, place_vars=place_vars)
+            dead = [(M, bdd_trace(pn, rings, M, place_vars)) for M in dead]
+    elif reduced and graph is None and is_bit_packable(pn):
+        dead = stubborn_deadlock_detector(pn, stats=stats).dead[:max_witnesses]
+        if traces:
+            dead = [(M, reachability_query(pn, M).trace) for M in dead]
+    else:
+        dead = explicit_deadlock_detector(pn, graph=graph, stats=stats, traces=traces)[:max_witnesses]
+    return dead if dead else None
@@ -0,0 +1,282 @@
+from fractions import Fraction
+from math import gcd, lcm
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .PetriNet import PetriNet
+from .VisitedStore import VisitedStore, make_store
+
+
+def incidence_rows(pn: PetriNet) -> List[Dict[int, int]]:
+    """
+    Sparse rows {place: O - I} of the transitions that can fire under
+    1-safe semantics (arc weights <= 1); the others never change the
+    marking, so every P-invariant may ignore them.
+    """
+    rows = []
+    for t in range(pn.num_transitions):
+        if not pn.ordinary[t]:
+            continue
+        row: Dict[int, int] = {}
+        for p, w in zip(*pn.O_csr.row(t)):
+            row[int(p)] = row.get(int(p), 0) + int(w)
+        for p, w in zip(*pn.I_csr.row(t)):
+            row[int(p)] = row.get(int(p), 0) - int(w)
+        rows.append({p: v for p, v in row.items() if v})
+    return rows
+
+
+def p_semiflows(pn: PetriNet, max_rows: int = 10_000) -> List[List[int]]:
+    """
+    Minimal-support P-semiflows (y >= 0 integer, y^T C = 0) by the Farkas
+    algorithm: start from [C | Id] over places, cancel one transition
+    column at a time by positive combinations of row pairs, dropping rows
+    whose support is not minimal. The column with the fewest new rows
+    is cancelled first.
+
+    Every reachable M satisfies y·M = y·M0. Raises ValueError if more than
+    `max_rows` intermediate rows appear (the count can be exponential).
+    """
+    # Mỗi hàng: (phần C theo transition, phần y theo place), cả hai thưa
+    columns: Dict[int, Dict[int, int]] = {p: {} for p in range(pn.num_places)}
+    for t, row in enumerate(incidence_rows(pn)):
+        for p, v in row.items():
+            columns[p][t] = v
+    rows: List[Tuple[Dict[int, int], Dict[int, int]]] = [(columns[p], {p: 1}) for p in range(pn.num_places)]
+    pending = {t for c, _ in rows for t in c}
+
+    while pending:
+        def new_rows(t):
+            pos = sum(1 for c, _ in rows if c.get(t, 0) > 0)
+            neg = sum(1 for c, _ in rows if c.get(t, 0) < 0)
+            return pos * neg - pos - neg
+        t = min(sorted(pending), key=new_rows)
+        pending.discard(t)
+
+        keep = [r for r in rows if t not in r[0]]
+        pos = [r for r in rows if r[0].get(t, 0) > 0]
+        neg = [r for r in rows if r[0].get(t, 0) < 0]
+        for ca, ya in pos:
+            for cb, yb in neg:
+                ka, kb = -cb[t], ca[t]
+                y = _combine(ya, yb, ka, kb)
+                c = _combine(ca, cb, ka, kb)
+                g = 0
+                for v in list(y.values()) + list(c.values()):
+                    g = gcd(g, v)
+                keep.append(({k: v // g for k, v in c.items()}, {k: v // g for k, v in y.items()}))
+                if len(keep) > max_rows:
+                    raise ValueError(f"Farkas algorithm exceeded {max_rows} rows")
+        rows = _minimal_support(keep)
+
+    flows = []
+    for _, y in rows:
+        vec = [0] * pn.num_places
+        for p, v in y.items():
+            vec[p] = v
+        flows.append(vec)
+    return sorted(flows, reverse=True)
+
+
+def _combine(a: Dict[int, int], b: Dict[int, int], ka: int, kb: int) -> Dict[int, int]:
+    out = {k: ka * v for k, v in a.items()}
+    for k, v in b.items():
+        out[k] = out.get(k, 0) + kb * v
+    return {k: v for k, v in out.items() if v}
+
+
+def _minimal_support(rows):
+    """Drop rows whose place support strictly contains (or repeats) another's."""
+    rows = sorted(rows, key=lambda r: len(r[1]))
+    kept, supports = [], []
+    for c, y in rows:
+        s = frozenset(y)
+        if any(other <= s for other in supports):
+            continue
+        kept.append((c, y))
+        supports.append(s)
+    return kept
+
+
+class PlaceCompression:
+    """
+    Marking vector reduced to a basis of linearly independent places.
+
+    The P-invariants (all y with y^T C = 0, semiflows or not) are read off
+    the reduced row echelon form of the incidence matrix: pivot columns
+    are the `basis` places, every other place q is `implied`:
+
+        denom[q] · M(q) = const[q] + Σ coef · M(p)   over (p, coef) in terms[q]
+
+    with p in the basis, for every reachable M. So the basis alone
+    identifies a marking and the implied places are reconstructed on
+    expand/unpack (len(basis) = rank of C).
+
+    Markings are tuples (compress/expand) or BitMarking ints (pack/unpack,
+    bit i of the packed int is basis[i]).
+    """
+
+    def __init__(self, pn: PetriNet):
+        self.num_places = pn.num_places
+        M0 = [int(x) for x in pn.M0]
+        pivots = _rref(incidence_rows(pn), pn.num_places)
+
+        pivot_set = set(pivots)
+        self.basis: List[int] = sorted(pivot_set)
+        self.implied: List[int] = [p for p in range(pn.num_places) if p not in pivot_set]
+
+        # M(q) = M0(q) + Σ R[r, q] · (M(p_r) - M0(p_r)) cho mỗi cột tự do q
+        exprs: Dict[int, Dict[int, Fraction]] = {q: {} for q in self.implied}
+        for p, row in pivots.items():
+            for q, v in row.items():
+                if q != p:
+                    exprs[q][p] = v
+        self.denom: Dict[int, int] = {}
+        self.const: Dict[int, int] = {}
+        self.terms: Dict[int, List[Tuple[int, int]]] = {}
+        for q, expr in exprs.items():
+            d = lcm(1, *(v.denominator for v in expr.values()))
+            terms = sorted((p, int(v * d)) for p, v in expr.items())
+            self.denom[q] = d
+            self.terms[q] = terms
+            self.const[q] = d * M0[q] - sum(c * M0[p] for p, c in terms)
+
+        # pack/unpack: các đoạn bit liên tiếp của basis (start, width, dest)
+        self._runs: List[Tuple[int, int, int]] = []
+        for i, p in enumerate(self.basis):
+            if self._runs and self._runs[-1][0] + self._runs[-1][1] == p:
+                start, width, dest = self._runs[-1]
+                self._runs[-1] = (start, width + 1, dest)
+            else:
+                self._runs.append((p, 1, i))
+
+    @property
+    def num_basis(self) -> int:
+        return len(self.basis)
+
+    def value(self, q: int, marking: Sequence[int]) -> Fraction:
+        """M(q) as given by the invariants from the basis places of marking."""
+        return Fraction(self.const[q] + sum(c * marking[p] for p, c in self.terms[q]), self.denom[q])
+
+    def compress(self, marking: Sequence[int]) -> Tuple[int, ...]:
+        return tuple(int(marking[p]) for p in self.basis)
+
+    def expand(self, reduced: Sequence[int]) -> Tuple[int, ...]:
+        marking = [0] * self.num_places
+        for p, v in zip(self.basis, reduced):
+            marking[p] = int(v)
+        for q in self.implied:
+            marking[q] = int(self.value(q, marking))
+        return tuple(marking)
+
+    def pack(self, m: int) -> int:
+        """Bit-packed marking -> bit-packed basis."""
+        k = 0
+        for start, width, dest in self._runs:
+            k |= ((m >> start) & ((1 << width) - 1)) << dest
+        return k
+
+    def unpack(self, k: int) -> int:
+        """Inverse of pack on reachable markings (implied bits recomputed)."""
+        m = 0
+        for start, width, dest in self._runs:
+            m |= ((k >> dest) & ((1 << width) - 1)) << start
+        for q in self.implied:
+            total = self.const[q]
+            for p, c in self.terms[q]:
+                if m >> p & 1:
+                    total += c
+            if total == self.denom[q]:
+                m |= 1 << q
+        return m
+
+    def satisfies(self, marking: Sequence[int]) -> bool:
+        """Cheap validity check: marking respects every P-invariant of the net."""
+        return all(self.value(q, marking) == marking[q] for q in self.implied)
+
+    def violations(self, markings: Iterable[Sequence[int]]) -> List[Tuple[int, ...]]:
+        """Markings (e.g. an analysis result) that break a P-invariant."""
+        return [tuple(int(x) for x in M) for M in markings if not self.satisfies(M)]
+
+
+def _rref(rows: List[Dict[int, int]], num_places: int) -> Dict[int, Dict[int, Fraction]]:
+    """
+    Gauss-Jordan elimination over the rationals on sparse rows, columns in
+    place order. Returns {pivot place: its normalized row}.
+    """
+    work = [{p: Fraction(v) for p, v in row.items()} for row in rows if row]
+    # where[p]: các hàng còn lại có hệ số khác 0 ở cột p
+    where: Dict[int, set] = {p: set() for p in range(num_places)}
+    for i, row in enumerate(work):
+        for p in row:
+            where[p].add(i)
+
+    pivots: Dict[int, int] = {}
+    used = set()
+    for p in range(num_places):
+        candidates = [i for i in where[p] if i not in used]
+        if not candidates:
+            continue
+        i = min(candidates, key=lambda i: (len(work[i]), i))
+        pivots[p] = i
+        used.add(i)
+        row = work[i]
+        scale = row[p]
+        for q in row:
+            row[q] /= scale
+        for j in list(where[p]):
+            if j == i:
+                continue
+            other = work[j]
+            factor = other[p]
+            for q, v in row.items():
+                w = other.get(q, 0) - factor * v
+                if w:
+                    if q not in other:
+                        where[q].add(j)
+                    other[q] = w
+                else:
+                    other.pop(q, None)
+                    where[q].discard(j)
+    return {p: work[i] for p, i in pivots.items()}
+
+
+class PackedStore(VisitedStore):
+    """
+    VisitedStore of full bit-packed markings that keeps only their basis
+    bits (PlaceCompression.pack) in the wrapped store, so compact and disk
+    backends use rank(C) bits per state instead of num_places.
+    """
+
+    def __init__(self, inner: VisitedStore, compression: PlaceCompression):
+        self.inner = inner
+        self.compression = compression
+
+    def add(self, key: int) -> bool:
+        return self.inner.add(self.compression.pack(key))
+
+    def add_batch(self, keys: Iterable[int]) -> List[int]:
+        pack = self.compression.pack
+        packed = {pack(k): k for k in keys}
+        return [packed[k] for k in self.inner.add_batch(packed)]
+
+    def __contains__(self, key: int) -> bool:
+        return self.compression.pack(key) in self.inner
+
+    def __len__(self) -> int:
+        return len(self.inner)
+
+    def __iter__(self):
+        unpack = self.compression.unpack
+        return (unpack(k) for k in self.inner)
+
+    def memory_bytes(self) -> int:
+        return self.inner.memory_bytes()
+
+    def close(self):
+        self.inner.close()
+
+
+def make_packed_store(pn: PetriNet, memory_budget: Optional[int] = None,
+                      spill_dir: Optional[str] = None) -> PackedStore:
+    """make_store sized to the invariant basis of pn (see PackedStore)."""
+    compression = PlaceCompression(pn)
+    return PackedStore(make_store(compression.num_basis, memory_budget, spill_dir), compression)
@@ -1,88 +1,209 @@
 import collections
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Sequence, Union
 from pyeda.inter import *
+from pyeda.boolalg.bdd import BDDNODEONE, BDDNODEZERO
 from collections import deque
 import numpy as np
+import time
+from .Stats import NULL_STATS, Stats
+from .PetriNet import PetriNet
+from .BDD import bdd_recursion_limit, bdd_trace
+
+PlaceVars = Sequence[Union[str, BinaryDecisionDiagram]]
+
+
+def _place_vars(place_vars: PlaceVars) -> List[BinaryDecisionDiagram]:
+    """BDD variable of each place; a place id stands for bddvar(place_id)."""
+    return [bddvar(x) if isinstance(x, str) else x for x in place_vars]
+
+
+def _objective_dp(place_vars: PlaceVars, bdd: BinaryDecisionDiagram, c: np.ndarray):
+    """
+    Longest path over the BDD DAG for the objective c^T * M.
+
+    Variables are visited in BDD order (uniqid). For every node we keep
+    (best value, number of optimal completions) over the levels below it.
+    Levels skipped on an edge are free places: they add max(c_i, 0) and
+    double the tie count when c_i == 0.
+    """
+    X = _place_vars(place_vars)
+    order = sorted(range(len(X)), key=lambda i: X[i].uniqid)
+    level = {X[i].uniqid: l for l, i in enumerate(order)}
+    n = len(order)
+
+    for v in bdd.support:
+        if v.uniqid not in level:
+            raise ValueError(f"BDD depends on {v}, which is not a place variable")
+
+    coef = [c[i].item() if hasattr(c[i], 'item') else c[i] for i in order]
+
+    # Prefix sums: gain[l] = sum_{j<l} max(c_j, 0), zeros[l] = #{j<l: c_j == 0}
+    gain = [0] * (n + 1)
+    zeros = [0] * (n + 1)
+    for l in range(n):
+        gain[l + 1] = gain[l] + max(coef[l], 0)
+        zeros[l + 1] = zeros[l] + (1 if coef[l] == 0 else 0)
+
+    def lvl(node):
+        return n if node.root < 0 else level[node.root]
+
+    # best[node] = (value, ties) over levels lvl(node)..n-1; None = unsatisfiable
+    best = {BDDNODEZERO: None, BDDNODEONE: (0, 1)}
+    for node in bdd.dfs_postorder():
+        if node in best:
+            continue
+        k = lvl(node)
+        candidates = []
+        for child, bit in ((node.lo, 0), (node.hi, 1)):
+            sub = best[child]
+            if sub is None:
+                continue
+            b = lvl(child)
+            value = (coef[k] if bit else 0) + gain[b] - gain[k + 1] + sub[0]
+            ties = sub[1] << (zeros[b] - zeros[k + 1])
+            candidates.append((value, ties))
+        top = max(v for v, _ in candidates)
+        best[node] = (top, sum(t for v, t in candidates if v == top))
+
+    return order, coef, gain, zeros, lvl, best
+
+
+def max_reachable_markings(
+    place_vars: PlaceVars,
+    bdd: BinaryDecisionDiagram,
+    c: np.ndarray,
+    k: int = 1,
+    stats: Optional[Stats] = None
+) -> Tuple[List[List[int]], Optional[int], int]:
+    """
+    All-optimal variant of max_reachable_marking.
+
+    Cost is linear in the number of BDD nodes (plus k * |places| for the
+    witnesses), independent of the number of reachable markings.
+    place_vars as in max_reachable_marking.
+
+    Returns (up to k optimal markings sorted, optimal value, exact number of
+    optimal markings). ([], None, 0) if the BDD is empty.
+
+    stats receives "optimization.dp" (BDD nodes, DP time) and
+    "optimization.done" (value, ties, witnesses, total time).
+    """
+    if bdd.is_zero():
+        return [], None, 0
+
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    with bdd_recursion_limit(len(place_vars)):
+        order, coef, gain, zeros, lvl, best = _objective_dp(place_vars, bdd, c)
+    if stats.enabled:
+        stats.emit("optimization.dp", bdd_nodes=len(best) - 2, seconds=time.perf_counter() - start)
+    n = len(order)
+
+    root = bdd.node
+    r = lvl(root)
+    root_value = gain[r] + best[root][0]
+    root_ties = best[root][1] << zeros[r]
+
+    # --- Liệt kê tối đa k marking tối ưu theo các nhánh đạt giá trị best ---
+    markings: List[List[int]] = []
+    bits = [0] * n
+
+    def free_levels(a, b):
+        # Các level bị bỏ qua (a..b-1): chọn 1 nếu c > 0, 0 nếu c < 0, cả hai nếu c == 0
+        for l in range(a, b):
+            bits[l] = 1 if coef[l] > 0 else 0
+        zero_levels = [l for l in range(a, b) if coef[l] == 0]
+        for combo in range(1 << len(zero_levels)):
+            for j, l in enumerate(zero_levels):
+                bits[l] = (combo >> j) & 1
+            yield
+
+    def walk(node):
+        if len(markings) >= k:
+            return
+        if node is BDDNODEONE:
+            M = [0] * n
+            for l in range(n):
+                M[order[l]] = bits[l]
+            markings.append(M)
+            return
+        kk = lvl(node)
+        target = best[node][0]
+        for child, bit in ((node.lo, 0), (node.hi, 1)):
+            sub = best[child]
+            if sub is None:
+                continue
+            b = lvl(child)
+            value = (coef[kk] if bit else 0) + gain[b] - gain[kk + 1] + sub[0]
+            if value != target:
+                continue
+            bits[kk] = bit
+            for _ in free_levels(kk + 1, b):
+                walk(child)
+                if len(markings) >= k:
+                    return
+
+    # walk đệ quy theo level biến
+    with bdd_recursion_limit(n):
+        for _ in free_levels(0, r):
+            walk(root)
+            if len(markings) >= k:
+                break
+
+    if stats.enabled:
+        stats.emit("optimization.done", value=root_value, ties=root_ties,
+                   witnesses=len(markings), seconds=time.perf_counter() - start)
+    return sorted(markings), root_value, root_ties
+
 
 def max_reachable_marking(
-    place_ids: List[str], 
+    place_vars: PlaceVars,
     bdd: BinaryDecisionDiagram, 
-    c: np.ndarray
+    c: np.ndarray,
+    stats: Optional[Stats] = None
 ) -> Tuple[Optional[List[int]], Optional[int]]:
     """
     Optimize linear objective function c^T * M over reachable markings represented by BDD.
     
+    Weighted longest path over the BDD nodes (see max_reachable_markings),
+    so the cost is proportional to the BDD size, not to the number of
+    reachable markings.
+
     Args:
-        place_ids: List of place identifiers
+        place_vars: BDD variable of each place, as filled in by
+            bdd_reachable_counting(pn, place_vars=...) for its Reached BDD;
+            place ids stand for bddvar(place_id) (BDDs built by hand)
         bdd: BDD representing reachable markings 
         c: Coefficient vector for linear objective function
+        stats: Optional instrumentation sink (see Stats.py)
     
     Returns:
         Tuple of (optimal_marking, optimal_value) or (None, None) if no solution
     """
-    # Check if BDD is satisfiable (có marking nào khả đạt không)
-    if bdd.is_zero():
-        return None, None
-    
-    # Nếu BDD là tautology (luôn true), chọn marking tối ưu
-    if bdd.is_one():
-        # Chọn marking tối ưu khi tất cả combination đều valid
-        optimal_marking = []
-        for i in range(len(c)):
-            # Chọn 1 nếu coefficient dương, 0 nếu âm
-            optimal_marking.append(1 if c[i] >= 0 else 0)
-        optimal_value = int(np.dot(c, optimal_marking))
-        return optimal_marking, optimal_value
-    
-    max_value = float('-inf')
-    optimal_marking = None
-    
-    # Get all variables from BDD and create mapping by name
-    var_name_to_idx = {}
-    for i, place_id in enumerate(place_ids):
-        var_name_to_idx[place_id] = i
-    
-    # Iterate through all satisfying assignments from BDD
-    for assignment in bdd.satisfy_all():
-        # For each assignment, determine which variables are constrained
-        constrained_vars = {}  # index -> value mapping
-        free_var_indices = []  # Indices of variables not in assignment
-        
-        # Process all variables in assignment (constrained by BDD)
-        for var, value in assignment.items():
-            var_name = var.name
-            if var_name in var_name_to_idx:
-                idx = var_name_to_idx[var_name]
-                constrained_vars[idx] = 1 if value else 0
-        
-        # Find free variables (not in assignment)
-        for i in range(len(place_ids)):
-            if i not in constrained_vars:
-                free_var_indices.append(i)
-        
-        # Generate all combinations của don't care variables
-        num_free = len(free_var_indices)
-        for combo in range(2 ** num_free):  # 2^n combinations
-            marking = [0] * len(place_ids)
-            
-            # Set constrained variables
-            for i, val in constrained_vars.items():
-                marking[i] = val
-            
-            # Set free variables according to current combination
-            for j, var_idx in enumerate(free_var_indices):
-                bit_val = (combo >> j) & 1
-                marking[var_idx] = bit_val
-            
-            # Calculate objective value
-            current_value = int(np.dot(c, marking))
-            
-            if current_value > max_value:
-                max_value = current_value
-                optimal_marking = marking
-    
-    if optimal_marking is None:
+    markings, value, _ = max_reachable_markings(place_vars, bdd, c, k=1, stats=stats)
+    if not markings:
         return None, None
-    
-    return optimal_marking, max_value
-  
\ No newline at end of file
+    return markings[0], value
+
+
+def max_reachable_marking_trace(
+    pn: PetriNet,
+    bdd: BinaryDecisionDiagram,
+    c: np.ndarray,
+    rings: List[BinaryDecisionDiagram],
+    place_vars: List[BinaryDecisionDiagram],
+    stats: Optional[Stats] = None
+) -> Tuple[Optional[List[int]], Optional[int], Optional[List[int]]]:
+    """
+    max_reachable_marking plus a shortest firing sequence from M0 to the
+    optimal marking, read off the onion rings of
+    bdd_reachable_counting(pn, rings=rings, place_vars=place_vars)
+    (see bdd_trace).
+
+    Returns (optimal_marking, optimal_value, trace) or (None, None, None)
+    if no solution.
+    """
+    marking, value = max_reachable_marking(place_vars, bdd, c, stats)
+    if marking is None:
+        return None, None, None
+    return marking, value, bdd_trace(pn, rings, marking, place_vars)
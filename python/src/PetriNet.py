@@ -1,6 +1,31 @@
+import hashlib
+import json
+import os
 import numpy as np
 import xml.etree.ElementTree as ET
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
+from .Sparse import CSRMatrix
+
+# Phiên bản định dạng .npz của save_compiled; tăng khi đổi layout hoặc cách
+# _parse_pnml biên dịch net, để cache cũ không còn được nạp
+COMPILED_FORMAT = 1
+
+
+def _file_digest(filename: str) -> str:
+    """sha256 of the file content (cache key of the compiled net)."""
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _csr_rows(A: CSRMatrix) -> List[Tuple[int, ...]]:
+    """Column indices of each row of a CSR matrix, as tuples."""
+    indices = A.indices.tolist()
+    bounds = A.indptr.tolist()
+    return [tuple(indices[bounds[r]:bounds[r + 1]]) for r in range(A.shape[0])]
+
 
 class PetriNet:
     def __init__(
@@ -9,76 +34,166 @@ class PetriNet:
         trans_ids: List[str],
         place_names: List[Optional[str]],
         trans_names: List[Optional[str]],
-        I: np.ndarray,   
-        O: np.ndarray, 
+        I: Union[np.ndarray, CSRMatrix],
+        O: Union[np.ndarray, CSRMatrix],
         M0: np.ndarray
     ):
+        """
+        I/O are (transitions x places) input/output matrices, either dense
+        arrays or CSRMatrix (sparse backend: no dense matrix is allocated
+        unless `I`/`O` are read).
+        """
         self.place_ids = place_ids
         self.trans_ids = trans_ids
         self.place_names = place_names
         self.trans_names = trans_names
-        self.I = I
-        self.O = O
+        self.is_sparse = isinstance(I, CSRMatrix)
+        if self.is_sparse:
+            self.I_csr, self.O_csr = I, O
+            self._I = self._O = None
+        else:
+            self.I_csr, self.O_csr = CSRMatrix.from_dense(I), CSRMatrix.from_dense(O)
+            self._I, self._O = I, O
+        self.num_transitions, self.num_places = self.I_csr.shape
         self.M0 = M0
+        self._build_locality_index()
+
+    @property
+    def I(self) -> np.ndarray:
+        """Dense input matrix (built on first use for sparse nets)."""
+        if self._I is None:
+            self._I = self.I_csr.toarray()
+        return self._I
+
+    @property
+    def O(self) -> np.ndarray:
+        """Dense output matrix (built on first use for sparse nets)."""
+        if self._O is None:
+            self._O = self.O_csr.toarray()
+        return self._O
+
+    def _build_locality_index(self) -> None:
+        """
+        Sparse preset/postset index used for incremental enabling.
+
+        - preset[t] / postset[t]: place indices of •t / t•
+        - consumers[p] / producers[p]: transitions with p in •t / t•
+        - affected[t]: transitions whose 1-safe enabling can change when t
+          fires, i.e. those touching a place whose token t actually changes
+        - ordinary[t]: every arc weight of t is 1 (otherwise t can never
+          fire in a 1-safe net)
+        """
+        n_trans, n_places = self.num_transitions, self.num_places
+        self.preset: List[Tuple[int, ...]] = _csr_rows(self.I_csr)
+        self.postset: List[Tuple[int, ...]] = _csr_rows(self.O_csr)
+        self.ordinary: List[bool] = ((self.I_csr.max_row_weight() <= 1)
+                                     & (self.O_csr.max_row_weight() <= 1)).tolist()
+
+        consumers: List[List[int]] = [[] for _ in range(n_places)]
+        producers: List[List[int]] = [[] for _ in range(n_places)]
+        for t in range(n_trans):
+            for p in self.preset[t]:
+                consumers[p].append(t)
+            for p in self.postset[t]:
+                producers[p].append(t)
+        self.consumers: List[Tuple[int, ...]] = [tuple(ts) for ts in consumers]
+        self.producers: List[Tuple[int, ...]] = [tuple(ts) for ts in producers]
+
+        # Enabling (1-safe) của u phụ thuộc vào •u ∪ u•, nên chỉ các place
+        # mà t thực sự thay đổi token (I != O) mới có thể ảnh hưởng u
+        touching = [set(c) | set(p) for c, p in zip(self.consumers, self.producers)]
+        self.affected: List[Tuple[int, ...]] = []
+        for t in range(n_trans):
+            w_in = dict(zip(self.preset[t], self.I_csr.row(t)[1].tolist()))
+            w_out = dict(zip(self.postset[t], self.O_csr.row(t)[1].tolist()))
+            touched = set()
+            for p in set(w_in) | set(w_out):
+                if w_in.get(p, 0) != w_out.get(p, 0):
+                    touched |= touching[p]
+            self.affected.append(tuple(sorted(touched)))
 
     @classmethod
-    def read_pnml(cls, filename: str) -> "PetriNet":
-        tree = ET.parse(filename)
-        root = tree.getroot()
+    def read_pnml(cls, filename: str, cache_dir: Optional[str] = None, sparse: bool = False) -> "PetriNet":
+        """
+        Load a PNML file with a streaming (iterparse) reader.
 
-        places = []
-        transitions = []
-        arcs = []
+        If `cache_dir` is given, the compiled net is stored there as
+        <sha256 of the file>-v<COMPILED_FORMAT>.npz and later runs on the
+        same content load it directly (see save_compiled / load_compiled);
+        an entry load_compiled rejects is parsed again and overwritten.
+
+        sparse=True keeps I/O as CSRMatrix (for large nets); the dense
+        matrices are then only built if `pn.I` / `pn.O` are accessed.
+        """
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, f"{_file_digest(filename)}-v{COMPILED_FORMAT}.npz")
+            if os.path.exists(cache_path):
+                try:
+                    return cls.load_compiled(cache_path, sparse=sparse)
+                except ValueError:
+                    pass
+            pn = cls._parse_pnml(filename, sparse)
+            os.makedirs(cache_dir, exist_ok=True)
+            pn.save_compiled(cache_path)
+            return pn
+        return cls._parse_pnml(filename, sparse)
+
+    @classmethod
+    def _parse_pnml(cls, filename: str, sparse: bool = False) -> "PetriNet":
+        place_ids, place_names, m0 = [], [], []
+        trans_ids, trans_names = [], []
+        arc_src, arc_tgt = [], []
 
         # Helper để lấy tag name bỏ qua namespace
         def get_tag(element):
             return element.tag.split('}')[-1] if '}' in element.tag else element.tag
 
-        # Duyệt XML để lấy dữ liệu
-        for elem in root.iter():
+        # Stack các element đang mở: chỉ giữ đường đi từ root tới element hiện tại
+        stack = []
+        name = None
+        marking = 0
+
+        for event, elem in ET.iterparse(filename, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                tag = get_tag(elem)
+                if tag in ('place', 'transition'):
+                    name = None
+                    marking = 0
+                continue
+
             tag = get_tag(elem)
-            
-            if tag == 'place':
-                p_id = elem.get('id')
-                p_name = None
-                initial_marking = 0
-                for child in elem:
-                    child_tag = get_tag(child)
-                    if child_tag == 'name':
-                        for sub in child:
-                            if get_tag(sub) == 'text':
-                                p_name = sub.text
-                    elif child_tag == 'initialMarking':
-                        for sub in child:
-                            if get_tag(sub) == 'text':
-                                try:
-                                    initial_marking = int(sub.text)
-                                except ValueError:
-                                    initial_marking = 0
-                places.append({'id': p_id, 'name': p_name, 'm0': initial_marking})
+            stack.pop()
 
-            elif tag == 'transition':
-                t_id = elem.get('id')
-                t_name = None
-                for child in elem:
-                    child_tag = get_tag(child)
-                    if child_tag == 'name':
-                        for sub in child:
-                            if get_tag(sub) == 'text':
-                                t_name = sub.text
-                transitions.append({'id': t_id, 'name': t_name})
+            if tag == 'text' and len(stack) >= 2:
+                # <place|transition><name|initialMarking><text>
+                parent, owner = get_tag(stack[-1]), get_tag(stack[-2])
+                if parent == 'name' and owner in ('place', 'transition'):
+                    name = elem.text
+                elif parent == 'initialMarking' and owner == 'place':
+                    try:
+                        marking = int(elem.text)
+                    except (TypeError, ValueError):
+                        marking = 0
+                continue
 
+            if tag == 'place':
+                place_ids.append(elem.get('id'))
+                place_names.append(name)
+                m0.append(marking)
+            elif tag == 'transition':
+                trans_ids.append(elem.get('id'))
+                trans_names.append(name)
             elif tag == 'arc':
-                source = elem.get('source')
-                target = elem.get('target')
-                arcs.append({'source': source, 'target': target})
+                arc_src.append(elem.get('source'))
+                arc_tgt.append(elem.get('target'))
+            else:
+                continue
 
-        # Xây dựng danh sách ID
-        place_ids = [p['id'] for p in places]
-        place_names = [p['name'] for p in places]
-        
-        trans_ids = [t['id'] for t in transitions]
-        trans_names = [t['name'] for t in transitions]
+            # Giải phóng element đã xử lý (streaming)
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
 
         # Map ID sang index
         p_idx_map = {pid: i for i, pid in enumerate(place_ids)}
@@ -86,34 +201,75 @@ class PetriNet:
 
         n_places = len(place_ids)
         n_trans = len(trans_ids)
+
+        # Index của từng arc (-1 nếu không phải place/transition)
+        src_p = np.array([p_idx_map.get(x, -1) for x in arc_src], dtype=np.int64)
+        src_t = np.array([t_idx_map.get(x, -1) for x in arc_src], dtype=np.int64)
+        tgt_p = np.array([p_idx_map.get(x, -1) for x in arc_tgt], dtype=np.int64)
+        tgt_t = np.array([t_idx_map.get(x, -1) for x in arc_tgt], dtype=np.int64)
         
+        M0 = np.array(m0, dtype=int)
+        in_mask = (src_p >= 0) & (tgt_t >= 0)
+        out_mask = (src_t >= 0) & (tgt_p >= 0)
+
+        if sparse:
+            # CSR trực tiếp từ danh sách arc, không cấp phát ma trận dày
+            I = CSRMatrix.from_coo(tgt_t[in_mask], src_p[in_mask], (n_trans, n_places))
+            O = CSRMatrix.from_coo(src_t[out_mask], tgt_p[out_mask], (n_trans, n_places))
+            return cls(place_ids, trans_ids, place_names, trans_names, I, O, M0)
+
         # --- SỬA ĐỔI QUAN TRỌNG: MA TRẬN KÍCH THƯỚC (Trans x Place) ---
         # Theo expected.txt, ma trận là T x P chứ không phải P x T
         I = np.zeros((n_trans, n_places), dtype=int)
         O = np.zeros((n_trans, n_places), dtype=int)
-        M0 = np.array([p['m0'] for p in places], dtype=int)
-
-        # Điền ma trận
-        for arc in arcs:
-            src = arc['source']
-            tgt = arc['target']
-
-            # Place -> Transition (Input Matrix I)
-            if src in p_idx_map and tgt in t_idx_map:
-                p_idx = p_idx_map[src]
-                t_idx = t_idx_map[tgt]
-                # I[t, p] = 1 (Thay vì I[p, t])
-                I[t_idx, p_idx] += 1 
-
-            # Transition -> Place (Output Matrix O)
-            elif src in t_idx_map and tgt in p_idx_map:
-                t_idx = t_idx_map[src]
-                p_idx = p_idx_map[tgt]
-                # O[t, p] = 1 (Thay vì O[p, t])
-                O[t_idx, p_idx] += 1
+
+        # Điền ma trận một lần (np.add.at cộng dồn các arc trùng lặp)
+        # Place -> Transition (Input Matrix I)
+        np.add.at(I, (tgt_t[in_mask], src_p[in_mask]), 1)
+        # Transition -> Place (Output Matrix O)
+        np.add.at(O, (src_t[out_mask], tgt_p[out_mask]), 1)
 
         return cls(place_ids, trans_ids, place_names, trans_names, I, O, M0)
 
+    def save_compiled(self, path: str) -> None:
+        """Store the net as an uncompressed .npz (CSR arrays + JSON ids/names, format tag)."""
+        meta = json.dumps({
+            'format': COMPILED_FORMAT,
+            'place_ids': self.place_ids,
+            'trans_ids': self.trans_ids,
+            'place_names': self.place_names,
+            'trans_names': self.trans_names,
+            'shape': [self.num_transitions, self.num_places],
+        })
+        arrays = {}
+        for key, A in (('I', self.I_csr), ('O', self.O_csr)):
+            arrays[key + '_indptr'] = A.indptr
+            arrays[key + '_indices'] = A.indices
+            arrays[key + '_data'] = A.data
+        # Ghi ra file tạm rồi rename để tránh cache hỏng khi bị ngắt giữa chừng
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, M0=self.M0, meta=np.array(meta), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_compiled(cls, path: str, sparse: bool = False) -> "PetriNet":
+        """
+        Load a net written by save_compiled (dense I/O unless sparse=True).
+
+        Raises ValueError if the file was written with another COMPILED_FORMAT.
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != COMPILED_FORMAT:
+                raise ValueError(f"Compiled net {path} has format {meta.get('format')}, "
+                                 f"expected {COMPILED_FORMAT}")
+            I, O = (CSRMatrix(data[k + '_indptr'], data[k + '_indices'], data[k + '_data'], meta['shape'])
+                    for k in ('I', 'O'))
+            if not sparse:
+                I, O = I.toarray(), O.toarray()
+            return cls(meta['place_ids'], meta['trans_ids'], meta['place_names'], meta['trans_names'],
+                       I, O, data['M0'])
+
     def __str__(self) -> str:
         s = []
         s.append("Places: " + str(self.place_ids))
@@ -0,0 +1,195 @@
+import heapq
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+import numpy as np
+from .PetriNet import PetriNet
+from .BitMarking import CompiledNet, is_bit_packable, iter_bits
+from .Stats import NULL_STATS, Stats
+
+try:
+    from scipy.optimize import linprog
+except ImportError:  # scipy là tùy chọn, chỉ cần cho heuristic state-equation
+    linprog = None
+
+HEURISTICS = ("none", "hamming", "state-equation")
+
+Target = Union[Sequence[int], Dict[Union[int, str], int], Callable[[List[int]], bool]]
+
+
+class QueryResult(NamedTuple):
+    """
+    reachable: True / False, or None when max_states ran out first
+    trace:     firing sequence (transition indices) from M0 to `marking`
+    marking:   the first goal marking reached
+    expanded:  markings taken off the queue
+    states:    markings generated (visited set size)
+    shortest:  trace is a shortest one (weight 1, consistent heuristic)
+    """
+    reachable: Optional[bool]
+    trace: Optional[List[int]]
+    marking: Optional[List[int]]
+    expanded: int
+    states: int
+    shortest: bool
+
+
+def reachability_query(
+    pn: PetriNet,
+    target: Target,
+    heuristic: str = "hamming",
+    weight: float = 1.0,
+    max_states: Optional[int] = None,
+    stats: Optional[Stats] = None
+) -> QueryResult:
+    """
+    Is a marking matching `target` reachable? A* search from M0 that
+    stops at the first goal marking and returns its firing sequence.
+
+    target: a full marking, a partial marking {place index or id: 0/1},
+    or a predicate over the marking list (searched without heuristic).
+
+    Heuristics (lower bounds on the firings still needed, both
+    consistent, so with weight=1 the trace is a shortest one):
+
+    - "none":           0, i.e. breadth-first order
+    - "hamming":        constrained places that differ from the target,
+                        divided by the most of them one firing can flip
+    - "state-equation": min Σx over x >= 0 with M + C^T x = target on the
+                        constrained places (LP, scipy needed), at least
+                        the Hamming bound; an infeasible LP proves the
+                        target unreachable from M and the marking is
+                        dropped. LP values are cached per projection of M
+                        on the constrained places.
+
+    weight > 1 inflates the heuristic (weighted A*): fewer markings are
+    expanded and the trace is at most `weight` times longer than a
+    shortest one. max_states bounds the visited set (reachable is None
+    when it is hit).
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {heuristic}")
+    if not is_bit_packable(pn):
+        raise ValueError("Initial marking is not 1-safe, cannot bit-pack it")
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    net = CompiledNet(pn)
+    toggle = net.toggle
+
+    if callable(target):
+        predicate = target
+        heuristic = "none"
+        care = want = 0
+    else:
+        if not isinstance(target, dict):
+            target = dict(enumerate(target))
+        index = {pid: p for p, pid in enumerate(pn.place_ids)}
+        target = {index.get(p, p): int(v) for p, v in target.items()}
+        predicate = None
+        # care: các place bị ràng buộc, want: giá trị mong muốn trên đó
+        care = sum(1 << p for p in target)
+        want = sum(1 << p for p, v in target.items() if v == 1)
+        if any(v not in (0, 1) for v in target.values()):
+            return _finish(stats, start, False, None, None, 0, 0, True)
+
+    h = _heuristic(pn, net, heuristic, care, want)
+
+    def is_goal(m: int) -> bool:
+        if predicate is not None:
+            return bool(predicate(list(net.decode(m))))
+        return m & care == want
+
+    # visited[m] = (g, parent, transition)
+    visited: Dict[int, tuple] = {net.m0: (0, None, -1)}
+    h0 = h(net.m0)
+    heap = [] if h0 is None else [(weight * h0, 0, 0, net.m0, net.enabled_set(net.m0))]
+    tie = expanded = 0
+    while heap:
+        _, _, g, m, E = heapq.heappop(heap)
+        if visited[m][0] < g:
+            continue
+        if is_goal(m):
+            trace = _trace(visited, m)
+            return _finish(stats, start, True, trace, list(net.decode(m)), expanded, len(visited),
+                           weight == 1.0)
+        expanded += 1
+        if max_states is not None and len(visited) >= max_states:
+            return _finish(stats, start, None, None, None, expanded, len(visited), False)
+        for t in iter_bits(E):
+            m_next = m ^ toggle[t]
+            old = visited.get(m_next)
+            if old is not None and old[0] <= g + 1:
+                continue
+            h_next = h(m_next)
+            if h_next is None:
+                continue
+            visited[m_next] = (g + 1, m, t)
+            tie += 1
+            heapq.heappush(heap, (g + 1 + weight * h_next, tie, g + 1, m_next, net.update_enabled(m_next, E, t)))
+    return _finish(stats, start, False, None, None, expanded, len(visited), True)
+
+
+def _finish(stats: Stats, start: float, reachable, trace, marking, expanded: int, states: int,
+            shortest: bool) -> QueryResult:
+    if stats.enabled:
+        stats.emit("query.done", reachable=reachable, length=None if trace is None else len(trace),
+                   expanded=expanded, states=states, seconds=time.perf_counter() - start)
+    return QueryResult(reachable, trace, marking, expanded, states, shortest and bool(reachable))
+
+
+def _heuristic(pn: PetriNet, net: CompiledNet, name: str, care: int, want: int) -> Callable[[int], Optional[int]]:
+    """h(m): lower bound on the firings from m to the target, None if provably unreachable."""
+    if name == "none":
+        return lambda m: 0
+
+    # Một lần bắn đổi tối đa `flips` place bị ràng buộc
+    flips = max([(net.toggle[t] & care).bit_count() for t in net.firable] + [1])
+
+    def hamming(m: int) -> int:
+        return -(-((m ^ want) & care).bit_count() // flips)
+
+    if name == "hamming":
+        return hamming
+
+    if linprog is None:
+        raise ImportError("the state-equation heuristic needs scipy (pip install scipy)")
+    places = list(iter_bits(care))
+    firable = net.firable
+    # A[i, j] = C[firable[j], places[i]]
+    A = np.zeros((len(places), len(firable)))
+    for j, t in enumerate(firable):
+        for i, p in enumerate(places):
+            A[i, j] = (net.post[t] >> p & 1) - (net.pre[t] >> p & 1)
+    b_want = np.array([want >> p & 1 for p in places], dtype=float)
+    cost = np.ones(len(firable))
+    cache: Dict[int, Optional[int]] = {}
+
+    def state_equation(m: int) -> Optional[int]:
+        key = m & care
+        if key not in cache:
+            if key == want:
+                cache[key] = 0
+            elif not firable:
+                cache[key] = None
+            else:
+                b = b_want - np.array([m >> p & 1 for p in places], dtype=float)
+                res = linprog(cost, A_eq=A, b_eq=b, bounds=(0, None), method="highs")
+                if res.status == 2:
+                    # Phương trình trạng thái vô nghiệm: không tới được target
+                    cache[key] = None
+                else:
+                    cache[key] = int(np.ceil(res.fun - 1e-9)) if res.status == 0 else 0
+        bound = cache[key]
+        return None if bound is None else max(bound, hamming(m))
+
+    return state_equation
+
+
+def _trace(visited: Dict[int, tuple], m: int) -> List[int]:
+    seq = []
+    _, parent, t = visited[m]
+    while parent is not None:
+        seq.append(t)
+        m = parent
+        _, parent, t = visited[m]
+    seq.reverse()
+    return seq
@@ -0,0 +1,261 @@
+import json
+import os
+from array import array
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .PetriNet import PetriNet
+from .BitMarking import CompiledNet, iter_bits
+
+
+class ReachabilityGraph:
+    """
+    Explicit reachability graph in array form, reusable across analyses.
+
+    States get dense ids 0..N-1 in BFS order (0 = M0):
+    - markings: (N, ceil(P/8)) uint8, bit-packed rows (bitorder little,
+      place p <-> bit p % 8 of byte p // 8)
+    - indptr / targets / labels: CSR out-edges, edge k of state i goes to
+      targets[k] by firing transition labels[k], k in indptr[i]:indptr[i+1]
+    - parent / parent_label: BFS tree (int32, -1 at the root), so
+      trace(i) is a shortest firing sequence from M0
+
+    The graph is built once (build_reachability_graph) and can be saved
+    with save()/load(); deadlocks, witness traces, SCCs / liveness and
+    linear optimization then run on the arrays without re-exploring.
+    """
+
+    def __init__(
+        self,
+        markings: np.ndarray,
+        num_places: int,
+        indptr: np.ndarray,
+        targets: np.ndarray,
+        labels: np.ndarray,
+        parent: np.ndarray,
+        parent_label: np.ndarray,
+        place_ids: List[str],
+        trans_ids: List[str]
+    ):
+        self.packed = np.asarray(markings, dtype=np.uint8)
+        self.num_places = num_places
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.parent = np.asarray(parent, dtype=np.int32)
+        self.parent_label = np.asarray(parent_label, dtype=np.int32)
+        self.place_ids = place_ids
+        self.trans_ids = trans_ids
+        self._index: Optional[Dict[bytes, int]] = None
+        self._scc: Optional[Tuple[int, np.ndarray]] = None
+
+    @property
+    def num_states(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    # --- states ---
+    def markings(self, ids=None) -> np.ndarray:
+        """Dense 0/1 markings (len(ids) x P), all states if ids is None."""
+        rows = self.packed if ids is None else self.packed[ids]
+        return np.unpackbits(rows, axis=1, count=self.num_places, bitorder='little')
+
+    def marking(self, i: int) -> np.ndarray:
+        return self.markings([i])[0]
+
+    def index(self, marking) -> Optional[int]:
+        """Id of a marking (0/1 sequence), or None if it is not reachable."""
+        if self._index is None:
+            self._index = {row.tobytes(): i for i, row in enumerate(self.packed)}
+        row = np.packbits(np.asarray(marking, dtype=np.uint8), bitorder='little')
+        return self._index.get(row.tobytes())
+
+    def successors(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(target ids, transition indices) of the out-edges of state i."""
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return self.targets[a:b], self.labels[a:b]
+
+    # --- analyses ---
+    def deadlocks(self) -> np.ndarray:
+        """Ids of dead states (no out-edge)."""
+        return np.flatnonzero(np.diff(self.indptr) == 0)
+
+    def dead_markings(self) -> List[List[int]]:
+        """Same output as Deadlock.explicit_deadlock_detector."""
+        return sorted(self.markings(self.deadlocks()).astype(int).tolist())
+
+    def trace(self, i: int) -> List[int]:
+        """Shortest firing sequence (transition indices) from M0 to state i."""
+        seq = []
+        while self.parent[i] >= 0:
+            seq.append(int(self.parent_label[i]))
+            i = self.parent[i]
+        seq.reverse()
+        return seq
+
+    def trace_ids(self, i: int) -> List[str]:
+        return [self.trans_ids[t] for t in self.trace(i)]
+
+    def sccs(self) -> Tuple[int, np.ndarray]:
+        """
+        Strongly connected components (iterative Tarjan).
+        Returns (number of SCCs, comp) with comp[i] the SCC of state i;
+        components are numbered in reverse topological order.
+        """
+        if self._scc is not None:
+            return self._scc
+        n = self.num_states
+        indptr, targets = self.indptr.tolist(), self.targets.tolist()
+        index = [-1] * n
+        low = [0] * n
+        comp = [-1] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        counter = num = 0
+
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            # work: (state, vị trí cạnh tiếp theo cần xét)
+            work = [(root, indptr[root])]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                v, k = work[-1]
+                if k < indptr[v + 1]:
+                    work[-1] = (v, k + 1)
+                    w = targets[k]
+                    if index[w] < 0:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, indptr[w]))
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                    continue
+                work.pop()
+                if work and low[v] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[v]
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        comp[w] = num
+                        if w == v:
+                            break
+                    num += 1
+
+        self._scc = (num, np.array(comp, dtype=np.int32))
+        return self._scc
+
+    def bottom_sccs(self) -> List[int]:
+        """SCCs without edges leaving them (every run ends up in one)."""
+        num, comp = self.sccs()
+        src = np.repeat(comp, np.diff(self.indptr))
+        leaving = np.zeros(num, dtype=bool)
+        leaving[src[comp[self.targets] != src]] = True
+        return np.flatnonzero(~leaving).tolist()
+
+    def live_transitions(self) -> List[int]:
+        """
+        Transitions that are live (L4): from every reachable marking they
+        can fire again later. Holds iff t labels an edge inside every
+        bottom SCC.
+        """
+        num, comp = self.sccs()
+        src = np.repeat(comp, np.diff(self.indptr))
+        live = None
+        for c in self.bottom_sccs():
+            fired = set(np.unique(self.labels[src == c]).tolist())
+            live = fired if live is None else live & fired
+        return sorted(live or [])
+
+    def is_reversible(self) -> bool:
+        """M0 reachable from every reachable marking (single SCC)."""
+        return self.sccs()[0] == 1
+
+    def maximize(self, c: np.ndarray, chunk: int = 1 << 16) -> Tuple[List[int], Optional[int]]:
+        """States with the largest c^T * M, and that value."""
+        c = np.asarray(c)
+        best, ids = None, []
+        for start in range(0, self.num_states, chunk):
+            vals = self.markings(slice(start, start + chunk)) @ c
+            top = vals.max()
+            hits = (np.flatnonzero(vals == top) + start).tolist()
+            if best is None or top > best:
+                best, ids = top, hits
+            elif top == best:
+                ids.extend(hits)
+        return ids, (None if best is None else int(best))
+
+    # --- persistence ---
+    def save(self, path: str) -> None:
+        """Uncompressed .npz (arrays + JSON ids), same layout idea as PetriNet.save_compiled."""
+        meta = json.dumps({
+            'num_places': self.num_places,
+            'place_ids': self.place_ids,
+            'trans_ids': self.trans_ids,
+        })
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, markings=self.packed, indptr=self.indptr, targets=self.targets,
+                 labels=self.labels, parent=self.parent, parent_label=self.parent_label,
+                 meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ReachabilityGraph":
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(data['markings'], meta['num_places'], data['indptr'], data['targets'],
+                       data['labels'], data['parent'], data['parent_label'],
+                       meta['place_ids'], meta['trans_ids'])
+
+    def __str__(self) -> str:
+        return f"ReachabilityGraph({self.num_states} states, {self.num_edges} edges)"
+
+
+def build_reachability_graph(pn: PetriNet) -> ReachabilityGraph:
+    """BFS over the 1-safe net (bitmask engine) that keeps every firing edge."""
+    net = CompiledNet(pn)
+    toggle = net.toggle
+
+    ids = {net.m0: 0}
+    states = [net.m0]
+    enabled = [net.enabled_set(net.m0)]
+    indptr = array('q', [0])
+    targets, labels = array('i'), array('i')
+    parent, parent_label = array('i', [-1]), array('i', [-1])
+
+    # States được xử lý theo thứ tự id (BFS), nên cạnh ra được ghi liên tiếp → CSR
+    i = 0
+    while i < len(states):
+        m, E = states[i], enabled[i]
+        enabled[i] = 0
+        for t in iter_bits(E):
+            new_m = m ^ toggle[t]
+            j = ids.get(new_m)
+            if j is None:
+                j = len(states)
+                ids[new_m] = j
+                states.append(new_m)
+                enabled.append(net.update_enabled(new_m, E, t))
+                parent.append(i)
+                parent_label.append(t)
+            targets.append(j)
+            labels.append(t)
+        indptr.append(len(targets))
+        i += 1
+
+    width = (net.num_places + 7) // 8
+    packed = np.frombuffer(b''.join(m.to_bytes(width, 'little') for m in states), dtype=np.uint8)
+    return ReachabilityGraph(
+        packed.reshape(len(states), width), net.num_places,
+        np.frombuffer(indptr, dtype=np.int64), np.frombuffer(targets, dtype=np.int32),
+        np.frombuffer(labels, dtype=np.int32), np.frombuffer(parent, dtype=np.int32),
+        np.frombuffer(parent_label, dtype=np.int32), pn.place_ids, pn.trans_ids
+    )
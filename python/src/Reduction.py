@@ -0,0 +1,297 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from pyeda.inter import BinaryDecisionDiagram
+from .PetriNet import PetriNet
+from .Sparse import CSRMatrix
+from .BDD import bdd_and, bdd_level_vars, bdd_recursion_limit, bdd_rename
+
+RULES = ("dead-transitions", "constant-places", "parallel-places", "implicit-places", "duplicate-transitions")
+
+
+class NetReduction:
+    """
+    A reduced net plus the map back to the original one.
+
+    net:          the reduced PetriNet (kept places/transitions keep their ids)
+    places:       original index of each place of `net`
+    transitions:  original index of each transition of `net`
+    place_expr:   for every removed original place p, (offset, coef, q):
+                  M(p) = offset + coef * M(q) with q a place of `net`
+                  (index into net), or q None for a constant place
+    merged:       removed duplicate transition -> kept original transition
+    applied:      how many places/transitions each rule removed
+    """
+
+    def __init__(self, original: PetriNet, net: PetriNet, places: List[int], transitions: List[int],
+                 place_expr: Dict[int, Tuple[int, int, Optional[int]]], merged: Dict[int, int],
+                 applied: Dict[str, int]):
+        self.original = original
+        self.net = net
+        self.places = places
+        self.transitions = transitions
+        self.place_expr = place_expr
+        self.merged = merged
+        self.applied = applied
+
+    def __str__(self) -> str:
+        removed = ", ".join(f"{rule}: {n}" for rule, n in self.applied.items() if n)
+        return (f"NetReduction({self.original.num_places}x{self.original.num_transitions} -> "
+                f"{self.net.num_places}x{self.net.num_transitions}; {removed or 'nothing removed'})")
+
+    def lift_marking(self, marking: Sequence[int]) -> Tuple[int, ...]:
+        """Marking of the reduced net -> marking of the original net."""
+        full = [0] * self.original.num_places
+        for i, p in enumerate(self.places):
+            full[p] = int(marking[i])
+        for p, (offset, coef, q) in self.place_expr.items():
+            full[p] = offset + (coef * int(marking[q]) if q is not None else 0)
+        return tuple(full)
+
+    def lift_markings(self, markings: Iterable[Sequence[int]]) -> Set[Tuple[int, ...]]:
+        return {self.lift_marking(M) for M in markings}
+
+    def reduce_marking(self, marking: Sequence[int]) -> Tuple[int, ...]:
+        """Marking of the original net -> marking of the reduced net."""
+        return tuple(int(marking[p]) for p in self.places)
+
+    def lift_trace(self, trace: Iterable[int]) -> List[int]:
+        """Transition indices of the reduced net -> original indices."""
+        return [self.transitions[t] for t in trace]
+
+    def reduce_objective(self, c: Sequence[float]) -> Tuple[np.ndarray, float]:
+        """
+        (c', offset) with c · lift(M') = c' · M' + offset for every marking
+        M' of the reduced net, so optimizing c' on the reduced net and
+        adding offset gives the optimum of c on the original net.
+        """
+        c = np.asarray(c, dtype=float)
+        c_red = c[self.places].copy()
+        offset = 0.0
+        for p, (off, coef, q) in self.place_expr.items():
+            offset += c[p] * off
+            if q is not None:
+                c_red[q] += c[p] * coef
+        return c_red, offset
+
+    def lift_bdd(
+        self,
+        bdd: BinaryDecisionDiagram,
+        place_vars: Sequence[BinaryDecisionDiagram]
+    ) -> Tuple[BinaryDecisionDiagram, List[BinaryDecisionDiagram]]:
+        """
+        Reached BDD of the reduced net over `place_vars` (as filled in by
+        bdd_reachable_counting) -> (Reached BDD of the original net, the
+        variable of each original place), each removed place tied to its
+        expression. The result is laid out on the shared levels in the
+        reduced net's order, each removed place right below the place its
+        expression reads (constant places last), so every tie stays local.
+        """
+        tied: Dict[int, List[int]] = {q: [] for q in range(len(self.places))}
+        constants = []
+        for p, (_, _, q) in sorted(self.place_expr.items()):
+            (constants if q is None else tied[q]).append(p)
+        layout = []
+        for q in sorted(range(len(self.places)), key=lambda q: place_vars[q].uniqid):
+            layout += [self.places[q]] + tied[q]
+        layout += constants
+
+        X: List[Optional[BinaryDecisionDiagram]] = [None] * self.original.num_places
+        for x, p in zip(bdd_level_vars(len(layout)), layout):
+            X[p] = x
+        with bdd_recursion_limit(len(layout)):
+            bdd = bdd_rename(bdd, {place_vars[q]: X[p] for q, p in enumerate(self.places)})
+            for p, (offset, coef, q) in self.place_expr.items():
+                x = X[p]
+                if q is None:
+                    f = x if offset else ~x
+                else:
+                    y = X[self.places[q]]
+                    # offset + coef * y ∈ {y, 1 - y}
+                    f = ~(x ^ y) if coef == 1 else x ^ y
+                bdd = bdd_and(bdd, f)
+        return bdd, X
+
+
+def reduce_net(pn: PetriNet, rules: Sequence[str] = RULES) -> NetReduction:
+    """
+    Rewrite pn into a smaller net with the same behaviour under 1-safe
+    semantics, applying the rules until none fires:
+
+    - dead-transitions:      transitions with an arc weight > 1 never fire
+    - constant-places:       no ordinary transition changes p (only
+                             self-loops): if M0(p)=1 its arcs always hold and
+                             are dropped, if M0(p)=0 its output transitions
+                             are dead; p is removed as a constant
+    - parallel-places:       p and q have the same arcs and M0, so
+                             M(p) = M(q) always: p is removed
+    - implicit-places:       every transition touching p changes it
+                             (no self-loop) and changes some q by the same
+                             (M(p) = M(q)) or opposite (M(p) = 1 - M(q))
+                             amount; q's consume/capacity condition then
+                             implies p's, so p is removed
+    - duplicate-transitions: same preset and postset, one is kept
+
+    Reachable markings map one to one (lift_marking), dead markings stay
+    dead, traces lift transition by transition and any linear objective
+    carries over with reduce_objective. Rules that merge firings
+    (pre-/post-agglomeration) are not applied: they remove intermediate
+    markings, so neither the reachable set nor optima over it survive.
+    """
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown reduction rules: {sorted(unknown)}")
+
+    M0 = [int(x) for x in pn.M0]
+    safe = all(m in (0, 1) for m in M0)
+    # Mạng làm việc: mỗi transition là (pre, post) dạng dict place -> trọng số
+    pre: Dict[int, Dict[int, int]] = {}
+    post: Dict[int, Dict[int, int]] = {}
+    for t in range(pn.num_transitions):
+        pre[t] = {int(p): int(w) for p, w in zip(*pn.I_csr.row(t))}
+        post[t] = {int(p): int(w) for p, w in zip(*pn.O_csr.row(t))}
+    places = set(range(pn.num_places))
+    touch: Dict[int, Set[int]] = {p: set() for p in places}
+    for t in pre:
+        for p in list(pre[t]) + list(post[t]):
+            touch[p].add(t)
+    # removed place -> (offset, coef, original place or None)
+    expr: Dict[int, Tuple[int, int, Optional[int]]] = {}
+    merged: Dict[int, int] = {}
+    applied = {rule: 0 for rule in RULES}
+
+    def delta(t: int, p: int) -> int:
+        return post[t].get(p, 0) - pre[t].get(p, 0)
+
+    def ordinary(t: int) -> bool:
+        return all(w <= 1 for w in pre[t].values()) and all(w <= 1 for w in post[t].values())
+
+    def remove_transition(t: int):
+        for p in list(pre[t]) + list(post[t]):
+            touch[p].discard(t)
+        del pre[t], post[t]
+
+    def remove_place(p: int, offset: int, coef: int, q: Optional[int]):
+        places.discard(p)
+        for t in touch.pop(p):
+            pre[t].pop(p, None)
+            post[t].pop(p, None)
+        expr[p] = (offset, coef, q)
+
+    changed = True
+    while changed:
+        changed = False
+
+        if "dead-transitions" in rules:
+            for t in sorted(pre):
+                if not ordinary(t):
+                    remove_transition(t)
+                    applied["dead-transitions"] += 1
+                    changed = True
+
+        if "constant-places" in rules and safe:
+            for p in sorted(places):
+                ts = sorted(touch[p])
+                if any(delta(t, p) or not ordinary(t) for t in ts):
+                    continue
+                if M0[p] == 0:
+                    for t in ts:
+                        remove_transition(t)
+                        applied["dead-transitions"] += 1
+                remove_place(p, M0[p], 0, None)
+                applied["constant-places"] += 1
+                changed = True
+
+        if "parallel-places" in rules:
+            seen: Dict = {}
+            for p in sorted(places):
+                key = (M0[p], tuple((t, pre[t].get(p, 0), post[t].get(p, 0)) for t in sorted(touch[p])))
+                if key in seen:
+                    remove_place(p, 0, 1, seen[key])
+                    applied["parallel-places"] += 1
+                    changed = True
+                else:
+                    seen[key] = p
+
+        if "implicit-places" in rules and safe:
+            for p in sorted(places):
+                ts = sorted(touch[p])
+                if not ts or any(delta(t, p) == 0 or not ordinary(t) for t in ts):
+                    continue
+                signature = {t: delta(t, p) for t in ts}
+                # q phải bị thay đổi bởi đúng các transition đó
+                for q in sorted(set(pre[ts[0]]) | set(post[ts[0]])):
+                    if q == p or not delta(ts[0], q):
+                        continue
+                    qs = {t: delta(t, q) for t in touch[q] if delta(t, q)}
+                    if qs.keys() != signature.keys():
+                        continue
+                    if all(qs[t] == signature[t] for t in ts) and M0[q] == M0[p]:
+                        remove_place(p, 0, 1, q)
+                    elif all(qs[t] == -signature[t] for t in ts) and M0[q] + M0[p] == 1:
+                        remove_place(p, 1, -1, q)
+                    else:
+                        continue
+                    applied["implicit-places"] += 1
+                    changed = True
+                    break
+
+        if "duplicate-transitions" in rules:
+            seen = {}
+            for t in sorted(pre):
+                key = (tuple(sorted(pre[t].items())), tuple(sorted(post[t].items())))
+                if key in seen:
+                    remove_transition(t)
+                    merged[t] = seen[key]
+                    applied["duplicate-transitions"] += 1
+                    changed = True
+                else:
+                    seen[key] = t
+
+    kept_places = sorted(places)
+    kept_trans = sorted(pre)
+    new_index = {p: i for i, p in enumerate(kept_places)}
+
+    # Rút gọn chuỗi p -> q -> r về place còn giữ trong mạng mới
+    def resolve(p: int) -> Tuple[int, int, Optional[int]]:
+        offset, coef, q = expr[p]
+        if q is None:
+            return offset, 0, None
+        if q in new_index:
+            return offset, coef, new_index[q]
+        off_q, coef_q, r = resolve(q)
+        return offset + coef * off_q, coef * coef_q, r
+
+    place_expr = {p: resolve(p) for p in expr}
+    # Transition trùng lặp trỏ về transition còn giữ
+    for t, rep in merged.items():
+        while rep in merged:
+            rep = merged[rep]
+        merged[t] = rep
+
+    net = _build_net(pn, kept_places, kept_trans, pre, post, new_index)
+    return NetReduction(pn, net, kept_places, kept_trans, place_expr, merged, applied)
+
+
+def _build_net(pn: PetriNet, places: List[int], transitions: List[int],
+               pre: Dict[int, Dict[int, int]], post: Dict[int, Dict[int, int]],
+               new_index: Dict[int, int]) -> PetriNet:
+    shape = (len(transitions), len(places))
+    mats = []
+    for arcs in (pre, post):
+        indptr, indices, data = [0], [], []
+        for t in transitions:
+            row = sorted((new_index[p], w) for p, w in arcs[t].items())
+            indices.extend(p for p, _ in row)
+            data.extend(w for _, w in row)
+            indptr.append(len(indices))
+        A = CSRMatrix(np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64),
+                      np.array(data, dtype=pn.I_csr.data.dtype), shape)
+        mats.append(A if pn.is_sparse else A.toarray())
+    return PetriNet(
+        [pn.place_ids[p] for p in places],
+        [pn.trans_ids[t] for t in transitions],
+        [pn.place_names[p] for p in places],
+        [pn.trans_names[t] for t in transitions],
+        mats[0], mats[1],
+        np.asarray(pn.M0)[places].copy(),
+    )
@@ -0,0 +1,71 @@
+from typing import Tuple
+import numpy as np
+
+
+class CSRMatrix:
+    """
+    Minimal compressed-sparse-row matrix for incidence matrices.
+
+    Row t holds the places of transition t: columns indices[indptr[t]:indptr[t+1]]
+    with arc weights data[...]. Indices are int32 and weights the smallest
+    unsigned dtype that fits, so a net costs a few bytes per arc instead of
+    8 bytes per (transition, place) cell.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, shape: Tuple[int, int]):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=_weight_dtype(data))
+        self.shape = (int(shape[0]), int(shape[1]))
+
+    @classmethod
+    def from_dense(cls, A: np.ndarray) -> "CSRMatrix":
+        rows, cols = np.nonzero(A)
+        indptr = np.searchsorted(rows, np.arange(A.shape[0] + 1))
+        return cls(indptr, cols, A[rows, cols], A.shape)
+
+    @classmethod
+    def from_coo(cls, rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int]) -> "CSRMatrix":
+        """Build from (row, col) pairs; duplicate pairs add up (parallel arcs)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        keys, counts = np.unique(rows * shape[1] + cols, return_counts=True)
+        rows, cols = keys // shape[1], keys % shape[1]
+        indptr = np.searchsorted(rows, np.arange(shape[0] + 1))
+        return cls(indptr, cols, counts, shape)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def row(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(column indices, weights) of row i."""
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return self.indices[a:b], self.data[a:b]
+
+    def row_lengths(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def max_row_weight(self) -> np.ndarray:
+        """Largest weight of each row (0 for empty rows)."""
+        out = np.zeros(self.shape[0], dtype=np.int64)
+        rows = np.repeat(np.arange(self.shape[0]), self.row_lengths())
+        np.maximum.at(out, rows, self.data)
+        return out
+
+    def toarray(self) -> np.ndarray:
+        """Dense (rows x cols) int matrix."""
+        A = np.zeros(self.shape, dtype=int)
+        rows = np.repeat(np.arange(self.shape[0]), self.row_lengths())
+        A[rows, self.indices] = self.data
+        return A
+
+
+def _weight_dtype(data) -> np.dtype:
+    data = np.asarray(data)
+    top = int(data.max()) if data.size else 0
+    if top <= np.iinfo(np.uint8).max:
+        return np.uint8
+    if top <= np.iinfo(np.uint16).max:
+        return np.uint16
+    return np.uint32
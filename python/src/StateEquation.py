@@ -0,0 +1,210 @@
+import heapq
+import time
+from typing import List, NamedTuple, Optional
+import numpy as np
+from .PetriNet import PetriNet
+from .BitMarking import CompiledNet, iter_bits
+from .Stats import NULL_STATS, Stats
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import csr_matrix, hstack, identity
+except ImportError:  # scipy là tùy chọn, chỉ cần cho optimizer này
+    milp = None
+
+
+class StateEquationResult(NamedTuple):
+    """
+    marking/value: best reachable marking found (M0 at worst) and c^T M
+    upper_bound:   proven bound on c^T M over all reachable markings
+    status:        "optimal" (value == upper_bound) or "gap"
+    trace:         firing sequence (transition indices) from M0 to marking
+    candidates:    number of ILP solutions that were checked
+    """
+    marking: List[int]
+    value: float
+    upper_bound: float
+    status: str
+    trace: List[int]
+    candidates: int
+
+    @property
+    def gap(self) -> float:
+        return self.upper_bound - self.value
+
+
+def incidence_matrix(pn: PetriNet):
+    """C = O - I as a scipy sparse (transitions x places) matrix."""
+    I = csr_matrix((pn.I_csr.data.astype(np.int64), pn.I_csr.indices, pn.I_csr.indptr), shape=pn.I_csr.shape)
+    O = csr_matrix((pn.O_csr.data.astype(np.int64), pn.O_csr.indices, pn.O_csr.indptr), shape=pn.O_csr.shape)
+    return (O - I).tocsr()
+
+
+def state_equation_optimize(
+    pn: PetriNet,
+    c: np.ndarray,
+    time_limit: Optional[float] = None,
+    max_candidates: int = 50,
+    search_states: int = 200_000,
+    stats: Optional[Stats] = None
+) -> StateEquationResult:
+    """
+    Maximize c^T M over reachable markings without building the BDD.
+
+    1. Upper bound: the marking equation M = M0 + C^T sigma (M binary,
+       sigma >= 0 integer, sigma_t = 0 for transitions that cannot fire
+       under 1-safe semantics) holds for every reachable M, so the MILP
+       max c^T M subject to it bounds the optimum from above.
+    2. The MILP optimum M* is checked by a best-first search from M0
+       towards M* (Hamming distance heuristic, at most `search_states`
+       states). Three outcomes:
+       - found: M* is reachable with the current bound, so it is optimal
+         (unless an undecided candidate with a higher value remains);
+         the firing sequence is returned as the certificate
+       - search exhausted: the whole reachable set was enumerated, the
+         exact optimum is read off the visited states
+       - budget hit: undecided; M* is cut off (no-good cut) and the MILP
+         is solved again for the next candidate
+    3. Stops after `max_candidates` candidates or `time_limit` seconds
+       and reports the remaining bound gap.
+
+    Needs scipy (HiGHS MILP).
+    """
+    if milp is None:
+        raise ImportError("state_equation_optimize needs scipy (pip install scipy)")
+
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    deadline = None if time_limit is None else start + time_limit
+
+    net = CompiledNet(pn)
+    c = np.asarray(c, dtype=float)
+    P, T = pn.num_places, pn.num_transitions
+    M0 = np.asarray(pn.M0, dtype=float)
+
+    best_marking = [int(x) for x in pn.M0]
+    best_value = float(c @ M0)
+    best_trace: List[int] = []
+
+    # x = [M (P biến nhị phân), sigma (T biến nguyên >= 0)]
+    A_eq = hstack([identity(P, format='csr'), -incidence_matrix(pn).T]).tocsr()
+    sigma_ub = np.array([np.inf if pn.ordinary[t] else 0 for t in range(T)])
+    bounds = Bounds(np.zeros(P + T), np.concatenate([np.ones(P), sigma_ub]))
+    objective = np.concatenate([-c, np.zeros(T)])
+    integrality = np.ones(P + T)
+
+    cuts: List[np.ndarray] = []
+    cut_lb: List[float] = []
+    undecided: List[float] = []
+    candidates = 0
+    upper_bound = np.inf
+
+    def finish(status: str) -> StateEquationResult:
+        ub = max(upper_bound, best_value) if status == "gap" else best_value
+        if stats.enabled:
+            stats.emit("ilp.done", status=status, value=best_value, upper_bound=ub,
+                       candidates=candidates, seconds=time.perf_counter() - start)
+        return StateEquationResult(best_marking, best_value, ub, status, best_trace, candidates)
+
+    while True:
+        constraints = [LinearConstraint(A_eq, M0, M0)]
+        if cuts:
+            constraints.append(LinearConstraint(
+                np.vstack(cuts), np.array(cut_lb), np.full(len(cuts), np.inf)))
+        options = {}
+        if deadline is not None:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return finish("gap")
+            options["time_limit"] = remaining
+
+        t0 = time.perf_counter()
+        res = milp(objective, constraints=constraints, integrality=integrality,
+                   bounds=bounds, options=options)
+        if res.status == 2:
+            # Không còn ứng viên nào: mọi marking thỏa phương trình đã bị loại
+            upper_bound = max(undecided, default=best_value)
+            return finish("optimal" if upper_bound <= best_value else "gap")
+        if res.status != 0:
+            # Hết giờ giữa chừng: chỉ còn dual bound của MILP
+            dual = getattr(res, "mip_dual_bound", None)
+            bound = np.inf if dual is None or np.isnan(dual) else float(-dual)
+            upper_bound = max([bound] + undecided)
+            return finish("gap")
+
+        value = float(-res.fun)
+        upper_bound = max([value] + undecided)
+        if stats.enabled:
+            stats.emit("ilp.solve", value=value, cuts=len(cuts), seconds=time.perf_counter() - t0)
+        if value <= best_value and not undecided:
+            return finish("optimal")
+
+        target_vec = np.rint(res.x[:P]).astype(int)
+        candidates += 1
+        outcome, trace, visited = _search_towards(net, net.encode(target_vec), search_states, deadline)
+        if stats.enabled:
+            stats.emit("ilp.verify", candidate=candidates, value=value, outcome=outcome,
+                       states=len(visited))
+
+        if outcome == "reachable":
+            if value > best_value:
+                best_marking, best_value, best_trace = target_vec.tolist(), value, trace
+            upper_bound = max([value] + undecided)
+            return finish("optimal" if not undecided else "gap")
+
+        if outcome == "exhausted":
+            # Toàn bộ không gian trạng thái đã được duyệt: lấy tối ưu chính xác
+            weights = [float(x) for x in c]
+            for m in visited:
+                v = sum(weights[p] for p in iter_bits(m))
+                if v > best_value:
+                    best_value = v
+                    best_marking = list(net.decode(m))
+                    best_trace = _trace(visited, m)
+            upper_bound = best_value
+            return finish("optimal")
+
+        # Chưa quyết định được: loại M* và giải tiếp
+        undecided.append(value)
+        ones = target_vec == 1
+        row = np.zeros(P + T)
+        row[:P] = np.where(ones, -1.0, 1.0)
+        cuts.append(row)
+        cut_lb.append(1.0 - ones.sum())
+        if candidates >= max_candidates:
+            return finish("gap")
+
+
+def _search_towards(net: CompiledNet, target: int, max_states: int, deadline: Optional[float]):
+    """
+    Best-first search from M0 ordered by Hamming distance to target.
+    Returns (outcome, trace, visited) with outcome "reachable",
+    "exhausted" (all reachable markings seen, target not among them) or
+    "budget"; visited maps marking -> (parent, transition).
+    """
+    visited = {net.m0: (None, -1)}
+    heap = [((net.m0 ^ target).bit_count(), 0, net.m0)]
+    tie = 0
+    while heap:
+        _, _, m = heapq.heappop(heap)
+        if m == target:
+            return "reachable", _trace(visited, m), visited
+        if len(visited) >= max_states or (deadline is not None and time.perf_counter() > deadline):
+            return "budget", [], visited
+        for t, new_m in net.successors(m):
+            if new_m not in visited:
+                visited[new_m] = (m, t)
+                tie += 1
+                heapq.heappush(heap, ((new_m ^ target).bit_count(), tie, new_m))
+    return "exhausted", [], visited
+
+
+def _trace(visited, m: int) -> List[int]:
+    seq = []
+    parent, t = visited[m]
+    while parent is not None:
+        seq.append(t)
+        m = parent
+        parent, t = visited[m]
+    seq.reverse()
+    return seq
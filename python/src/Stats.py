@@ -0,0 +1,72 @@
+import json
+import time
+from typing import Callable, Dict, List, Optional, TextIO
+
+
+class Stats:
+    """
+    Sink for instrumentation events emitted by the analyses.
+
+    Every analysis takes `stats=None` and then uses NULL_STATS, an instance
+    of this base class: `enabled` is False, so call sites skip collecting
+    anything that costs more than a branch (node counts, model counts,
+    timers) and emit() is never reached.
+
+    Events are flat dicts: {"event": name, "time": seconds since the sink
+    was created, **fields}. Names are "<analysis>.<what>", e.g.
+    "bdd.iteration", "bdd.image", "bfs.level", "dfs.progress",
+    "deadlock.level", "optimization.dp", each analysis ending with
+    "<analysis>.done".
+    """
+
+    enabled = False
+
+    def emit(self, event: str, **fields) -> None:
+        pass
+
+
+NULL_STATS = Stats()
+
+
+class EventLog(Stats):
+    """
+    Records events in memory (`events`) and/or forwards each one to
+    `callback` as it happens.
+    """
+
+    enabled = True
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None, keep: bool = True):
+        self.callback = callback
+        self.keep = keep
+        self.events: List[Dict] = []
+        self._start = time.perf_counter()
+
+    def emit(self, event: str, **fields) -> None:
+        record = {"event": event, "time": time.perf_counter() - self._start}
+        record.update(fields)
+        if self.keep:
+            self.events.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def of(self, event: str) -> List[Dict]:
+        """Recorded events with the given name."""
+        return [e for e in self.events if e["event"] == event]
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, "w") as f:
+            for record in self.events:
+                f.write(json.dumps(record) + "\n")
+
+
+def jsonl_stats(stream: TextIO) -> EventLog:
+    """Sink that streams each event as one JSON line to `stream` (nothing kept)."""
+    def write(record: Dict) -> None:
+        stream.write(json.dumps(record) + "\n")
+    return EventLog(callback=write, keep=False)
+
+
+def rate(count: int, seconds: float) -> Optional[float]:
+    """count / seconds, None before any time has passed."""
+    return count / seconds if seconds > 0 else None
@@ -0,0 +1,130 @@
+import time
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+from .BitMarking import CompiledNet
+from .VisitedStore import VisitedStore
+from .Stats import NULL_STATS, Stats
+
+Marking = Tuple[int, ...]
+
+# Kết quả của một lần duyệt
+COMPLETE = "complete"     # đã duyệt hết không gian trạng thái
+TRUNCATED = "truncated"   # dừng vì hết budget (hoặc bị cancel), xem `reason`
+STOPPED = "stopped"       # predicate stop_when trả True, xem `found`
+
+
+class ReachabilityStream:
+    """
+    Iterator over reachable markings in discovery order, with budgets.
+
+    Wraps a search generator that yields bit-packed markings as they are
+    first inserted into `visited`. Each one is decoded to a tuple and
+    yielded (or grouped in lists of `batch_size`). Budgets are checked
+    before a new marking is handed out:
+    - max_states:  at most this many markings are yielded
+    - max_seconds: wall-clock time since the stream was created
+    - max_memory:  bytes held by the visited store (VisitedStore.memory_bytes)
+    and `stop_when(marking)` ends the search right after yielding a match.
+
+    After iteration, `status` is COMPLETE, TRUNCATED (with `reason` set to
+    "max_states", "max_seconds", "max_memory" or "cancelled") or STOPPED
+    (with `found`). Stopping early or cancel() releases the visited store.
+    The outcome is also reported to `stats` as a "stream.done" event.
+    """
+
+    _MEMORY_CHECK_EVERY = 1024
+
+    def __init__(
+        self,
+        net: CompiledNet,
+        search: Iterator[int],
+        visited: VisitedStore,
+        max_states: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_memory: Optional[int] = None,
+        stop_when: Optional[Callable[[Marking], bool]] = None,
+        batch_size: Optional[int] = None,
+        stats: Stats = NULL_STATS
+    ):
+        self.net = net
+        self.visited = visited
+        self.max_states = max_states
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.stop_when = stop_when
+        self.batch_size = batch_size
+        self.stats = stats
+
+        self.status: Optional[str] = None
+        self.reason: Optional[str] = None
+        self.found: Optional[Marking] = None
+        self.states = 0
+        self._start = time.perf_counter()
+        self._search = search
+        self._it = self._run() if batch_size is None else self._batches()
+
+    @property
+    def complete(self) -> bool:
+        return self.status == COMPLETE
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def __iter__(self) -> "ReachabilityStream":
+        return self
+
+    def __next__(self) -> Union[Marking, List[Marking]]:
+        return next(self._it)
+
+    def cancel(self):
+        """Stop the search now (e.g. from the consumer's loop)."""
+        if self.status is None:
+            self._finish(TRUNCATED, "cancelled")
+        self._it.close()
+
+    def _over_budget(self) -> Optional[str]:
+        if self.max_states is not None and self.states >= self.max_states:
+            return "max_states"
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return "max_seconds"
+        if (self.max_memory is not None and self.states % self._MEMORY_CHECK_EVERY == 0
+                and self.visited.memory_bytes() > self.max_memory):
+            return "max_memory"
+        return None
+
+    def _finish(self, status: str, reason: Optional[str] = None):
+        self.status, self.reason = status, reason
+        if self.stats.enabled:
+            self.stats.emit("stream.done", status=status, reason=reason,
+                            states=self.states, seconds=self.elapsed)
+        self._search.close()
+        self.visited.close()
+
+    def _run(self) -> Iterator[Marking]:
+        decode, stop_when = self.net.decode, self.stop_when
+        for m in self._search:
+            reason = self._over_budget()
+            if reason is not None:
+                self._finish(TRUNCATED, reason)
+                return
+
+            marking = decode(m)
+            self.states += 1
+            yield marking
+
+            if stop_when is not None and stop_when(marking):
+                self.found = marking
+                self._finish(STOPPED)
+                return
+
+        self._finish(COMPLETE)
+
+    def _batches(self) -> Iterator[List[Marking]]:
+        batch = []
+        for marking in self._run():
+            batch.append(marking)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
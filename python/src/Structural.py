@@ -0,0 +1,263 @@
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from .PetriNet import PetriNet
+from .BitMarking import iter_bits
+from .Stats import NULL_STATS, Stats
+
+
+class NetStructure:
+    """
+    Net graph as bitmasks, for structural analysis (no markings explored).
+
+    pre[t] / post[t] are place sets packed into ints (bit p <-> place p),
+    m0 is the initial marking packed the same way.
+
+    - siphon S: every transition putting a token into S takes one from S
+      (•S ⊆ S•), so an empty siphon stays empty forever
+    - trap Q:   every transition taking a token from Q puts one back
+      (Q• ⊆ •Q), so a marked trap stays marked forever
+    """
+
+    def __init__(self, num_places: int, pre: Sequence[int], post: Sequence[int], m0: int = 0):
+        self.num_places = num_places
+        self.pre = list(pre)
+        self.post = list(post)
+        self.m0 = m0
+        self.all_places = (1 << num_places) - 1
+        # producers[p] / consumers[p]: transitions có p trong post / pre
+        self.producers: List[List[int]] = [[] for _ in range(num_places)]
+        self.consumers: List[List[int]] = [[] for _ in range(num_places)]
+        for t in range(len(self.pre)):
+            for p in iter_bits(self.pre[t]):
+                self.consumers[p].append(t)
+            for p in iter_bits(self.post[t]):
+                self.producers[p].append(t)
+
+    @classmethod
+    def from_net(cls, pn: PetriNet) -> "NetStructure":
+        """Arcs of pn regardless of weight."""
+        pre = [sum(1 << p for p in pn.preset[t]) for t in range(pn.num_transitions)]
+        post = [sum(1 << p for p in pn.postset[t]) for t in range(pn.num_transitions)]
+        m0 = sum(1 << p for p in range(pn.num_places) if pn.M0[p] > 0)
+        return cls(pn.num_places, pre, post, m0)
+
+    def is_siphon(self, S: int) -> bool:
+        return self.max_siphon(S) == S
+
+    def is_trap(self, Q: int) -> bool:
+        return self.max_trap(Q) == Q
+
+    def max_siphon(self, A: int) -> int:
+        """Largest siphon inside the place set A (0 if none)."""
+        return self._max_closed(A, self.post, self.pre, self.consumers)
+
+    def max_trap(self, A: int) -> int:
+        """Largest trap inside the place set A (0 if none)."""
+        return self._max_closed(A, self.pre, self.post, self.producers)
+
+    def minimal_siphons(self, max_nodes: Optional[int] = None) -> Tuple[List[int], bool]:
+        """(minimal siphons as masks, True if the enumeration finished within max_nodes)."""
+        return _collect(self._minimal_closed(self.max_siphon), max_nodes)
+
+    def minimal_traps(self, max_nodes: Optional[int] = None) -> Tuple[List[int], bool]:
+        """(minimal traps as masks, True if the enumeration finished within max_nodes)."""
+        return _collect(self._minimal_closed(self.max_trap), max_nodes)
+
+    def _max_closed(self, A: int, into: List[int], out_of: List[int], watchers: List[List[int]]) -> int:
+        """
+        Remove places of A until no transition puts a token into A without
+        taking one from A. watchers[p] lists the transitions with p in
+        out_of[t]: removing p can only create new violations there.
+        """
+        work = [t for t in range(len(into)) if into[t] & A and not out_of[t] & A]
+        while work and A:
+            removed = into[work.pop()] & A
+            if not removed:
+                continue
+            A &= ~removed
+            for p in iter_bits(removed):
+                for t in watchers[p]:
+                    if into[t] & A and not out_of[t] & A:
+                        work.append(t)
+        return A
+
+    def _minimal_closed(
+        self,
+        closed: Callable[[int], int],
+        narrow: Optional[Callable[[int, int], int]] = None
+    ) -> Iterator[Optional[int]]:
+        """
+        Branching enumeration of the minimal non-empty closed sets, where
+        closed(A) is the largest one inside A (max_siphon or max_trap).
+
+        A subproblem (allowed, required) asks for the sets inside `allowed`
+        that contain `required`. Its largest one is shrunk greedily to a set
+        S minimal among those containing `required`; the rest of the
+        subproblem is split over S \\ required = {p1..pk} into disjoint parts
+        "without p1", "with p1, without p2", ... so no set is reported
+        twice. S is reported only if it is minimal outright.
+
+        narrow(allowed, required), if given, returns the part of `allowed`
+        still worth searching (0 skips the subproblem); callers looking for
+        particular sets use it to cut branches that cannot contain one.
+
+        Yields None once per subproblem (used to count work) and each
+        minimal set as a mask.
+        """
+        stack = [(self.all_places, 0)]
+        while stack:
+            allowed, required = stack.pop()
+            yield None
+            if narrow is not None and required:
+                allowed = narrow(allowed, required)
+            S = closed(allowed)
+            if not S or S & required != required:
+                continue
+            for p in iter_bits(S & ~required):
+                smaller = closed(S & ~(1 << p))
+                if smaller and smaller & required == required:
+                    S = smaller
+
+            if not required or all(not closed(S & ~(1 << p)) for p in iter_bits(required)):
+                yield S
+
+            fixed = required
+            for p in iter_bits(S & ~required):
+                stack.append((allowed & ~(1 << p), fixed))
+                fixed |= 1 << p
+
+
+def _collect(search: Iterator[Optional[int]], max_nodes: Optional[int]) -> Tuple[List[int], bool]:
+    found, nodes = [], 0
+    for S in search:
+        if S is not None:
+            found.append(S)
+            continue
+        nodes += 1
+        if max_nodes is not None and nodes > max_nodes:
+            return found, False
+    return found, True
+
+
+def complemented_structure(pn: PetriNet) -> NetStructure:
+    """
+    Ordinary net with the same behaviour as pn under 1-safe semantics.
+
+    Place p keeps index p and gets a complement p' = num_places + p with
+    M(p') = 1 - M(p). The capacity check "t• \\ •t must be empty" becomes a
+    plain input arc from p', and every token taken from p is put back on
+    p'. Transitions with an arc weight > 1 never fire and are dropped.
+    In the result t is enabled iff all of pre[t] is marked, exactly as in
+    pn, so the usual siphon/trap theory applies.
+    """
+    P = pn.num_places
+    pre, post = [], []
+    for t in range(pn.num_transitions):
+        if not pn.ordinary[t]:
+            continue
+        p_in = sum(1 << p for p in pn.preset[t])
+        p_out = sum(1 << p for p in pn.postset[t])
+        consume, produce = p_in & ~p_out, p_out & ~p_in
+        pre.append(p_in | (produce << P))
+        post.append(p_out | (consume << P))
+    m0 = sum(1 << p if pn.M0[p] else 1 << (P + p) for p in range(P))
+    return NetStructure(2 * P, pre, post, m0)
+
+
+def place_names(pn: PetriNet, S: int) -> List[str]:
+    """Place ids of a mask over pn or its complemented structure (complements get a trailing ')."""
+    P = pn.num_places
+    return [pn.place_ids[p] if p < P else pn.place_ids[p - P] + "'" for p in iter_bits(S)]
+
+
+def minimal_siphons(pn: PetriNet, max_nodes: Optional[int] = 100_000) -> Tuple[List[List[int]], bool]:
+    """Minimal siphons of pn as sorted place index lists, plus a completeness flag."""
+    masks, complete = NetStructure.from_net(pn).minimal_siphons(max_nodes)
+    return [list(iter_bits(S)) for S in masks], complete
+
+
+def minimal_traps(pn: PetriNet, max_nodes: Optional[int] = 100_000) -> Tuple[List[List[int]], bool]:
+    """Minimal traps of pn as sorted place index lists, plus a completeness flag."""
+    masks, complete = NetStructure.from_net(pn).minimal_traps(max_nodes)
+    return [list(iter_bits(S)) for S in masks], complete
+
+
+class SiphonTrapResult(NamedTuple):
+    """
+    deadlock_free: True  - proven, no reachable marking is dead
+                   False - M0 itself is dead
+                   None  - not decided structurally, explore the states
+    reason:        "siphon-trap", "source-transition", "initially-dead",
+                   "bad-siphon", "budget" or "not-1-safe"
+    siphon:        for "bad-siphon", a minimal siphon of the complemented
+                   structure without an initially marked trap (mask)
+    siphons:       minimal siphons checked
+    """
+    deadlock_free: Optional[bool]
+    reason: str
+    siphon: Optional[int]
+    siphons: int
+
+
+def siphon_trap_check(
+    pn: PetriNet,
+    max_nodes: Optional[int] = 20_000,
+    stats: Optional[Stats] = None
+) -> SiphonTrapResult:
+    """
+    Structural sufficient condition for deadlock freedom.
+
+    At a dead marking every transition has an unmarked input place, so the
+    unmarked places form a siphon that is empty. A siphon containing an
+    initially marked trap never gets empty. Hence if every minimal siphon
+    of the complemented structure (see complemented_structure) contains an
+    initially marked trap, no reachable marking is dead (for free-choice
+    nets this is Commoner's liveness condition).
+
+    Only the minimal siphons are checked (any siphon contains one), each
+    against its largest trap. A minimal siphon failing the test does not
+    prove a deadlock, the answer is then None and the caller should fall
+    back to explicit or symbolic exploration; so is it when the branching
+    enumeration needs more than `max_nodes` subproblems.
+    """
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+
+    def finish(deadlock_free, reason, siphon=None, checked=0):
+        if stats.enabled:
+            stats.emit("structural.done", deadlock_free=deadlock_free, reason=reason,
+                       siphons=checked, seconds=time.perf_counter() - start)
+        return SiphonTrapResult(deadlock_free, reason, siphon, checked)
+
+    if any(m not in (0, 1) for m in pn.M0.tolist()):
+        return finish(None, "not-1-safe")
+
+    net = complemented_structure(pn)
+    if any(pre == 0 for pre in net.pre):
+        # Transition không cần token nào: luôn bắn được
+        return finish(True, "source-transition")
+    if not any(pre & net.m0 == pre for pre in net.pre):
+        return finish(False, "initially-dead")
+
+    P = pn.num_places
+    low = (1 << P) - 1
+
+    def narrow(allowed: int, required: int) -> int:
+        # Nhánh bắt buộc chứa một trap có token ban đầu: mọi siphon trong đó
+        # đều tốt (max_trap(required) ⊆ max_trap(S)), bỏ cả nhánh
+        if net.max_trap(required) & net.m0:
+            return 0
+        # {p, p'} là trap có token, siphon xấu không chứa cả hai
+        return allowed & ~(((required & low) << P) | (required >> P))
+
+    checked, nodes = 0, 0
+    for S in net._minimal_closed(net.max_siphon, narrow):
+        if S is None:
+            nodes += 1
+            if max_nodes is not None and nodes > max_nodes:
+                return finish(None, "budget", checked=checked)
+            continue
+        checked += 1
+        if not net.max_trap(S) & net.m0:
+            return finish(None, "bad-siphon", S, checked)
+    return finish(True, "siphon-trap", checked=checked)
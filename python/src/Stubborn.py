@@ -0,0 +1,94 @@
+from typing import List
+from .BitMarking import CompiledNet, iter_bits
+
+
+class StubbornSets:
+    """
+    Deadlock-preserving stubborn sets for a CompiledNet (Valmari).
+
+    Under 1-safe semantics a transition t tests the places
+    test(t) = •t ∪ (t• \\ •t) (marked / empty) and flips toggle(t).
+    Sets are transition bitmasks, built by closure from one enabled seed:
+
+    - enabled t:  every u with toggle(u) ∩ test(t) or toggle(t) ∩ test(u)
+                  (u could disable t, be disabled by t, or not commute)
+    - disabled t: one reason it is disabled, and every transition that can
+                  remove it: for an empty p in •t the transitions putting a
+                  token into p, for a marked p in t• \\ •t those emptying p
+                  (the reason adding the fewest new transitions is chosen)
+
+    Firing only the enabled part of such a set in every state keeps all
+    reachable deadlocks: transitions left out cannot enable a disabled
+    member nor interfere with an enabled one, so every path to a deadlock
+    can be reordered to start with a member (no cycle proviso is needed
+    for deadlocks).
+    """
+
+    def __init__(self, net: CompiledNet, max_seeds: int = 8):
+        self.net = net
+        self.max_seeds = max_seeds
+        firable = net.firable
+
+        # dep[t]: phụ thuộc theo cả hai chiều; affected[t] (chỉ gồm transition
+        # bắn được) đã chứa mọi u có toggle(t) ∩ test(u) khác rỗng
+        self.dep: List[int] = [0] * net.num_transitions
+        for t in firable:
+            for u in net.affected[t]:
+                if u != t:
+                    self.dep[t] |= 1 << u
+                    self.dep[u] |= 1 << t
+
+        # markers[p]: transition đặt token vào p; clearers[p]: transition lấy token khỏi p
+        self.markers: List[int] = [0] * net.num_places
+        self.clearers: List[int] = [0] * net.num_places
+        for t in firable:
+            for p in iter_bits(net.produce[t]):
+                self.markers[p] |= 1 << t
+            for p in iter_bits(net.consume[t]):
+                self.clearers[p] |= 1 << t
+
+    def stubborn(self, m: int, E: int) -> int:
+        """
+        Enabled transitions of a stubborn set at m (E = enabled set of m,
+        non-zero). Up to max_seeds enabled seeds are tried, the smallest
+        result is kept.
+        """
+        best = E
+        for k, seed in enumerate(iter_bits(E)):
+            if k >= self.max_seeds:
+                break
+            S = self._closure(m, E, seed, best)
+            if S is not None and (S & E).bit_count() < best.bit_count():
+                best = S & E
+                if best & (best - 1) == 0:
+                    break
+        return best
+
+    def _closure(self, m: int, E: int, seed: int, bound: int):
+        """Stubborn set grown from seed; None once it has as many enabled members as bound."""
+        net = self.net
+        limit = bound.bit_count()
+        S = 1 << seed
+        work = [seed]
+        while work:
+            t = work.pop()
+            if E >> t & 1:
+                add = self.dep[t]
+            else:
+                # Chọn lý do bị chặn cần thêm ít transition mới nhất
+                add = None
+                for p in iter_bits(net.pre[t] & ~m):
+                    cand = self.markers[p]
+                    if add is None or (cand & ~S).bit_count() < (add & ~S).bit_count():
+                        add = cand
+                for p in iter_bits(net.produce[t] & m):
+                    cand = self.clearers[p]
+                    if add is None or (cand & ~S).bit_count() < (add & ~S).bit_count():
+                        add = cand
+            new = add & ~S
+            if new:
+                S |= new
+                if (S & E).bit_count() >= limit:
+                    return None
+                work.extend(iter_bits(new))
+        return S
@@ -0,0 +1,338 @@
+import heapq
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from pyeda.boolalg import picosat
+from .PetriNet import PetriNet
+from .BitMarking import iter_bits
+from .Stats import NULL_STATS, Stats
+
+
+class Prefix:
+    """
+    Complete finite prefix of the unfolding of a 1-safe net (ERV algorithm).
+
+    The unfolding runs on the complemented net (see
+    Structural.complemented_structure): place p gets a complement
+    p' = num_places + p, so the capacity check "t• \\ •t is empty" becomes
+    an ordinary input condition and the usual theory for safe nets applies.
+    Transitions with an arc weight > 1 never fire and are left out.
+
+    Conditions and events are numbered in creation order:
+
+    cond_place[c]:  place of c (index into the complemented net)
+    cond_pre[c]:    event producing c, -1 for the initial conditions
+    cond_post[c]:   events consuming c
+    ev_trans[e]:    transition k of e, transitions[k] being its original index
+    ev_pre[e]:      conditions consumed by e
+    ev_depth[e]:    Foata level of e (1 for events of M0)
+    ev_cutoff[e]:   e is a cut-off event (it gets no postset)
+
+    Every reachable marking is the marking of a configuration (causally
+    closed, conflict-free set of events) without cut-off events, and every
+    transition enabled there occurs as an event extending it. Deadlock and
+    reachability queries are SAT problems over such configurations.
+    complete is False if unfold stopped at max_events: the queries then
+    refuse to answer.
+    """
+
+    def __init__(self, pn: PetriNet):
+        P = pn.num_places
+        self.num_places = P
+        # Mạng bù: pre/post là mask trên 2P place, transitions[k] là chỉ số gốc
+        self.transitions: List[int] = []
+        self.pre: List[int] = []
+        self.post: List[int] = []
+        for t in range(pn.num_transitions):
+            if not pn.ordinary[t]:
+                continue
+            p_in = sum(1 << p for p in pn.preset[t])
+            p_out = sum(1 << p for p in pn.postset[t])
+            consume, produce = p_in & ~p_out, p_out & ~p_in
+            self.transitions.append(t)
+            self.pre.append(p_in | (produce << P))
+            self.post.append(p_out | (consume << P))
+        self.m0 = sum(1 << p if pn.M0[p] else 1 << (P + p) for p in range(P))
+        # consumers[p]: transition (chỉ số mạng bù) có p trong pre
+        self.consumers: List[List[int]] = [[] for _ in range(2 * P)]
+        for k, pre in enumerate(self.pre):
+            for p in iter_bits(pre):
+                self.consumers[p].append(k)
+
+        self.cond_place: List[int] = []
+        self.cond_pre: List[int] = []
+        self.cond_post: List[List[int]] = []
+        self.ev_trans: List[int] = []
+        self.ev_pre: List[Tuple[int, ...]] = []
+        self.ev_depth: List[int] = []
+        self.ev_cutoff: List[bool] = []
+        self.complete = False
+
+    @property
+    def num_events(self) -> int:
+        return len(self.ev_trans)
+
+    @property
+    def num_conditions(self) -> int:
+        return len(self.cond_place)
+
+    @property
+    def num_cutoffs(self) -> int:
+        return sum(self.ev_cutoff)
+
+    def __str__(self) -> str:
+        return (f"Prefix({self.num_events} events, {self.num_cutoffs} cut-offs, "
+                f"{self.num_conditions} conditions{'' if self.complete else ', incomplete'})")
+
+    def deadlocks(self, max_witnesses: int = 10, stats: Optional[Stats] = None) -> List[Tuple[List[int], List[int]]]:
+        """
+        Up to `max_witnesses` reachable dead markings as (marking, trace),
+        trace being a firing sequence from M0 (original transition indices).
+        A configuration is dead when every event has a preset condition
+        outside its cut; each dead marking found is excluded before the
+        next SAT call. Markings are sorted.
+        """
+        self._check_complete()
+        stats = stats or NULL_STATS
+        start = time.perf_counter()
+        sat = _ConfigurationSAT(self)
+        for e in range(self.num_events):
+            sat.clauses.append(tuple(-sat.y(c) for c in self.ev_pre[e]))
+
+        found = []
+        while len(found) < max_witnesses:
+            events = sat.solve()
+            if events is None:
+                break
+            marking, trace = self._replay(events)
+            found.append((marking, trace))
+            # Marking khác ở ít nhất một place: p đang có token thì p' phải có
+            sat.clauses.append(tuple(sat.y(c) for c, p in enumerate(self.cond_place)
+                                     if marking[p % self.num_places] != (p < self.num_places)))
+        if stats.enabled:
+            stats.emit("deadlock.done", mode="unfolding", dead=len(found), events=self.num_events,
+                       conditions=self.num_conditions, seconds=time.perf_counter() - start)
+        return sorted(found)
+
+    def reachable(self, target: Union[Sequence[int], Dict[int, int]]) -> Optional[List[int]]:
+        """
+        Firing sequence from M0 reaching `target` (a full marking, or a
+        dict {place: 0 or 1} constraining only some places), None if no
+        reachable marking matches.
+        """
+        self._check_complete()
+        P = self.num_places
+        if not isinstance(target, dict):
+            target = dict(enumerate(target))
+        sat = _ConfigurationSAT(self)
+        for p, v in target.items():
+            if v not in (0, 1):
+                return None
+            # p có token <-> một condition mang nhãn p nằm trong cut
+            q = p if v else P + p
+            sat.clauses.append(tuple(sat.y(c) for c, place in enumerate(self.cond_place) if place == q))
+        events = sat.solve()
+        return None if events is None else self._replay(events)[1]
+
+    def _check_complete(self):
+        if not self.complete:
+            raise ValueError("Prefix is incomplete (max_events reached), queries would be unsound")
+
+    def _replay(self, events: List[int]) -> Tuple[List[int], List[int]]:
+        """Marking (original places) and firing sequence of a configuration."""
+        order = sorted(events, key=lambda e: (self.ev_depth[e], e))
+        m = self.m0
+        for e in order:
+            k = self.ev_trans[e]
+            m = (m & ~self.pre[k]) | self.post[k]
+        marking = [m >> p & 1 for p in range(self.num_places)]
+        return marking, [self.transitions[self.ev_trans[e]] for e in order]
+
+
+class _ConfigurationSAT:
+    """
+    CNF whose models are the configurations without cut-off events.
+
+    x_e: e belongs to the configuration (cut-off events get no variable)
+    y_c: c is in its cut, i.e. produced (or initial) and not consumed
+    """
+
+    def __init__(self, prefix: Prefix):
+        self.prefix = prefix
+        self.var: Dict[int, int] = {}
+        for e in range(prefix.num_events):
+            if not prefix.ev_cutoff[e]:
+                self.var[e] = len(self.var) + 1
+        self.num_x = len(self.var)
+        self.clauses: List[Tuple[int, ...]] = []
+
+        for e, x in self.var.items():
+            # Nhân quả: e cần các event sinh ra preset của nó
+            for c in prefix.ev_pre[e]:
+                f = prefix.cond_pre[c]
+                if f >= 0:
+                    self.clauses.append((-x, self.var[f]))
+        for c in range(prefix.num_conditions):
+            users = [self.var[e] for e in prefix.cond_post[c] if e in self.var]
+            # Xung đột: tối đa một event lấy c
+            for i, a in enumerate(users):
+                for b in users[i + 1:]:
+                    self.clauses.append((-a, -b))
+            y = self.y(c)
+            f = prefix.cond_pre[c]
+            produced = () if f < 0 else (self.var[f],)
+            for x in produced:
+                self.clauses.append((-y, x))
+            for x in users:
+                self.clauses.append((-y, -x))
+            self.clauses.append(tuple(-x for x in produced) + tuple(users) + (y,))
+
+    def y(self, c: int) -> int:
+        return self.num_x + c + 1
+
+    def solve(self) -> Optional[List[int]]:
+        """Events of one model, None if unsatisfiable."""
+        model = picosat.satisfy_one(self.num_x + self.prefix.num_conditions, self.clauses)
+        if model is None:
+            return None
+        return [e for e, x in self.var.items() if model[x - 1] > 0]
+
+
+def unfold(pn: PetriNet, max_events: Optional[int] = None, stats: Optional[Stats] = None) -> Prefix:
+    """
+    Complete finite prefix of pn (Esparza, Römer, Vogler).
+
+    Possible extensions (t, co-set of conditions labelled •t) wait in a
+    priority queue ordered by the total adequate order of ERV on their
+    local configurations [e]: size, then Parikh vector, then Foata normal
+    form (both compared lexicographically). The smallest one becomes an
+    event; it is a cut-off if an event added before it, or the empty
+    configuration, has the same marking, and a cut-off gets no postset.
+    The co relation is kept as one bitmask per condition, so new
+    extensions are found by intersecting masks place by place.
+
+    For nets with much concurrency the prefix stays far smaller than the
+    reachability graph (at most one non-cut-off event per reachable
+    marking). max_events bounds its size; the prefix is then returned
+    with complete=False.
+    """
+    if any(m not in (0, 1) for m in pn.M0.tolist()):
+        raise ValueError("Initial marking is not 1-safe, cannot unfold it")
+    stats = stats or NULL_STATS
+    start = time.perf_counter()
+    prefix = Prefix(pn)
+    pre, post = prefix.pre, prefix.post
+    cond_place, cond_pre, cond_post = prefix.cond_place, prefix.cond_pre, prefix.cond_post
+    ev_trans, ev_pre, ev_depth, ev_cutoff = prefix.ev_trans, prefix.ev_pre, prefix.ev_depth, prefix.ev_cutoff
+    # co[c]: các condition đồng thời với c; usable[p]: condition nhãn p
+    co: List[int] = []
+    usable: List[int] = [0] * (2 * prefix.num_places)
+    ev_parents: List[Tuple[int, ...]] = []
+    queue: list = []
+    counter = 0
+    # marking -> khóa nhỏ nhất đã gặp (cấu hình rỗng cho M0)
+    seen: Dict[int, tuple] = {prefix.m0: ()}
+
+    def push(k: int, preset: Tuple[int, ...]):
+        nonlocal counter
+        parents = tuple({cond_pre[c] for c in preset if cond_pre[c] >= 0})
+        # [e] \ {e}: tổ tiên theo quan hệ nhân quả
+        config, stack = set(), list(parents)
+        while stack:
+            f = stack.pop()
+            if f not in config:
+                config.add(f)
+                stack.extend(ev_parents[f])
+        depth = 1 + max((ev_depth[f] for f in parents), default=0)
+        order = sorted(config, key=lambda f: ev_depth[f])
+        m = prefix.m0
+        levels: List[List[int]] = [[] for _ in range(depth)]
+        for f in order:
+            m = (m & ~pre[ev_trans[f]]) | post[ev_trans[f]]
+            levels[ev_depth[f] - 1].append(ev_trans[f])
+        m = (m & ~pre[k]) | post[k]
+        levels[depth - 1].append(k)
+        key = (len(config) + 1, _parikh_key([ev_trans[f] for f in order] + [k]),
+               tuple(_parikh_key(level) for level in levels))
+        heapq.heappush(queue, (key, counter, k, preset, parents, depth, m))
+        counter += 1
+
+    def add_conditions(places: int, event: int) -> int:
+        """New conditions for the places of a mask; returns their ids as a mask."""
+        ids = 0
+        for p in iter_bits(places):
+            c = len(cond_place)
+            cond_place.append(p)
+            cond_pre.append(event)
+            cond_post.append([])
+            co.append(0)
+            ids |= 1 << c
+        return ids
+
+    def extend(new: int):
+        """Push every possible extension using at least one condition of `new`."""
+        for c in iter_bits(new):
+            p = cond_place[c]
+            # Condition mới có id nhỏ hơn c đã được xét: tránh đếm trùng
+            older = new & ((1 << c) - 1)
+            for k in prefix.consumers[p]:
+                rest = [q for q in iter_bits(pre[k]) if q != p]
+                _co_sets(k, rest, 0, co[c] & ~older, (c,))
+
+    def _co_sets(k: int, rest: List[int], i: int, mask: int, chosen: Tuple[int, ...]):
+        if i == len(rest):
+            push(k, tuple(sorted(chosen)))
+            return
+        for d in iter_bits(mask & usable[rest[i]]):
+            _co_sets(k, rest, i + 1, mask & co[d], chosen + (d,))
+
+    initial = add_conditions(prefix.m0, -1)
+    for c in iter_bits(initial):
+        co[c] = initial & ~(1 << c)
+        usable[cond_place[c]] |= 1 << c
+    for k in range(len(pre)):
+        if not pre[k]:
+            push(k, ())
+    extend(initial)
+
+    while queue:
+        if max_events is not None and len(ev_trans) >= max_events:
+            break
+        key, _, k, preset, parents, depth, m = heapq.heappop(queue)
+        e = len(ev_trans)
+        ev_trans.append(k)
+        ev_pre.append(preset)
+        ev_depth.append(depth)
+        ev_parents.append(parents)
+        for c in preset:
+            cond_post[c].append(e)
+        cutoff = m in seen and seen[m] < key
+        ev_cutoff.append(cutoff)
+        if cutoff:
+            continue
+        seen.setdefault(m, key)
+
+        common = -1
+        for c in preset:
+            common &= co[c]
+        new = add_conditions(post[k], e)
+        for c in iter_bits(new):
+            co[c] = common | (new & ~(1 << c))
+            usable[cond_place[c]] |= 1 << c
+        for d in iter_bits(common):
+            co[d] |= new
+        extend(new)
+
+    prefix.complete = not queue
+    if stats.enabled:
+        stats.emit("unfolding.done", events=prefix.num_events, cutoffs=prefix.num_cutoffs,
+                   conditions=prefix.num_conditions, complete=prefix.complete, pending=len(queue),
+                   seconds=time.perf_counter() - start)
+    return prefix
+
+
+def _parikh_key(transitions: List[int]) -> Tuple[int, ...]:
+    """
+    Sort key of a multiset of transitions: key(A) < key(B) iff at the first
+    transition (in index order) where the counts differ A has fewer.
+    """
+    return tuple(-t for t in sorted(transitions))
@@ -0,0 +1,442 @@
+import abc
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from array import array
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
+
+
+# Số successor khác nhau mà BFS gom lại trước mỗi lần add_batch
+ADD_BATCH_KEYS = 1 << 16
+
+
+class VisitedStore(abc.ABC):
+    """
+    Set of visited markings, keyed by bit-packed ints (see BitMarking).
+
+    Backends differ only in where the keys live:
+    - SetStore:     plain Python set (fastest, ~70+ bytes per state)
+    - CompactStore: open-addressing table of fixed-width byte keys
+    - DiskStore:    in-memory buffer + sorted runs in memory-mapped files,
+                    batches are deduplicated against the runs by binary
+                    search / merge (external-memory BFS style)
+
+    `add` returns True if the key was new. `add_batch` is the preferred
+    entry point for level-synchronous search: it dedups a batch of
+    successors (at most ADD_BATCH_KEYS of them in the BFS explorers) at
+    once and returns the new keys in input order.
+
+    Only this set is bounded by a memory budget. The explorers still keep
+    the current and the next BFS level (marking, enabled set, parent id per
+    state) in RAM, so a level wider than the budget does not fit.
+    """
+
+    @abc.abstractmethod
+    def add(self, key: int) -> bool:
+        """Insert key; True if it was not in the store yet."""
+
+    def add_batch(self, keys: Iterable[int]) -> List[int]:
+        return [k for k in dict.fromkeys(keys) if self.add(k)]
+
+    @abc.abstractmethod
+    def __contains__(self, key: int) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def __iter__(self) -> Iterator[int]:
+        ...
+
+    @abc.abstractmethod
+    def memory_bytes(self) -> int:
+        """Approximate RAM held by the store (disk runs not counted)."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _set_bytes_per_key(num_bits: int) -> int:
+    # int object + set slot (16 bytes) at ~60% load
+    return sys.getsizeof(1 << max(num_bits - 1, 0)) + 27
+
+
+class SetStore(VisitedStore):
+    def __init__(self, num_bits: int):
+        self.num_bits = num_bits
+        self._keys = set()
+
+    def add(self, key: int) -> bool:
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def add_batch(self, keys: Iterable[int]) -> List[int]:
+        seen = self._keys
+        new = [k for k in dict.fromkeys(keys) if k not in seen]
+        seen.update(new)
+        return new
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    def memory_bytes(self) -> int:
+        return len(self._keys) * _set_bytes_per_key(self.num_bits)
+
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+class CompactStore(VisitedStore):
+    """
+    Open-addressing hash table (linear probing) over a flat bytearray.
+
+    Each slot holds ceil(num_bits / 8) key bytes plus one occupancy byte, so
+    a 100-place net costs ~20 bytes per state at the 0.7 load limit instead
+    of a Python int and a set entry.
+    """
+
+    _MAX_LOAD = 0.7
+
+    def __init__(self, num_bits: int, capacity: int = 1 << 10):
+        self.num_bits = num_bits
+        self.width = max(1, (num_bits + 7) // 8)
+        self._size = 0
+        self._alloc(max(16, 1 << (capacity - 1).bit_length()))
+
+    def _alloc(self, capacity: int):
+        self._cap = capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._table = bytearray(capacity * self.width)
+        self._used = bytearray(capacity)
+
+    def _slot(self, kb: bytes, key: int) -> int:
+        """Slot holding key, or the empty slot where it would go."""
+        w, table, used = self.width, self._table, self._used
+        i = ((hash(key) * _GOLDEN) & _MASK64) >> self._shift
+        mask = self._cap - 1
+        # Fibonacci hashing + linear probing
+        while used[i]:
+            if table[i * w:(i + 1) * w] == kb:
+                return i
+            i = (i + 1) & mask
+        return i
+
+    def add(self, key: int) -> bool:
+        kb = key.to_bytes(self.width, 'little')
+        i = self._slot(kb, key)
+        if self._used[i]:
+            return False
+        w = self.width
+        self._table[i * w:(i + 1) * w] = kb
+        self._used[i] = 1
+        self._size += 1
+        if self._size > self._MAX_LOAD * self._cap:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = list(self)
+        self._alloc(self._cap * 2)
+        self._size = 0
+        for key in old:
+            self.add(key)
+
+    def __contains__(self, key: int) -> bool:
+        return bool(self._used[self._slot(key.to_bytes(self.width, 'little'), key)])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        w, table, used = self.width, self._table, self._used
+        for i in range(self._cap):
+            if used[i]:
+                yield int.from_bytes(table[i * w:(i + 1) * w], 'little')
+
+    def memory_bytes(self) -> int:
+        return self._cap * (self.width + 1)
+
+
+class DiskStore(VisitedStore):
+    """
+    Visited set larger than RAM.
+
+    New keys collect in an in-memory set of at most `buffer_keys` entries;
+    when it fills up it is sorted and written as a run file (fixed-width
+    big-endian keys, so byte order == numeric order) that is memory-mapped
+    back. Runs are disjoint, lookups binary-search each run; runs of similar
+    size are merged with a chunked streaming merge so their number stays
+    logarithmic and merging never loads a whole run.
+
+    Files live in a private temp directory under `spill_dir` that is
+    removed on close() or when the store is garbage collected.
+    """
+
+    def __init__(self, num_bits: int, buffer_keys: int = 1 << 20,
+                 spill_dir: Optional[str] = None, merge_chunk: int = 1 << 16):
+        self.num_bits = num_bits
+        self.width = max(1, (num_bits + 7) // 8)
+        self.dtype = np.dtype((np.void, self.width))
+        self.buffer_keys = max(1, buffer_keys)
+        self.merge_chunk = merge_chunk
+        self._buffer = set()
+        self._runs: List[np.ndarray] = []
+        self._paths: List[str] = []
+        self._next_id = 0
+        self.directory = tempfile.mkdtemp(prefix="visited-", dir=spill_dir)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    # --- key <-> fixed-width record ---
+    def _pack(self, keys: List[int]) -> np.ndarray:
+        w = self.width
+        return np.frombuffer(b''.join(k.to_bytes(w, 'big') for k in keys), dtype=self.dtype)
+
+    @staticmethod
+    def _unpack(records: np.ndarray) -> List[int]:
+        return [int.from_bytes(r, 'big') for r in records.tolist()]
+
+    def _in_runs(self, packed: np.ndarray) -> np.ndarray:
+        """Boolean mask: which packed keys already are in some run."""
+        hit = np.zeros(len(packed), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, packed), len(run) - 1)
+            hit |= run[pos] == packed
+        return hit
+
+    def add(self, key: int) -> bool:
+        if key in self._buffer:
+            return False
+        if self._runs and self._in_runs(self._pack([key]))[0]:
+            return False
+        self._buffer.add(key)
+        if len(self._buffer) >= self.buffer_keys:
+            self._spill()
+        return True
+
+    def add_batch(self, keys: Iterable[int]) -> List[int]:
+        buf = self._buffer
+        new = [k for k in dict.fromkeys(keys) if k not in buf]
+        if self._runs and new:
+            hit = self._in_runs(self._pack(new))
+            new = [k for k, h in zip(new, hit.tolist()) if not h]
+        buf.update(new)
+        if len(buf) >= self.buffer_keys:
+            self._spill()
+        return new
+
+    def __contains__(self, key: int) -> bool:
+        if key in self._buffer:
+            return True
+        return bool(self._runs) and bool(self._in_runs(self._pack([key]))[0])
+
+    def __len__(self) -> int:
+        return len(self._buffer) + sum(len(run) for run in self._runs)
+
+    def __iter__(self) -> Iterator[int]:
+        for run in self._runs:
+            for start in range(0, len(run), self.merge_chunk):
+                yield from self._unpack(run[start:start + self.merge_chunk])
+        yield from list(self._buffer)
+
+    def memory_bytes(self) -> int:
+        return len(self._buffer) * _set_bytes_per_key(self.num_bits)
+
+    @property
+    def num_runs(self) -> int:
+        return len(self._runs)
+
+    # --- runs ---
+    def _new_run(self, n: int):
+        path = os.path.join(self.directory, f"run{self._next_id}.bin")
+        self._next_id += 1
+        return path, np.memmap(path, dtype=self.dtype, mode='w+', shape=(n,))
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        path, run = self._new_run(len(self._buffer))
+        run[:] = self._pack(sorted(self._buffer))
+        run.flush()
+        self._buffer = set()
+        self._runs.append(run)
+        self._paths.append(path)
+
+        # Gộp khi run cuối không nhỏ hơn nhiều so với run trước (kiểu LSM)
+        while len(self._runs) >= 2 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            self._merge_last_two()
+
+    def _merge_last_two(self):
+        a, b = self._runs[-2], self._runs[-1]
+        path, out = self._new_run(len(a) + len(b))
+        c = self.merge_chunk
+        i = j = k = 0
+        while i < len(a) and j < len(b):
+            # Cắt theo khóa nhỏ hơn trong hai đầu chunk để mỗi bước <= 2c khóa
+            ea, eb = a[min(i + c, len(a)) - 1], b[min(j + c, len(b)) - 1]
+            hi = ea if ea.tobytes() <= eb.tobytes() else eb
+            ia = int(np.searchsorted(a, hi, side='right'))
+            jb = int(np.searchsorted(b, hi, side='right'))
+            piece = np.sort(np.concatenate([a[i:ia], b[j:jb]]))
+            out[k:k + len(piece)] = piece
+            k += len(piece)
+            i, j = ia, jb
+        # Phần còn lại của run chưa hết, đã sắp xếp sẵn
+        for src, start in ((a, i), (b, j)):
+            for s in range(start, len(src), c):
+                piece = src[s:s + c]
+                out[k:k + len(piece)] = piece
+                k += len(piece)
+        out.flush()
+
+        for old in self._paths[-2:]:
+            os.remove(old)
+        self._runs[-2:] = [out]
+        self._paths[-2:] = [path]
+
+    def close(self):
+        self._runs = []
+        self._buffer = set()
+        self._cleanup()
+
+
+class BudgetedStore(VisitedStore):
+    """
+    Picks the backend from a RAM budget (bytes) and migrates as it grows:
+    SetStore while the set fits, then CompactStore, then DiskStore with a
+    buffer sized to the budget.
+    """
+
+    def __init__(self, num_bits: int, memory_budget: int, spill_dir: Optional[str] = None):
+        self.num_bits = num_bits
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.backend: VisitedStore = SetStore(num_bits)
+        self._check_every = 4096
+        self._since_check = 0
+
+    def _maybe_migrate(self, added: int):
+        self._since_check += added
+        if self._since_check < self._check_every:
+            return
+        self._since_check = 0
+        if self.backend.memory_bytes() <= self.memory_budget:
+            return
+
+        old = self.backend
+        if isinstance(old, SetStore):
+            # Bảng compact có thể phải gấp đôi khi rehash, dự phòng một nửa budget
+            cap = int(len(old) / CompactStore._MAX_LOAD) + 1
+            compact = CompactStore(self.num_bits, cap)
+            if compact.memory_bytes() * 2 <= self.memory_budget:
+                new = compact
+            else:
+                new = self._disk()
+        elif isinstance(old, CompactStore):
+            new = self._disk()
+        else:
+            return
+
+        new.add_batch(old)
+        old.close()
+        self.backend = new
+
+    def _disk(self) -> DiskStore:
+        buffer_keys = max(1, self.memory_budget // _set_bytes_per_key(self.num_bits))
+        return DiskStore(self.num_bits, buffer_keys, self.spill_dir)
+
+    def add(self, key: int) -> bool:
+        new = self.backend.add(key)
+        if new:
+            self._maybe_migrate(1)
+        return new
+
+    def add_batch(self, keys: Iterable[int]) -> List[int]:
+        new = self.backend.add_batch(keys)
+        self._maybe_migrate(len(new))
+        return new
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.backend
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.backend)
+
+    def memory_bytes(self) -> int:
+        return self.backend.memory_bytes()
+
+    def close(self):
+        self.backend.close()
+
+
+def make_store(num_bits: int, memory_budget: Optional[int] = None,
+               spill_dir: Optional[str] = None) -> VisitedStore:
+    """
+    Visited store for markings of num_bits places.
+
+    memory_budget=None keeps everything in a plain set (no overhead);
+    with a budget in bytes the backend is chosen and upgraded automatically
+    (see BudgetedStore) so exploration can go past the RAM limit.
+    """
+    if memory_budget is None:
+        return SetStore(num_bits)
+    return BudgetedStore(num_bits, memory_budget, spill_dir)
+
+
+class ParentLog:
+    """
+    Search tree of an explorer, kept next to its VisitedStore.
+
+    States get ids in discovery order (M0 = 0); two int32 arrays hold, per
+    id, the parent id (-1 at the root) and the transition fired from it.
+    That is 8 bytes per state and no markings: the explorer carries each
+    state's id in its frontier. Filled by a BFS, trace(i) is a shortest
+    firing sequence from M0.
+    """
+
+    def __init__(self):
+        self.parent = array('i')
+        self.label = array('i')
+
+    def add(self, parent: int, t: int) -> int:
+        """Record a new state reached from `parent` by t; returns its id."""
+        self.parent.append(parent)
+        self.label.append(t)
+        return len(self.parent) - 1
+
+    def trace(self, i: int) -> List[int]:
+        """Transition indices from M0 to state i."""
+        seq = []
+        while self.parent[i] >= 0:
+            seq.append(self.label[i])
+            i = self.parent[i]
+        seq.reverse()
+        return seq
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def memory_bytes(self) -> int:
+        return (len(self.parent) + len(self.label)) * self.parent.itemsize
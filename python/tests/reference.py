@@ -0,0 +1,111 @@
+"""
+Small nets and a brute-force reference for the tests.
+
+The reference fires transitions straight from the I/O matrices under
+1-safe semantics (•t marked, t• \\ •t empty, arc weights > 1 never fire),
+independently of the engines under test.
+"""
+import itertools
+import os
+import random
+from collections import deque
+
+import numpy as np
+
+from src.PetriNet import PetriNet
+
+TEST1_PNML = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test1.pnml")
+
+
+def make_net(num_places, inputs, outputs, m0, prefix="p"):
+    """Net from per-transition lists of input / output places (repeats add weight)."""
+    I = np.zeros((len(inputs), num_places), dtype=int)
+    O = np.zeros((len(inputs), num_places), dtype=int)
+    for t, (pre, post) in enumerate(zip(inputs, outputs)):
+        for p in pre:
+            I[t, p] += 1
+        for p in post:
+            O[t, p] += 1
+    place_ids = [f"{prefix}{p}" for p in range(num_places)]
+    trans_ids = [f"t{t}" for t in range(len(inputs))]
+    return PetriNet(place_ids, trans_ids, [None] * num_places, [None] * len(trans_ids), I, O,
+                    np.array(m0, dtype=int))
+
+
+def random_net(seed, prefix="p", weighted=True):
+    """2..8 places, 1..9 transitions; repeated places give a few weight-2 arcs."""
+    rng = random.Random(seed)
+    num_places = rng.randint(2, 8)
+    density = rng.choice([2, 3])
+    inputs, outputs = [], []
+    for _ in range(rng.randint(1, 9)):
+        inputs.append([rng.randrange(num_places) for _ in range(rng.randint(0, density))])
+        outputs.append([rng.randrange(num_places) for _ in range(rng.randint(0, density))])
+    if not weighted:
+        inputs = [sorted(set(pre)) for pre in inputs]
+        outputs = [sorted(set(post)) for post in outputs]
+    return make_net(num_places, inputs, outputs, [rng.randint(0, 1) for _ in range(num_places)], prefix)
+
+
+def philosophers(n, prefix="ph"):
+    """n philosophers taking the left fork then the right one (one deadlock)."""
+    inputs, outputs = [], []
+    for i in range(n):
+        think, has_left, eat, fork = 4 * i, 4 * i + 1, 4 * i + 2, 4 * i + 3
+        right = 4 * ((i + 1) % n) + 3
+        inputs += [[think, fork], [has_left, right], [eat]]
+        outputs += [[has_left], [eat], [think, fork, right]]
+    m0 = [1 if p % 4 in (0, 3) else 0 for p in range(4 * n)]
+    return make_net(4 * n, inputs, outputs, m0, prefix)
+
+
+def successors(pn, M):
+    """(t, M') for every transition enabled in M."""
+    num_places = len(M)
+    for t in range(pn.I.shape[0]):
+        pre, post = pn.I[t], pn.O[t]
+        if pre.max(initial=0) > 1 or post.max(initial=0) > 1:
+            continue
+        if any(pre[p] and not M[p] for p in range(num_places)):
+            continue
+        if any(post[p] and not pre[p] and M[p] for p in range(num_places)):
+            continue
+        yield t, tuple(int(m) - int(a) + int(b) for m, a, b in zip(M, pre, post))
+
+
+def reference(pn):
+    """Brute-force BFS: {marking tuple: distance from M0}."""
+    m0 = tuple(int(m) for m in pn.M0)
+    dist = {m0: 0}
+    queue = deque([m0])
+    while queue:
+        M = queue.popleft()
+        for _, N in successors(pn, M):
+            if N not in dist:
+                dist[N] = dist[M] + 1
+                queue.append(N)
+    return dist
+
+
+def dead_markings(pn, dist):
+    """Sorted reachable markings (as lists) where nothing is enabled."""
+    return sorted(list(M) for M in dist if next(successors(pn, M), None) is None)
+
+
+def replay(pn, trace):
+    """Fire `trace` from M0 (asserting each step is enabled), return the marking."""
+    M = tuple(int(m) for m in pn.M0)
+    for t in trace:
+        fired = dict(successors(pn, M))
+        assert t in fired, (trace, t)
+        M = fired[t]
+    return M
+
+
+def bdd_markings(bdd, X):
+    """Markings of a BDD over the place variables X, by evaluating every assignment."""
+    found = set()
+    for M in itertools.product((0, 1), repeat=len(X)):
+        if bdd.restrict({x: v for x, v in zip(X, M)}).is_one():
+            found.add(M)
+    return found
@@ -0,0 +1,88 @@
+import csv
+import tracemalloc
+
+import pytest
+
+from benchmarks.NetGenerators import FAMILIES
+from benchmarks.Runner import FIELDS, _measure, compare, load_results, run_case, write_csv, write_json
+from src.BFS import bfs_reachable_traversal
+
+from reference import reference
+
+
+@pytest.mark.parametrize("family", sorted(FAMILIES))
+@pytest.mark.parametrize("size", [2, 3])
+def test_generators_match_reference(family, size):
+    pn = FAMILIES[family](size)
+    assert len(set(pn.place_ids)) == pn.num_places and len(set(pn.trans_ids)) == pn.num_transitions
+    assert set(pn.M0.tolist()) <= {0, 1}
+    assert bfs_reachable_traversal(pn) == set(reference(pn))
+
+
+def test_run_case_rows():
+    rows = run_case("philosophers", 3)
+    by_analysis = {row["analysis"]: row for row in rows}
+    assert list(by_analysis) == ["bfs", "dfs", "bdd", "deadlock", "optimization"]
+    states = len(reference(FAMILIES["philosophers"](3)))
+    assert by_analysis["bfs"]["states"] == by_analysis["dfs"]["states"] == by_analysis["bdd"]["states"] == states
+    assert by_analysis["deadlock"]["result"] == 1
+    assert by_analysis["bdd"]["bdd_nodes"] > 0
+    for row in rows:
+        assert set(FIELDS) <= set(row) and row["seconds"] >= 0 and row["peak_mb"] >= 0
+    with pytest.raises(ValueError):
+        run_case("philosophers", 2, analyses=["bogus"])
+
+
+def test_measure_times_without_tracemalloc():
+    tracing = []
+
+    def fn():
+        tracing.append(tracemalloc.is_tracing())
+        data = [0] * 100000
+        return tracing[-1], len(data)
+
+    result, seconds, peak_mb, _ = _measure(fn)
+    assert tracing == [True, False] and result == (False, 100000)
+    assert seconds >= 0 and peak_mb > 0.5
+
+
+def row(seconds=1.0, peak_mb=10.0, states=100, result=None, bdd_nodes=None, family="ring", size=4, analysis="bfs"):
+    return {"family": family, "size": size, "analysis": analysis, "seconds": seconds, "peak_mb": peak_mb,
+            "states": states, "result": result, "bdd_nodes": bdd_nodes}
+
+
+def test_compare_flags_regressions():
+    base = [row(), row(analysis="bdd", bdd_nodes=50), row(analysis="optimization", states=None, result=7)]
+    assert compare([row(seconds=1.2), row(analysis="bdd", bdd_nodes=50)], base) == []
+    problems = compare([
+        row(seconds=1.5, peak_mb=20.0, states=99),
+        row(analysis="bdd", bdd_nodes=60),
+        row(analysis="optimization", states=None, result=6),
+    ], base)
+    assert len(problems) == 5
+    assert any("1.0000s -> 1.5000s" in p for p in problems)
+    assert any("peak 10.00 MB -> 20.00 MB" in p for p in problems)
+    assert any("states 100 -> 99 (MISMATCH)" in p for p in problems)
+    assert any("result 7 -> 6 (MISMATCH)" in p for p in problems)
+    assert any("bdd_nodes 50 -> 60" in p for p in problems)
+
+
+def test_compare_ignores_noise_and_new_cases():
+    base = [row(seconds=0.001, peak_mb=0.01)]
+    # Dưới min_seconds và chênh lệch bộ nhớ < 0.1 MB: nhiễu
+    assert compare([row(seconds=0.004, peak_mb=0.05)], base) == []
+    assert compare([row(seconds=0.004)], base, min_seconds=0.001) != []
+    assert compare([row(size=8, seconds=100.0)], base) == []
+
+
+def test_results_roundtrip(tmp_path):
+    rows = run_case("token_ring", 2, analyses=["bfs", "bdd"])
+    path = str(tmp_path / "out.json")
+    write_json(rows, path)
+    assert load_results(path) == rows
+    assert compare(rows, load_results(path), tolerance=10.0) == []
+    csv_path = str(tmp_path / "out.csv")
+    write_csv(rows, csv_path)
+    with open(csv_path, newline="") as f:
+        read = list(csv.DictReader(f))
+    assert [r["analysis"] for r in read] == ["bfs", "bdd"] and list(read[0]) == FIELDS
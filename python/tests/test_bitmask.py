@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.BFS import bfs_reachable_traversal
+from src.BitMarking import CompiledNet, is_bit_packable
+from src.DFS import dfs_reachable_traversal
+from src.PetriNet import PetriNet
+
+from reference import TEST1_PNML, make_net, philosophers, random_net, reference, successors
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_engines_match_reference(seed):
+    pn = random_net(seed)
+    expected = set(reference(pn))
+    for engine in ("bitmask", "numpy"):
+        assert bfs_reachable_traversal(pn, engine=engine) == expected
+        assert dfs_reachable_traversal(pn, engine=engine) == expected
+
+
+@pytest.mark.parametrize("num_transitions", [0, 2])
+def test_net_without_places(num_transitions):
+    # Chỉ có marking rỗng; transition không cung luôn bắn về chính nó
+    pn = make_net(0, [[]] * num_transitions, [[]] * num_transitions, [])
+    for engine in ("bitmask", "numpy", "frontier"):
+        assert bfs_reachable_traversal(pn, engine=engine) == {()}
+    for engine in ("bitmask", "numpy"):
+        assert dfs_reachable_traversal(pn, engine=engine) == {()}
+
+
+def test_philosophers():
+    pn = philosophers(4)
+    expected = set(reference(pn))
+    assert len(expected) == 34
+    assert bfs_reachable_traversal(pn) == dfs_reachable_traversal(pn) == expected
+
+
+def test_pnml_file():
+    pn = PetriNet.read_pnml(TEST1_PNML)
+    assert bfs_reachable_traversal(pn) == bfs_reachable_traversal(pn, engine="numpy") == set(reference(pn))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_net_firing(seed):
+    pn = random_net(seed)
+    net = CompiledNet(pn)
+    for M in reference(pn):
+        m = net.encode(M)
+        assert net.decode(m) == M
+        expected = dict(successors(pn, M))
+        assert {t: net.decode(n) for t, n in net.successors(m)} == expected
+        for t in net.firable:
+            assert net.is_enabled(m, t) == (t in expected)
+
+
+def test_not_bit_packable_falls_back():
+    # M0 với 2 token ở p0: không đóng gói được, dùng engine numpy
+    pn = make_net(2, [[0]], [[1]], [2, 0])
+    assert not is_bit_packable(pn)
+    assert bfs_reachable_traversal(pn) == bfs_reachable_traversal(pn, engine="numpy")
+    assert dfs_reachable_traversal(pn) == dfs_reachable_traversal(pn, engine="numpy")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        bfs_reachable_traversal(random_net(0), engine="gpu")
+    with pytest.raises(ValueError):
+        dfs_reachable_traversal(random_net(0), engine="gpu")
@@ -0,0 +1,53 @@
+import pytest
+
+from src.BDD import bdd_reachable_counting
+from src.Deadlock import deadlock_reachable_marking_detector, explicit_deadlock_detector, symbolic_deadlock_detector
+from src.PetriNet import PetriNet
+
+from reference import TEST1_PNML, bdd_markings, dead_markings, make_net, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_detectors_match_reference(seed):
+    # Reached BDD chưa mô hình hóa trọng số cung > 1: chỉ dùng mạng thường
+    pn = random_net(seed, weighted=False)
+    dead = dead_markings(pn, reference(pn))
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+
+    dead_bdd, count, witnesses = symbolic_deadlock_detector(pn, bdd, max_witnesses=1000, place_vars=X)
+    assert (count, witnesses) == (len(dead), dead)
+    assert sorted(map(list, bdd_markings(dead_bdd, X))) == dead
+    assert explicit_deadlock_detector(pn) == dead
+    assert deadlock_reachable_marking_detector(pn, bdd, max_witnesses=1000, place_vars=X) == (dead or None)
+    assert deadlock_reachable_marking_detector(pn, None, max_witnesses=1000) == (dead or None)
+
+
+def test_max_witnesses():
+    # p0 hoặc p1 → p2; mỗi nhánh bỏ lại một marking chết khác nhau
+    pn = make_net(4, [[0], [1]], [[2], [3]], [1, 1, 0, 0], prefix="mw")
+    dead = dead_markings(pn, reference(pn))
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+    _, count, witnesses = symbolic_deadlock_detector(pn, bdd, max_witnesses=1, place_vars=X)
+    assert count == len(dead) and witnesses == dead[:1]
+    assert deadlock_reachable_marking_detector(pn, None, max_witnesses=1) == dead[:1]
+
+
+def test_philosophers_single_deadlock():
+    pn = philosophers(3)
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+    _, count, witnesses = symbolic_deadlock_detector(pn, bdd, place_vars=X)
+    # Tất cả đều cầm nĩa trái
+    assert count == 1
+    assert witnesses == [[1 if p % 4 == 1 else 0 for p in range(12)]]
+
+
+def test_pnml_deadlock_not_on_first_place():
+    pn = PetriNet.read_pnml(TEST1_PNML)
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+    found = deadlock_reachable_marking_detector(pn, bdd, max_witnesses=100, place_vars=X)
+    assert found == (dead_markings(pn, reference(pn)) or None)
+    assert [0, 0, 0, 0, 1] in found
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.BFS import _bfs_frontier, _keys_to_rows, _row_keys, bfs_reachable_traversal
+
+from reference import make_net, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_frontier_matches_reference(seed):
+    pn = random_net(seed)
+    assert bfs_reachable_traversal(pn, engine="frontier") == set(reference(pn))
+
+
+def test_frontier_small_chunks():
+    # max_cells nhỏ: mỗi khối chỉ chứa 1 marking của frontier
+    pn = philosophers(4)
+    assert _bfs_frontier(pn, max_cells=1) == set(reference(pn))
+
+
+def test_row_keys_roundtrip():
+    rows = np.array([[1, 0, 1, 1, 0, 0, 0, 0, 1], [0, 0, 0, 0, 0, 0, 0, 0, 0]], dtype=np.uint8)
+    assert np.array_equal(_keys_to_rows(_row_keys(rows), 9), rows)
+
+
+def test_frontier_not_bit_packable_falls_back():
+    pn = make_net(2, [[0]], [[1]], [2, 0])
+    assert bfs_reachable_traversal(pn, engine="frontier") == bfs_reachable_traversal(pn, engine="numpy")
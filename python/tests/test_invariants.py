@@ -0,0 +1,96 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.BDD import bdd_reachable_counting
+from src.BFS import bfs_reachable_traversal
+from src.BitMarking import CompiledNet
+from src.DFS import dfs_reachable_traversal
+from src.Invariants import PlaceCompression, make_packed_store, p_semiflows
+
+from reference import bdd_markings, philosophers, random_net, reference
+
+
+def firable_incidence(pn):
+    """C = O - I over the transitions that can fire (arc weights <= 1)."""
+    ordinary = [t for t in range(pn.num_transitions) if pn.I[t].max(initial=0) <= 1 and pn.O[t].max(initial=0) <= 1]
+    return (pn.O - pn.I)[ordinary]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_semiflows(seed):
+    pn = random_net(seed)
+    C = firable_incidence(pn)
+    dist = reference(pn)
+    flows = p_semiflows(pn)
+    supports = [frozenset(p for p, v in enumerate(y) if v) for y in flows]
+    for y, s in zip(flows, supports):
+        y = np.array(y)
+        assert y.min() >= 0 and s and not (C @ y).any()
+        assert {int(y @ M) for M in dist} == {int(y @ pn.M0)}
+        assert not any(other < s for other in supports)
+
+    # Mọi semiflow (hệ số 0..2) đều chứa support của một semiflow tối tiểu
+    for y in itertools.product(range(3), repeat=pn.num_places):
+        y = np.array(y)
+        if y.any() and not (C @ y).any():
+            support = frozenset(np.flatnonzero(y).tolist())
+            assert any(s <= support for s in supports)
+
+
+def test_philosophers_semiflows():
+    pn = philosophers(3)
+    flows = p_semiflows(pn)
+    # Mỗi triết gia: think + has_left + eat = 1
+    for i in range(3):
+        assert [1 if p in (4 * i, 4 * i + 1, 4 * i + 2) else 0 for p in range(12)] in flows
+    with pytest.raises(ValueError):
+        p_semiflows(pn, max_rows=1)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_place_compression(seed):
+    pn = random_net(seed)
+    comp = PlaceCompression(pn)
+    C = firable_incidence(pn)
+    assert len(comp.basis) == comp.num_basis == (np.linalg.matrix_rank(C) if len(C) else 0)
+    assert sorted(comp.basis + comp.implied) == list(range(pn.num_places))
+
+    net = CompiledNet(pn)
+    dist = reference(pn)
+    for M in dist:
+        assert comp.satisfies(M)
+        assert comp.expand(comp.compress(M)) == M
+        m = net.encode(M)
+        assert comp.unpack(comp.pack(m)) == m and comp.pack(m) < 1 << comp.num_basis
+    assert comp.violations(dist) == []
+
+    # Đổi một implied place: vi phạm bất biến
+    if comp.implied:
+        q = comp.implied[0]
+        M = list(next(iter(dist)))
+        M[q] = 1 - M[q]
+        assert comp.violations([M]) == [tuple(M)]
+
+
+def test_packed_store(tmp_path):
+    pn = philosophers(4)
+    net = CompiledNet(pn)
+    markings = [net.encode(M) for M in reference(pn)]
+    with make_packed_store(pn, memory_budget=1, spill_dir=str(tmp_path)) as store:
+        assert store.add_batch(markings) == markings
+        assert store.add_batch(markings) == []
+        assert sorted(store) == sorted(markings) and len(store) == len(markings)
+        assert all(m in store for m in markings)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compressed_searches(seed):
+    pn = random_net(seed)
+    expected = set(reference(pn))
+    assert bfs_reachable_traversal(pn, compress=True) == expected
+    assert dfs_reachable_traversal(pn, compress=True) == expected
+    X = []
+    bdd, count = bdd_reachable_counting(pn, compress=True, place_vars=X)
+    assert count == len(expected) and bdd_markings(bdd, X) == expected
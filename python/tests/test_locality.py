@@ -0,0 +1,51 @@
+import pytest
+
+from src.BitMarking import CompiledNet, iter_bits
+
+from reference import philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_index_matches_matrices(seed):
+    pn = random_net(seed)
+    num_trans, num_places = pn.I.shape
+    for t in range(num_trans):
+        assert set(pn.preset[t]) == {p for p in range(num_places) if pn.I[t, p]}
+        assert set(pn.postset[t]) == {p for p in range(num_places) if pn.O[t, p]}
+    for p in range(num_places):
+        assert set(pn.consumers[p]) == {t for t in range(num_trans) if pn.I[t, p]}
+        assert set(pn.producers[p]) == {t for t in range(num_trans) if pn.O[t, p]}
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_update_enabled_matches_full_scan(seed):
+    pn = random_net(seed)
+    net = CompiledNet(pn)
+    for M in reference(pn):
+        m = net.encode(M)
+        E = net.enabled_set(m)
+        assert set(iter_bits(E)) == {t for t, _ in net.successors(m)}
+        for t in iter_bits(E):
+            new_m = net.fire(m, t)
+            new_E = net.enabled_set(new_m)
+            assert net.update_enabled(new_m, E, t) == new_E
+            # Ngoài affected[t], enabling không đổi
+            assert (E ^ new_E) & ~net.affected_mask[t] == 0
+
+
+def test_philosophers_locality():
+    pn = philosophers(5)
+    # Mỗi transition chỉ ảnh hưởng các transition lân cận, không phải cả mạng
+    assert max(len(a) for a in pn.affected) < pn.I.shape[0]
+    net = CompiledNet(pn)
+    for M in reference(pn):
+        m = net.encode(M)
+        E = net.enabled_set(m)
+        for t in iter_bits(E):
+            assert net.update_enabled(net.fire(m, t), E, t) == net.enabled_set(net.fire(m, t))
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 100)) == [100]
@@ -0,0 +1,53 @@
+import collections
+import itertools
+import random
+
+import pytest
+from pyeda.inter import bddvar, expr, expr2bdd
+
+from src.BDD import bdd_model_count, bdd_reachable_counting
+
+from reference import random_net, reference
+
+
+def brute_count(f, variables):
+    return sum(f.restrict(dict(zip(variables, bits))).is_one()
+               for bits in itertools.product((0, 1), repeat=len(variables)))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_functions(seed):
+    rng = random.Random(seed)
+    X = [bddvar(f"mc{i}") for i in range(6)]
+    f = expr2bdd(expr(0))
+    for _ in range(rng.randint(1, 5)):
+        cube = expr2bdd(expr(1))
+        for x in rng.sample(X, rng.randint(1, 4)):
+            cube &= x if rng.random() < 0.5 else ~x
+        f |= cube
+    assert bdd_model_count(f, X) == brute_count(f, X)
+    # Biến không xuất hiện trong f nhân đôi số nghiệm
+    assert bdd_model_count(f, X + [bddvar("mc_extra")]) == 2 * brute_count(f, X)
+
+
+def test_constants_and_big_ints():
+    X = [bddvar(f"mcb{i}") for i in range(70)]
+    assert bdd_model_count(expr2bdd(expr(1)), X) == 2 ** 70
+    assert bdd_model_count(expr2bdd(expr(0)), X) == 0
+    assert bdd_model_count(X[0] & ~X[69], X) == 2 ** 68
+
+
+def test_support_outside_variables():
+    with pytest.raises(ValueError):
+        bdd_model_count(bddvar("mc_a") & bddvar("mc_b"), [bddvar("mc_a")])
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_reachable_and_frontier_counts(seed):
+    pn = random_net(seed, weighted=False)
+    dist = reference(pn)
+    frontier_counts = []
+    _, count = bdd_reachable_counting(pn, frontier_counts=frontier_counts)
+    assert count == len(dist)
+    levels = collections.Counter(dist.values())
+    assert frontier_counts == [levels[d] for d in range(len(levels))]
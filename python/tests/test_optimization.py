@@ -0,0 +1,48 @@
+import random
+
+import numpy as np
+import pytest
+from pyeda.inter import bddvar, expr, expr2bdd
+
+from src.BDD import bdd_reachable_counting
+from src.Optimization import max_reachable_marking, max_reachable_markings
+
+from reference import random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_reference(seed):
+    pn = random_net(seed, weighted=False)
+    rng = random.Random(seed)
+    c = np.array([rng.randint(-3, 5) for _ in range(len(pn.place_ids))])
+    values = {M: int(np.dot(c, M)) for M in reference(pn)}
+    best = max(values.values())
+    optimal = sorted(list(M) for M, v in values.items() if v == best)
+
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+    marking, value = max_reachable_marking(X, bdd, c)
+    assert value == best and marking in optimal
+    assert max_reachable_markings(X, bdd, c, k=1000) == (optimal, best, len(optimal))
+    assert max_reachable_markings(X, bdd, c, k=1)[0] == optimal[:1]
+
+
+def test_free_places_and_ties():
+    # Chỉ ràng buộc a: b, c tự do; hệ số 0 của c nhân đôi số nghiệm tối ưu
+    ids = ["opt_a", "opt_b", "opt_c"]
+    a, b, _ = (bddvar(pid) for pid in ids)
+    markings, value, ties = max_reachable_markings(ids, ~a, np.array([7, 2, 0]), k=10)
+    assert (markings, value, ties) == ([[0, 1, 0], [0, 1, 1]], 2, 2)
+    markings, value, ties = max_reachable_markings(ids, a | b, np.array([-1, -1, -4]), k=10)
+    assert (markings, value, ties) == ([[0, 1, 0], [1, 0, 0]], -1, 2)
+
+
+def test_empty_bdd():
+    ids = ["opt_a", "opt_b"]
+    assert max_reachable_marking(ids, expr2bdd(expr(0)), np.array([1, 1])) == (None, None)
+    assert max_reachable_markings(ids, expr2bdd(expr(0)), np.array([1, 1])) == ([], None, 0)
+
+
+def test_bdd_outside_places():
+    with pytest.raises(ValueError):
+        max_reachable_marking(["opt_a"], bddvar("opt_a") & bddvar("opt_z"), np.array([1]))
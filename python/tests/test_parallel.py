@@ -0,0 +1,40 @@
+import multiprocessing as mp
+
+import pytest
+
+from src.BFS import bfs_reachable_traversal, parallel_reachable_traversal
+
+import src.BFS
+
+from reference import make_net, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_parallel_matches_reference(seed):
+    pn = random_net(seed)
+    assert parallel_reachable_traversal(pn, workers=2) == set(reference(pn))
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 512])
+def test_parallel_batch_sizes(batch_size):
+    pn = philosophers(5)
+    assert parallel_reachable_traversal(pn, workers=3, batch_size=batch_size) == set(reference(pn))
+
+
+def test_single_worker_and_fallback():
+    pn = philosophers(3)
+    assert parallel_reachable_traversal(pn, workers=1) == bfs_reachable_traversal(pn)
+    # Không đóng gói bit được: chạy tuần tự
+    pn = make_net(2, [[0]], [[1]], [2, 0])
+    assert parallel_reachable_traversal(pn, workers=2) == bfs_reachable_traversal(pn, engine="numpy")
+
+
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="needs fork to patch the worker")
+def test_worker_failure_raises(monkeypatch):
+    def crash(wid, *args):
+        raise SystemExit(3)
+
+    monkeypatch.setattr(src.BFS, "_parallel_worker", crash)
+    with pytest.raises(RuntimeError):
+        parallel_reachable_traversal(philosophers(3), workers=2)
+    assert not mp.active_children()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from src.BFS import bfs_reachable_traversal
+from src.PetriNet import COMPILED_FORMAT, PetriNet
+
+from reference import TEST1_PNML
+
+PNML = """<?xml version="1.0" encoding="UTF-8"?>
+<pnml xmlns="http://www.pnml.org/version-2009/grammar/pnml">
+  <net id="n" type="http://www.pnml.org/version-2009/grammar/ptnet">
+    <page id="page">
+      <place id="a"><name><text>Alpha</text></name>
+        <initialMarking><text>1</text></initialMarking></place>
+      <place id="b"><name><text>Beta</text></name></place>
+      <transition id="t1"><name><text>go</text></name></transition>
+      <place id="c"><initialMarking><text>x</text></initialMarking></place>
+      <transition id="t2"/>
+      <arc id="e1" source="a" target="t1"/>
+      <arc id="e2" source="t1" target="b"/>
+      <arc id="e3" source="b" target="t2"/>
+      <arc id="e4" source="b" target="t2"/>
+      <arc id="e5" source="t2" target="c"/>
+      <arc id="e6" source="a" target="nowhere"/>
+    </page>
+  </net>
+</pnml>
+"""
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    return str(path)
+
+
+def assert_same_net(a, b):
+    assert (a.place_ids, a.trans_ids, a.place_names, a.trans_names) == \
+        (b.place_ids, b.trans_ids, b.place_names, b.trans_names)
+    assert np.array_equal(a.I, b.I) and np.array_equal(a.O, b.O) and np.array_equal(a.M0, b.M0)
+
+
+def test_streaming_parse(tmp_path):
+    pn = PetriNet.read_pnml(write(tmp_path / "net.pnml", PNML))
+    assert pn.place_ids == ["a", "b", "c"] and pn.trans_ids == ["t1", "t2"]
+    assert pn.place_names == ["Alpha", "Beta", None] and pn.trans_names == ["go", None]
+    # Cung lặp lại cộng dồn trọng số; cung tới id không tồn tại bị bỏ qua
+    assert pn.I.tolist() == [[1, 0, 0], [0, 2, 0]]
+    assert pn.O.tolist() == [[0, 1, 0], [0, 0, 1]]
+    assert pn.M0.tolist() == [1, 0, 0]
+
+
+def test_cache_roundtrip(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    first = PetriNet.read_pnml(TEST1_PNML, cache_dir=str(cache))
+    with open(TEST1_PNML, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    assert os.listdir(cache) == [f"{digest}-v{COMPILED_FORMAT}.npz"]
+
+    # Lần sau không đọc XML nữa
+    def no_parse(filename):
+        raise AssertionError("cache miss")
+
+    monkeypatch.setattr(PetriNet, "_parse_pnml", classmethod(lambda cls, filename, *args: no_parse(filename)))
+    second = PetriNet.read_pnml(TEST1_PNML, cache_dir=str(cache))
+    assert_same_net(first, second)
+    assert bfs_reachable_traversal(second) == bfs_reachable_traversal(first)
+
+
+def test_cache_key_follows_content(tmp_path):
+    cache = str(tmp_path / "cache")
+    path = write(tmp_path / "net.pnml", PNML)
+    a = PetriNet.read_pnml(path, cache_dir=cache)
+    write(tmp_path / "net.pnml", PNML.replace("<text>1</text>", "<text>0</text>"))
+    b = PetriNet.read_pnml(path, cache_dir=cache)
+    assert len(os.listdir(cache)) == 2
+    assert a.M0.tolist() == [1, 0, 0] and b.M0.tolist() == [0, 0, 0]
+
+
+def test_save_load_compiled(tmp_path):
+    pn = PetriNet.read_pnml(TEST1_PNML)
+    path = str(tmp_path / "net.npz")
+    pn.save_compiled(path)
+    assert os.listdir(tmp_path) == ["net.npz"]
+    loaded = PetriNet.load_compiled(path)
+    assert_same_net(pn, loaded)
+    assert loaded.affected == pn.affected
+
+
+def test_compiled_format_mismatch(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    path = write(tmp_path / "net.pnml", PNML)
+    with open(path, "rb") as f:
+        cache_path = str(cache / f"{hashlib.sha256(f.read()).hexdigest()}-v{COMPILED_FORMAT}.npz")
+
+    # Mục cache ghi bởi định dạng khác: load_compiled từ chối, read_pnml parse lại và ghi đè
+    monkeypatch.setattr("src.PetriNet.COMPILED_FORMAT", COMPILED_FORMAT + 1)
+    PetriNet.read_pnml(path).save_compiled(cache_path)
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        PetriNet.load_compiled(cache_path)
+    assert PetriNet.read_pnml(path, cache_dir=str(cache)).M0.tolist() == [1, 0, 0]
+    assert PetriNet.load_compiled(cache_path).M0.tolist() == [1, 0, 0]
+
+
+def test_missing_file():
+    with pytest.raises(OSError):
+        PetriNet.read_pnml("does-not-exist.pnml")
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.Query import reachability_query
+
+from reference import make_net, philosophers, random_net, reference, replay
+
+try:
+    import scipy  # noqa: F401
+    HEURISTICS = ["none", "hamming", "state-equation"]
+except ImportError:
+    HEURISTICS = ["none", "hamming"]
+
+
+def _targets(pn, dist, seed):
+    rng = random.Random(seed)
+    full = list(dist)[:6] + [tuple(rng.randint(0, 1) for _ in range(pn.num_places)) for _ in range(3)]
+    return [list(M) for M in full] + [{0: 1}, {pn.place_ids[-1]: 0, 0: 0}]
+
+
+def _matches(M, target):
+    items = target.items() if isinstance(target, dict) else enumerate(target)
+    return all(M[p if isinstance(p, int) else int(p[1:])] == v for p, v in items)
+
+
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+@pytest.mark.parametrize("seed", range(30))
+def test_shortest_trace(seed, heuristic):
+    pn = random_net(seed)
+    dist = reference(pn)
+    for target in _targets(pn, dist, seed):
+        goal = [d for M, d in dist.items() if _matches(M, target)]
+        res = reachability_query(pn, target, heuristic=heuristic)
+        assert res.reachable == bool(goal)
+        if goal:
+            assert res.shortest and len(res.trace) == min(goal)
+            assert list(replay(pn, res.trace)) == res.marking and _matches(res.marking, target)
+        else:
+            assert res.trace is None and res.marking is None
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_weighted_and_predicate(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    for M in list(dist)[:5]:
+        res = reachability_query(pn, list(M), weight=3.0)
+        assert res.reachable and not res.shortest and len(res.trace) <= 3 * dist[M]
+        assert replay(pn, res.trace) == M
+    res = reachability_query(pn, lambda M: sum(M) == 0)
+    assert res.reachable == any(sum(M) == 0 for M in dist)
+
+
+def test_philosophers_deadlock_query():
+    pn = philosophers(4)
+    dead = [1 if p % 4 == 1 else 0 for p in range(16)]
+    res = reachability_query(pn, dead)
+    assert res.reachable and len(res.trace) == 4 and res.marking == dead
+    assert reachability_query(pn, {pid: 1 for pid in pn.place_ids}).reachable is False
+    assert reachability_query(pn, {0: 2}).reachable is False
+
+
+def test_max_states_and_errors():
+    pn = philosophers(4)
+    res = reachability_query(pn, {0: 0, 4: 0, 8: 0, 12: 0, 2: 1}, heuristic="none", max_states=2)
+    assert res.reachable is None and res.states >= 2
+    with pytest.raises(ValueError):
+        reachability_query(pn, {0: 1}, heuristic="dijkstra")
+    with pytest.raises(ValueError):
+        reachability_query(make_net(1, [[0]], [[]], [2]), [0])
@@ -0,0 +1,114 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.Deadlock import deadlock_reachable_marking_detector, explicit_deadlock_detector
+from src.ReachabilityGraph import ReachabilityGraph, build_reachability_graph
+
+from reference import dead_markings, philosophers, random_net, reference, replay, successors
+
+
+def closure(pn, dist):
+    """{M: markings reachable from M (M included)}, brute force."""
+    edges = {M: [N for _, N in successors(pn, M)] for M in dist}
+    reach = {}
+    for M in dist:
+        seen, todo = {M}, [M]
+        while todo:
+            for N in edges[todo.pop()]:
+                if N not in seen:
+                    seen.add(N)
+                    todo.append(N)
+        reach[M] = seen
+    return reach
+
+
+def as_tuple(row):
+    return tuple(int(x) for x in row)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_graph_matches_reference(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    g = build_reachability_graph(pn)
+    states = [as_tuple(M) for M in g.markings()]
+    assert sorted(states) == sorted(dist) and g.num_states == len(dist)
+    assert states[0] == tuple(pn.M0)
+
+    num_edges = 0
+    for i, M in enumerate(states):
+        assert g.index(M) == i
+        targets, labels = g.successors(i)
+        assert {(int(t), states[j]) for j, t in zip(targets, labels)} == set(successors(pn, M))
+        num_edges += len(targets)
+        trace = g.trace(i)
+        assert replay(pn, trace) == M and len(trace) == dist[M]
+        assert g.trace_ids(i) == [pn.trans_ids[t] for t in trace]
+    assert g.num_edges == num_edges
+
+    dead = dead_markings(pn, dist)
+    assert g.dead_markings() == dead
+    assert explicit_deadlock_detector(pn, graph=g) == dead
+    assert deadlock_reachable_marking_detector(pn, None, max_witnesses=1000, graph=g) == (dead or None)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_scc_liveness_reversibility(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    reach = closure(pn, dist)
+    g = build_reachability_graph(pn)
+    states = [as_tuple(M) for M in g.markings()]
+    num, comp = g.sccs()
+    for i, M in enumerate(states):
+        for j, N in enumerate(states):
+            assert (comp[i] == comp[j]) == (N in reach[M] and M in reach[N])
+    assert num == len(set(comp.tolist()))
+
+    bottom = {i for i, M in enumerate(states) if all(M in reach[N] for N in reach[M])}
+    assert {i for i in range(len(states)) if comp[i] in g.bottom_sccs()} == bottom
+
+    def enables(M, t):
+        return any(u == t for u, _ in successors(pn, M))
+
+    live = [t for t in range(len(pn.trans_ids))
+            if all(any(enables(N, t) for N in reach[M]) for M in dist)]
+    assert g.live_transitions() == live
+    m0 = tuple(pn.M0)
+    assert g.is_reversible() == all(m0 in reach[M] for M in dist)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_maximize(seed):
+    pn = random_net(seed)
+    g = build_reachability_graph(pn)
+    rng = random.Random(seed)
+    c = np.array([rng.randint(-3, 5) for _ in range(len(pn.place_ids))])
+    values = {M: int(np.dot(c, M)) for M in reference(pn)}
+    best = max(values.values())
+    ids, value = g.maximize(c, chunk=3)
+    assert value == best
+    assert sorted(as_tuple(g.marking(i)) for i in ids) == sorted(M for M, v in values.items() if v == best)
+
+
+def test_unreachable_marking_and_philosophers():
+    pn = philosophers(3)
+    g = build_reachability_graph(pn)
+    assert g.index([1] * 12) is None
+    # Một deadlock, không reversible, không transition nào live
+    assert len(g.deadlocks()) == 1 and not g.is_reversible() and g.live_transitions() == []
+
+
+def test_save_load(tmp_path):
+    pn = philosophers(3)
+    g = build_reachability_graph(pn)
+    path = str(tmp_path / "graph.npz")
+    g.save(path)
+    loaded = ReachabilityGraph.load(path)
+    assert np.array_equal(loaded.markings(), g.markings())
+    for name in ("indptr", "targets", "labels", "parent", "parent_label"):
+        assert np.array_equal(getattr(loaded, name), getattr(g, name))
+    assert (loaded.place_ids, loaded.trans_ids) == (pn.place_ids, pn.trans_ids)
+    assert loaded.dead_markings() == g.dead_markings() and loaded.sccs()[0] == g.sccs()[0]
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.BDD import bdd_reachable_counting
+from src.BFS import bfs_reachable_traversal
+from src.Deadlock import explicit_deadlock_detector
+from src.ReachabilityGraph import build_reachability_graph
+from src.Reduction import RULES, reduce_net
+
+from reference import bdd_markings, dead_markings, make_net, random_net, reference, replay
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_reduction_preserves_behaviour(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    red = reduce_net(pn)
+    reduced = bfs_reachable_traversal(red.net)
+    # Song ánh giữa marking của hai mạng
+    assert len(reduced) == len(dist) and red.lift_markings(reduced) == set(dist)
+    assert all(red.reduce_marking(red.lift_marking(M)) == M for M in reduced)
+    assert sorted(map(list, red.lift_markings(explicit_deadlock_detector(red.net)))) == dead_markings(pn, dist)
+
+    g = build_reachability_graph(red.net)
+    for i in range(g.num_states):
+        assert replay(pn, red.lift_trace(g.trace(i))) == red.lift_marking(g.marking(i))
+
+    rng = random.Random(seed)
+    c = np.array([rng.randint(-3, 5) for _ in range(pn.num_places)])
+    c_red, offset = red.reduce_objective(c)
+    for M in reduced:
+        assert np.dot(c_red, M) + offset == np.dot(c, red.lift_marking(M))
+
+    X = []
+    bdd, _ = bdd_reachable_counting(red.net, place_vars=X)
+    assert bdd_markings(*red.lift_bdd(bdd, X)) == set(dist)
+
+
+def test_reduction_removing_every_place():
+    """p0 only has a self-loop (constant), p1 is parallel to it, p2 never changes."""
+    pn = make_net(3, [[0]], [[0]], [1, 1, 0], "gone")
+    red = reduce_net(pn)
+    assert red.net.num_places == 0
+    counts = []
+    X = []
+    bdd, count = bdd_reachable_counting(red.net, frontier_counts=counts, place_vars=X)
+    assert count == 1 and counts == [1] and X == []
+    assert bdd_markings(*red.lift_bdd(bdd, X)) == set(reference(pn)) == {(1, 1, 0)}
+
+
+@pytest.mark.parametrize("rule", RULES)
+def test_single_rules(rule):
+    for seed in range(20):
+        pn = random_net(seed)
+        red = reduce_net(pn, rules=[rule])
+        assert red.lift_markings(bfs_reachable_traversal(red.net)) == set(reference(pn))
+        assert set(k for k, n in red.applied.items() if n) <= {rule}
+
+
+def test_rules_on_hand_made_net():
+    # p0 -> t0 -> p1 với p2 song song p0 (cùng cung), p3 không đổi, t1 trùng t0, t2 trọng số 2
+    pn = make_net(4, [[0, 2], [0, 2], [1, 1]], [[1], [1], [0]], [1, 0, 1, 1], "hand")
+    red = reduce_net(pn)
+    assert red.applied["dead-transitions"] == 1 and red.applied["duplicate-transitions"] == 1
+    assert red.applied["constant-places"] >= 1
+    assert red.net.num_places < pn.num_places and red.net.num_transitions == 1
+    assert red.lift_markings(bfs_reachable_traversal(red.net)) == set(reference(pn))
+    assert "NetReduction(4x3 ->" in str(red)
+    with pytest.raises(ValueError):
+        reduce_net(pn, rules=["agglomeration"])
@@ -0,0 +1,70 @@
+import random
+import sys
+
+import numpy as np
+import pytest
+from pyeda.inter import bddvar, expr, expr2bdd
+
+from src.BDD import STRATEGIES, bdd_diff, bdd_or, bdd_reachable_counting, bdd_rename
+from src.Deadlock import symbolic_deadlock_detector
+from src.Optimization import max_reachable_marking
+
+from reference import bdd_markings, make_net, philosophers, random_net, reference
+
+X = [bddvar(f"rp{i}") for i in range(6)]
+Y = [bddvar(f"rq{i}") for i in range(6)]
+
+
+def random_function(rng, variables):
+    f = expr2bdd(expr(0))
+    for _ in range(rng.randint(0, 5)):
+        cube = expr2bdd(expr(1))
+        for x in rng.sample(variables, rng.randint(1, 4)):
+            cube &= x if rng.random() < 0.5 else ~x
+        f |= cube
+    return f
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_memoized_operators(seed):
+    rng = random.Random(seed)
+    f, g = random_function(rng, X), random_function(rng, X)
+    assert bdd_or(f, g).equivalent(f | g)
+    assert bdd_diff(f, g).equivalent(f & ~g)
+    # Đổi tên sang biến theo thứ tự ngược (không giữ thứ tự level)
+    mapping = dict(zip(X, reversed(Y)))
+    assert bdd_rename(f, mapping).equivalent(f.compose(mapping))
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("options", [{}, {"cluster_limit": 0}, {"cluster_limit": 1}, {"cluster_limit": 100},
+                                     {"interleave": False}, {"reorder_threshold": 1}],
+                         ids=lambda o: ",".join(f"{k}={v}" for k, v in o.items()) or "default")
+def test_weighted_nets(strategy, options):
+    # Cung trọng số > 1 không bao giờ bắn được, như các engine tường minh
+    for seed in range(40):
+        pn = random_net(seed)
+        expected = set(reference(pn))
+        X = []
+        bdd, count = bdd_reachable_counting(pn, strategy=strategy, place_vars=X, **options)
+        assert count == len(expected)
+        assert bdd_markings(bdd, X) == expected
+
+
+def test_philosophers_clusters():
+    pn = philosophers(5)
+    expected = len(reference(pn))
+    for cluster_limit in (0, 4, 8):
+        assert bdd_reachable_counting(pn, cluster_limit=cluster_limit)[1] == expected
+
+
+def test_recursion_limit_restored():
+    # Chuỗi 300 place: đệ quy trên node sâu hơn giới hạn mặc định
+    limit = sys.getrecursionlimit()
+    pn = make_net(300, [[p] for p in range(299)], [[p + 1] for p in range(299)], [1] + [0] * 299, "chain")
+    X = []
+    bdd, count = bdd_reachable_counting(pn, strategy="level-chaining", place_vars=X)
+    assert count == 300
+    assert symbolic_deadlock_detector(pn, bdd, place_vars=X)[1] == 1
+    assert max_reachable_marking(X, bdd, np.arange(300))[1] == 299
+    assert sys.getrecursionlimit() == limit
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.BDD import bdd_reachable_counting
+from src.BFS import bfs_reachable_traversal
+from src.DFS import dfs_reachable_traversal
+from src.Deadlock import explicit_deadlock_detector
+from src.PetriNet import PetriNet
+from src.Sparse import CSRMatrix
+
+from reference import TEST1_PNML, dead_markings, philosophers, random_net, reference
+
+
+def sparse_copy(pn):
+    return PetriNet(pn.place_ids, pn.trans_ids, pn.place_names, pn.trans_names,
+                    CSRMatrix.from_dense(pn.I), CSRMatrix.from_dense(pn.O), pn.M0)
+
+
+def test_csr_matrix():
+    A = np.array([[0, 2, 0, 1], [0, 0, 0, 0], [300, 0, 0, 0]])
+    csr = CSRMatrix.from_dense(A)
+    assert csr.shape == (3, 4) and csr.nnz == 3
+    assert np.array_equal(csr.toarray(), A)
+    assert csr.data.dtype == np.uint16 and csr.indices.dtype == np.int32
+    cols, weights = csr.row(0)
+    assert cols.tolist() == [1, 3] and weights.tolist() == [2, 1]
+    assert csr.row_lengths().tolist() == [2, 0, 1]
+    assert csr.max_row_weight().tolist() == [2, 0, 300]
+
+
+def test_from_coo_adds_parallel_arcs():
+    csr = CSRMatrix.from_coo([2, 0, 2, 0], [1, 3, 1, 0], (3, 4))
+    assert csr.toarray().tolist() == [[1, 0, 0, 1], [0, 0, 0, 0], [0, 2, 0, 0]]
+    assert csr.data.dtype == np.uint8
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_sparse_engines_match_dense(seed):
+    dense = random_net(seed)
+    pn = sparse_copy(dense)
+    expected = set(reference(dense))
+    for engine in ("bitmask", "frontier"):
+        assert bfs_reachable_traversal(pn, engine=engine) == expected
+    assert dfs_reachable_traversal(pn) == expected
+    assert explicit_deadlock_detector(pn) == dead_markings(dense, reference(dense))
+    assert bdd_reachable_counting(pn)[1] == len(expected)
+    # Không engine nào ở trên cần ma trận dense
+    assert pn._I is None and pn._O is None
+    assert bfs_reachable_traversal(pn, engine="numpy") == expected
+    assert np.array_equal(pn.I, dense.I) and np.array_equal(pn.O, dense.O)
+
+
+def test_locality_index_same_as_dense():
+    dense = philosophers(4)
+    pn = sparse_copy(dense)
+    assert pn.is_sparse and not dense.is_sparse
+    assert (pn.num_transitions, pn.num_places) == (12, 16)
+    assert (pn.preset, pn.postset, pn.affected) == (dense.preset, dense.postset, dense.affected)
+
+
+def test_read_pnml_sparse(tmp_path):
+    dense = PetriNet.read_pnml(TEST1_PNML)
+    pn = PetriNet.read_pnml(TEST1_PNML, sparse=True)
+    assert pn.is_sparse and pn._I is None
+    assert bfs_reachable_traversal(pn, engine="frontier") == bfs_reachable_traversal(dense)
+    assert np.array_equal(pn.I, dense.I) and np.array_equal(pn.O, dense.O)
+    # Cache dùng chung cho cả hai chế độ
+    cache = str(tmp_path)
+    PetriNet.read_pnml(TEST1_PNML, cache_dir=cache)
+    cached = PetriNet.read_pnml(TEST1_PNML, cache_dir=cache, sparse=True)
+    assert cached.is_sparse and np.array_equal(cached.I, dense.I)
+    assert not PetriNet.read_pnml(TEST1_PNML, cache_dir=cache).is_sparse
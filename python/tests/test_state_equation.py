@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+import src.StateEquation
+from src.StateEquation import incidence_matrix, state_equation_optimize
+
+from reference import philosophers, random_net, reference, replay
+
+
+def objective(pn, seed):
+    rng = random.Random(seed)
+    return np.array([rng.randint(-3, 5) for _ in range(pn.num_places)])
+
+
+def check_result(pn, c, result):
+    best = max(int(np.dot(c, M)) for M in reference(pn))
+    assert result.value <= best <= result.upper_bound + 1e-6
+    assert result.value == np.dot(c, result.marking)
+    assert replay(pn, result.trace) == tuple(result.marking)
+    assert result.gap == result.upper_bound - result.value
+    if result.status == "optimal":
+        assert result.value == best == result.upper_bound
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_reference(seed):
+    pn = random_net(seed)
+    c = objective(pn, seed)
+    result = state_equation_optimize(pn, c)
+    check_result(pn, c, result)
+    assert result.status == "optimal"
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_tiny_search_budget_keeps_bounds(seed):
+    # Mỗi ứng viên chỉ được tìm 1 state: phải dùng no-good cut và vẫn giữ cận đúng
+    pn = random_net(seed)
+    c = objective(pn, seed)
+    check_result(pn, c, state_equation_optimize(pn, c, search_states=1))
+    check_result(pn, c, state_equation_optimize(pn, c, search_states=1, max_candidates=1))
+
+
+def test_time_limit():
+    pn = philosophers(4)
+    c = np.ones(16)
+    result = state_equation_optimize(pn, c, time_limit=0)
+    assert result.status == "gap" and result.candidates == 0
+    assert result.marking == pn.M0.tolist() and result.trace == []
+    check_result(pn, c, result)
+
+
+def test_philosophers_optimum():
+    pn = philosophers(4)
+    c = np.array([1 if p % 4 == 2 else 0 for p in range(16)])
+    result = state_equation_optimize(pn, c)
+    # Tối đa 2 triết gia ăn cùng lúc
+    assert (result.status, result.value) == ("optimal", 2)
+    check_result(pn, c, result)
+
+
+def test_incidence_matrix():
+    pn = random_net(3)
+    assert np.array_equal(incidence_matrix(pn).toarray(), pn.O - pn.I)
+
+
+def test_missing_scipy(monkeypatch):
+    monkeypatch.setattr(src.StateEquation, "milp", None)
+    with pytest.raises(ImportError):
+        state_equation_optimize(random_net(0), np.ones(2))
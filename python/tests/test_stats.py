@@ -0,0 +1,107 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+import src.DFS
+from src.BDD import bdd_reachable_counting
+from src.BFS import bfs_reachable_traversal, iter_bfs_reachable
+from src.DFS import dfs_reachable_traversal
+from src.Deadlock import explicit_deadlock_detector, symbolic_deadlock_detector
+from src.Optimization import max_reachable_markings
+from src.Stats import NULL_STATS, EventLog, jsonl_stats
+
+from reference import philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("engine", ["bitmask", "frontier"])
+def test_bfs_levels(engine):
+    pn = philosophers(4)
+    dist = reference(pn)
+    log = EventLog()
+    states = bfs_reachable_traversal(pn, engine=engine, stats=log)
+    levels = log.of("bfs.level")
+    assert [e["depth"] for e in levels] == sorted(e["depth"] for e in levels)
+    assert [e["visited"] for e in levels] == sorted(e["visited"] for e in levels)
+    assert levels[-1]["visited"] == len(dist)
+    done, = log.of("bfs.done")
+    assert (done["engine"], done["states"]) == (engine, len(states))
+    assert log.events[-1] is done
+
+
+def test_numpy_engines_report_done():
+    pn = random_net(0)
+    for traverse, event in ((bfs_reachable_traversal, "bfs.done"), (dfs_reachable_traversal, "dfs.done")):
+        log = EventLog()
+        states = traverse(pn, engine="numpy", stats=log)
+        assert [e["states"] for e in log.of(event)] == [len(states)]
+
+
+def test_dfs_progress(monkeypatch):
+    monkeypatch.setattr(src.DFS, "DFS_REPORT_EVERY", 2)
+    pn = philosophers(4)
+    log = EventLog()
+    states = dfs_reachable_traversal(pn, stats=log)
+    progress = log.of("dfs.progress")
+    assert progress and all(e["visited"] <= len(states) and e["stack"] >= 0 for e in progress)
+    assert [e["states"] for e in log.of("dfs.done")] == [len(states)]
+
+
+def test_stream_done():
+    log = EventLog()
+    stream = iter_bfs_reachable(philosophers(3), max_states=4, stats=log)
+    list(stream)
+    done, = log.of("stream.done")
+    assert (done["status"], done["reason"], done["states"]) == ("truncated", "max_states", 4)
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "chaining", "level-chaining"])
+def test_bdd_events(strategy):
+    pn = philosophers(4)
+    log = EventLog()
+    info = {}
+    _, count = bdd_reachable_counting(pn, strategy=strategy, reorder_threshold=1, info=info, stats=log)
+    start, = log.of("bdd.start")
+    assert (start["places"], start["strategy"]) == (16, strategy)
+    assert log.of("bdd.image") and log.of("bdd.reorder")
+    assert len(log.of("bdd.iteration")) == info["iterations"]
+    done, = log.of("bdd.done")
+    assert (done["states"], done["peak_nodes"]) == (count, info["peak_nodes"])
+
+
+def test_deadlock_and_optimization_events():
+    pn = philosophers(3)
+    log = EventLog()
+    explicit_deadlock_detector(pn, stats=log)
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+    symbolic_deadlock_detector(pn, bdd, stats=log, place_vars=X)
+    _, value, ties = max_reachable_markings(X, bdd, np.ones(12, dtype=int), stats=log)
+    assert [e["mode"] for e in log.of("deadlock.done")] == ["explicit", "symbolic"]
+    assert {e["dead"] for e in log.of("deadlock.done")} == {1}
+    assert log.of("deadlock.level")[-1]["visited"] == len(reference(pn))
+    assert log.of("optimization.dp")
+    done, = log.of("optimization.done")
+    assert (done["value"], done["ties"]) == (value, ties)
+
+
+def test_sinks(tmp_path):
+    seen = []
+    log = EventLog(callback=seen.append, keep=False)
+    bfs_reachable_traversal(random_net(1), stats=log)
+    assert log.events == [] and seen[-1]["event"] == "bfs.done"
+    assert all(e["time"] >= 0 for e in seen)
+
+    stream = io.StringIO()
+    bfs_reachable_traversal(random_net(1), stats=jsonl_stats(stream))
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [e["event"] for e in lines] == [e["event"] for e in seen]
+
+    log = EventLog()
+    bfs_reachable_traversal(random_net(1), stats=log)
+    path = str(tmp_path / "events.jsonl")
+    log.write_jsonl(path)
+    with open(path) as f:
+        assert [json.loads(line)["event"] for line in f] == [e["event"] for e in log.events]
+    assert not NULL_STATS.enabled
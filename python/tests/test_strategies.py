@@ -0,0 +1,51 @@
+import pytest
+
+from src.BDD import STRATEGIES, bdd_reachable_counting
+
+from reference import bdd_markings, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("options", [{}, {"order": "force"}, {"reorder_threshold": 1}],
+                         ids=lambda o: ",".join(f"{k}={v}" for k, v in o.items()) or "default")
+def test_strategies_match_reference(strategy, options):
+    for seed in range(30):
+        pn = random_net(seed, weighted=False)
+        expected = set(reference(pn))
+        counts = []
+        X = []
+        bdd, count = bdd_reachable_counting(pn, strategy=strategy, frontier_counts=counts, place_vars=X, **options)
+        assert count == len(expected)
+        assert bdd_markings(bdd, X) == expected
+        assert counts[0] == 1
+
+
+def test_level_chaining_reorder_regroups():
+    """A reorder during level-chaining regroups the transitions by level."""
+    for seed in range(80):
+        pn = random_net(seed, weighted=False)
+        _, count = bdd_reachable_counting(pn, strategy="level-chaining", reorder_threshold=1)
+        assert count == len(reference(pn))
+
+
+def test_saturation_is_an_alias():
+    pn = philosophers(3)
+    info = {}
+    _, count = bdd_reachable_counting(pn, strategy="saturation", info=info)
+    assert count == len(reference(pn)) and info["strategy"] == "level-chaining"
+
+
+def test_philosophers():
+    pn = philosophers(3)
+    expected = set(reference(pn))
+    for strategy in STRATEGIES:
+        info = {}
+        X = []
+        bdd, count = bdd_reachable_counting(pn, strategy=strategy, info=info, place_vars=X)
+        assert count == len(expected) and bdd_markings(bdd, X) == expected
+        assert info["strategy"] == strategy
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        bdd_reachable_counting(philosophers(2), strategy="dfs")
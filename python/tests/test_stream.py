@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from src.BFS import iter_bfs_reachable
+from src.DFS import iter_dfs_reachable
+from src.Stream import COMPLETE, STOPPED, TRUNCATED
+
+from reference import make_net, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_streams_cover_reference(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    stream = iter_bfs_reachable(pn)
+    found = list(stream)
+    assert stream.status == COMPLETE and stream.complete and stream.states == len(dist)
+    assert sorted(found) == sorted(dist)
+    # BFS: khoảng cách tới M0 không giảm theo thứ tự phát hiện
+    assert [dist[M] for M in found] == sorted(dist[M] for M in found)
+
+    stream = iter_dfs_reachable(pn)
+    assert sorted(stream) == sorted(dist) and stream.status == COMPLETE
+
+
+@pytest.mark.parametrize("iterate", [iter_bfs_reachable, iter_dfs_reachable])
+def test_max_states(iterate):
+    pn = philosophers(4)
+    stream = iterate(pn, max_states=5)
+    found = list(stream)
+    assert len(found) == 5 and len(set(found)) == 5 and set(found) <= set(reference(pn))
+    assert (stream.status, stream.reason, stream.complete) == (TRUNCATED, "max_states", False)
+
+
+def test_max_seconds_and_memory():
+    pn = philosophers(4)
+    stream = iter_bfs_reachable(pn, max_seconds=0)
+    assert list(stream) == [] and (stream.status, stream.reason) == (TRUNCATED, "max_seconds")
+    stream = iter_bfs_reachable(pn, max_memory=1)
+    assert list(stream) == [] and (stream.status, stream.reason) == (TRUNCATED, "max_memory")
+    stream = iter_bfs_reachable(pn, max_memory=1 << 30, max_seconds=60)
+    assert len(list(stream)) == len(reference(pn)) and stream.complete
+
+
+@pytest.mark.parametrize("iterate", [iter_bfs_reachable, iter_dfs_reachable])
+def test_stop_when(iterate):
+    pn = philosophers(4)
+    dead = tuple(1 if p % 4 == 1 else 0 for p in range(16))
+    stream = iterate(pn, stop_when=lambda M: M == dead)
+    found = list(stream)
+    assert found[-1] == dead and dead not in found[:-1]
+    assert (stream.status, stream.found) == (STOPPED, dead)
+
+
+def test_cancel_and_cleanup(tmp_path):
+    pn = philosophers(4)
+    stream = iter_bfs_reachable(pn, memory_budget=1, spill_dir=str(tmp_path))
+    found = []
+    for M in stream:
+        found.append(M)
+        if len(found) == 3:
+            stream.cancel()
+    assert len(found) == 3
+    assert (stream.status, stream.reason) == (TRUNCATED, "cancelled")
+    assert os.listdir(tmp_path) == []
+
+
+def test_batches():
+    pn = philosophers(4)
+    batches = list(iter_bfs_reachable(pn, batch_size=10))
+    assert all(len(b) == 10 for b in batches[:-1]) and 0 < len(batches[-1]) <= 10
+    assert sorted(M for b in batches for M in b) == sorted(reference(pn))
+
+
+def test_not_bit_packable():
+    pn = make_net(1, [[0]], [[]], [2])
+    with pytest.raises(ValueError):
+        iter_bfs_reachable(pn)
+    with pytest.raises(ValueError):
+        iter_dfs_reachable(pn)
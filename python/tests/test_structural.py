@@ -0,0 +1,82 @@
+import itertools
+
+import pytest
+
+from src.BDD import bdd_reachable_counting
+from src.Deadlock import deadlock_reachable_marking_detector
+from src.Structural import NetStructure, minimal_siphons, minimal_traps, siphon_trap_check
+
+from reference import dead_markings, make_net, philosophers, random_net, reference
+
+
+def brute_closed(pn, kind):
+    """All nonempty siphons (•S ⊆ S•) or traps (S• ⊆ •S) of pn, as frozensets."""
+    pre, post = pn.preset, pn.postset
+    found = []
+    for r in range(1, len(pn.place_ids) + 1):
+        for S in itertools.combinations(range(len(pn.place_ids)), r):
+            S = set(S)
+            into = {t for t in range(len(pre)) if S & set(post[t])}
+            out_of = {t for t in range(len(pre)) if S & set(pre[t])}
+            if (into <= out_of) if kind == "siphon" else (out_of <= into):
+                found.append(frozenset(S))
+    return found
+
+
+def minimal(sets):
+    return sorted(sorted(S) for S in sets if not any(T < S for T in sets))
+
+
+def ring(n, marked=(0,)):
+    return make_net(n, [[p] for p in range(n)], [[(p + 1) % n] for p in range(n)],
+                    [1 if p in marked else 0 for p in range(n)], "ring")
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_minimal_siphons_and_traps(seed):
+    pn = random_net(seed)
+    siphons, complete = minimal_siphons(pn)
+    assert complete and sorted(siphons) == minimal(brute_closed(pn, "siphon"))
+    traps, complete = minimal_traps(pn)
+    assert complete and sorted(traps) == minimal(brute_closed(pn, "trap"))
+
+    net = NetStructure.from_net(pn)
+    everything = (1 << len(pn.place_ids)) - 1
+    union = 0
+    for S in brute_closed(pn, "siphon"):
+        mask = sum(1 << p for p in S)
+        assert net.is_siphon(mask)
+        union |= mask
+    assert net.max_siphon(everything) == union
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_check_is_sound(seed):
+    pn = random_net(seed)
+    dead = dead_markings(pn, reference(pn))
+    result = siphon_trap_check(pn)
+    if result.deadlock_free:
+        assert not dead
+    elif result.deadlock_free is False:
+        assert result.reason == "initially-dead" and dead == [pn.M0.tolist()]
+    X = []
+    bdd, _ = bdd_reachable_counting(pn, place_vars=X)
+    assert deadlock_reachable_marking_detector(pn, bdd, max_witnesses=1000, structural=True,
+                                               place_vars=X) == (dead or None)
+    assert deadlock_reachable_marking_detector(pn, None, max_witnesses=1000, structural=True) == (dead or None)
+
+
+def test_known_nets():
+    result = siphon_trap_check(ring(5))
+    assert (result.deadlock_free, result.reason) == (True, "siphon-trap") and result.siphons > 0
+    assert siphon_trap_check(ring(5, marked=())).deadlock_free is False
+    assert siphon_trap_check(philosophers(3)).deadlock_free is None
+    # Transition không có cung nào luôn bắn được; còn t -> p0 bị chặn khi p0 có token
+    assert siphon_trap_check(make_net(1, [[]], [[]], [0])).reason == "source-transition"
+    assert siphon_trap_check(make_net(1, [[]], [[0]], [0])).deadlock_free is None
+    assert siphon_trap_check(make_net(1, [[0]], [[0]], [2])).reason == "not-1-safe"
+
+
+def test_budget():
+    result = siphon_trap_check(ring(8), max_nodes=0)
+    assert (result.deadlock_free, result.reason) == (None, "budget")
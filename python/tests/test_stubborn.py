@@ -0,0 +1,51 @@
+import pytest
+
+from src.BitMarking import CompiledNet
+from src.Deadlock import deadlock_reachable_marking_detector, stubborn_deadlock_detector
+from src.Stubborn import StubbornSets
+
+from reference import dead_markings, make_net, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("seed", range(60))
+@pytest.mark.parametrize("max_seeds", [1, 8])
+def test_dead_markings_preserved(seed, max_seeds):
+    pn = random_net(seed)
+    dist = reference(pn)
+    dead = dead_markings(pn, dist)
+    result = stubborn_deadlock_detector(pn, cross_check=True, max_seeds=max_seeds)
+    assert result.dead == dead and result.verified
+    assert result.states <= result.full_states == len(dist)
+    assert 0 < result.edge_ratio <= 1 and result.state_ratio <= 1
+    assert deadlock_reachable_marking_detector(pn, None, max_witnesses=1000, reduced=True) == (dead or None)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_stubborn_sets_are_enabled_subsets(seed):
+    pn = random_net(seed)
+    net = CompiledNet(pn)
+    sets = StubbornSets(net)
+    for M in reference(pn):
+        m = net.encode(M)
+        E = net.enabled_set(m)
+        if E:
+            S = sets.stubborn(m, E)
+            assert S and S & ~E == 0
+
+
+def test_independent_components_are_not_interleaved():
+    # 10 cặp p_i -> q_i độc lập: 2^10 marking, nhưng chỉ cần một thứ tự bắn
+    n = 10
+    pn = make_net(2 * n, [[2 * i] for i in range(n)], [[2 * i + 1] for i in range(n)], [1, 0] * n, "ind")
+    result = stubborn_deadlock_detector(pn, cross_check=True)
+    assert result.dead == [[0, 1] * n] and result.verified
+    assert result.states == n + 1 and result.full_states == 2 ** n
+
+
+def test_philosophers_and_errors():
+    pn = philosophers(5)
+    result = stubborn_deadlock_detector(pn)
+    assert result.dead == [[1 if p % 4 == 1 else 0 for p in range(20)]]
+    assert result.full_states is None and result.verified is None and result.state_ratio is None
+    with pytest.raises(ValueError):
+        stubborn_deadlock_detector(make_net(1, [[0]], [[]], [2]))
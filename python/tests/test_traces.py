@@ -0,0 +1,84 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.BDD import bdd_reachable_counting, bdd_trace
+from src.BFS import iter_bfs_reachable
+from src.Deadlock import deadlock_reachable_marking_detector, explicit_deadlock_detector
+from src.Optimization import max_reachable_marking, max_reachable_marking_trace
+from src.ReachabilityGraph import build_reachability_graph
+from src.VisitedStore import ParentLog
+
+from reference import dead_markings, philosophers, random_net, reference, replay
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_parent_log_traces(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    log = ParentLog()
+    found = list(iter_bfs_reachable(pn, parents=log))
+    assert len(log) == len(found) == len(dist)
+    assert log.memory_bytes() == 8 * len(log)
+    for i, M in enumerate(found):
+        trace = log.trace(i)
+        assert replay(pn, trace) == tuple(M) and len(trace) == dist[tuple(M)]
+
+
+@pytest.mark.parametrize("options", [{}, {"compress": True}, {"reorder_threshold": 1}])
+@pytest.mark.parametrize("seed", range(30))
+def test_onion_rings(seed, options):
+    pn = random_net(seed)
+    dist = reference(pn)
+    rings, X = [], []
+    bdd_reachable_counting(pn, rings=rings, place_vars=X, **options)
+    assert len(rings) == max(dist.values()) + 1
+    for M, d in dist.items():
+        trace = bdd_trace(pn, rings, M, X)
+        assert replay(pn, trace) == M and len(trace) == d
+    unreachable = next((M for M in np.ndindex(*[2] * pn.num_places) if M not in dist), None)
+    if unreachable is not None:
+        assert bdd_trace(pn, rings, unreachable, X) is None
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_deadlock_traces(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    dead = dead_markings(pn, dist)
+    rings, X = [], []
+    bdd, _ = bdd_reachable_counting(pn, rings=rings, place_vars=X)
+    modes = [dict(bdd=bdd, place_vars=X), dict(bdd=bdd, rings=rings, place_vars=X), dict(bdd=None), dict(bdd=None, reduced=True),
+             dict(bdd=None, unfolding=True), dict(bdd=None, graph=build_reachability_graph(pn))]
+    for mode in modes:
+        pairs = deadlock_reachable_marking_detector(pn, max_witnesses=1000, traces=True, **mode)
+        assert sorted(M for M, _ in pairs or []) == dead, mode
+        for M, trace in pairs or []:
+            assert replay(pn, trace) == tuple(M)
+            if not mode.get("unfolding"):
+                assert len(trace) == dist[tuple(M)], mode
+    pairs = explicit_deadlock_detector(pn, traces=True)
+    assert [M for M, _ in pairs] == dead
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_optimum_trace(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    c = np.array([random.Random(seed).randint(-3, 5) for _ in range(pn.num_places)])
+    best = max(int(np.dot(c, M)) for M in dist)
+    rings, X = [], []
+    bdd, _ = bdd_reachable_counting(pn, rings=rings, place_vars=X)
+    marking, value, trace = max_reachable_marking_trace(pn, bdd, c, rings, X)
+    assert value == best and replay(pn, trace) == tuple(marking) and len(trace) == dist[tuple(marking)]
+    assert max_reachable_marking(X, bdd, c) == (marking, value)
+    assert max_reachable_marking_trace(pn, bdd & ~bdd, c, rings, X) == (None, None, None)
+
+
+def test_philosophers_and_errors():
+    pn = philosophers(4)
+    (M, trace), = deadlock_reachable_marking_detector(pn, None, traces=True)
+    assert len(trace) == 4 and replay(pn, trace) == tuple(M)
+    with pytest.raises(ValueError):
+        bdd_reachable_counting(pn, rings=[], strategy="chaining")
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from src.Deadlock import deadlock_reachable_marking_detector
+from src.Unfolding import unfold
+
+from reference import dead_markings, make_net, philosophers, random_net, reference, replay
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_deadlocks(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    dead = dead_markings(pn, dist)
+    prefix = unfold(pn)
+    assert prefix.complete
+    found = prefix.deadlocks(max_witnesses=1000)
+    assert [M for M, _ in found] == dead
+    for M, trace in found:
+        assert replay(pn, trace) == tuple(M)
+    assert deadlock_reachable_marking_detector(pn, None, max_witnesses=1000, unfolding=True) == (dead or None)
+    assert len(prefix.deadlocks(max_witnesses=1)) == min(1, len(dead))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_reachable(seed):
+    pn = random_net(seed)
+    dist = reference(pn)
+    prefix = unfold(pn)
+    rng = random.Random(seed)
+    targets = list(dist) + [tuple(rng.randint(0, 1) for _ in range(pn.num_places)) for _ in range(5)]
+    for M in targets:
+        trace = prefix.reachable(list(M))
+        assert (trace is not None) == (M in dist)
+        if trace is not None:
+            assert replay(pn, trace) == M
+    # Ràng buộc một phần: chỉ place 0
+    for v in (0, 1):
+        trace = prefix.reachable({0: v})
+        assert (trace is not None) == any(M[0] == v for M in dist)
+        if trace is not None:
+            assert replay(pn, trace)[0] == v
+    assert prefix.reachable({0: 2}) is None
+
+
+def test_concurrency_keeps_prefix_small():
+    # 10 cặp p_i -> q_i độc lập: 2^10 marking nhưng chỉ 10 event
+    n = 10
+    pn = make_net(2 * n, [[2 * i] for i in range(n)], [[2 * i + 1] for i in range(n)], [1, 0] * n, "conc")
+    prefix = unfold(pn)
+    assert prefix.num_events == n and prefix.num_cutoffs == 0
+    assert prefix.deadlocks() == [([0, 1] * n, prefix.deadlocks()[0][1])]
+    assert "10 events" in str(prefix)
+
+
+def test_philosophers_cutoffs():
+    pn = philosophers(4)
+    prefix = unfold(pn)
+    assert prefix.num_cutoffs > 0
+    (M, trace), = prefix.deadlocks()
+    assert M == [1 if p % 4 == 1 else 0 for p in range(16)] and replay(pn, trace) == tuple(M)
+
+
+def test_incomplete_prefix_refuses_queries():
+    prefix = unfold(philosophers(3), max_events=2)
+    assert not prefix.complete and prefix.num_events <= 2
+    with pytest.raises(ValueError):
+        prefix.deadlocks()
+    with pytest.raises(ValueError):
+        prefix.reachable({0: 1})
+    with pytest.raises(ValueError):
+        unfold(make_net(1, [[0]], [[]], [2]))
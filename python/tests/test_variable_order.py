@@ -0,0 +1,73 @@
+import pytest
+from pyeda.boolalg import bdd as pyeda_bdd
+
+from src.BDD import ORDER_METHODS, bdd_node_count, bdd_reachable_counting, compare_variable_orders, variable_order
+
+from reference import bdd_markings, philosophers, random_net, reference
+
+
+@pytest.mark.parametrize("method", ORDER_METHODS)
+def test_orders_are_permutations(method):
+    pn = philosophers(5)
+    assert sorted(variable_order(pn, method)) == list(range(20))
+
+
+def test_explicit_order():
+    pn = philosophers(2)
+    perm = [7, 6, 5, 4, 3, 2, 1, 0]
+    assert variable_order(pn, perm) == perm
+    with pytest.raises(ValueError):
+        variable_order(pn, [0, 0, 1, 2, 3, 4, 5, 6])
+    with pytest.raises(ValueError):
+        variable_order(pn, "random")
+
+
+@pytest.mark.parametrize("options", [
+    {"order": "force"},
+    {"order": "dfs", "interleave": False},
+    {"order": "cuthill-mckee"},
+    {"reorder_threshold": 1},
+    {"order": "force", "reorder_threshold": 2, "interleave": False},
+], ids=lambda o: ",".join(f"{k}={v}" for k, v in o.items()))
+def test_orders_give_same_set(options):
+    for seed in range(30):
+        pn = random_net(seed, weighted=False)
+        expected = set(reference(pn))
+        info = {}
+        X = []
+        bdd, count = bdd_reachable_counting(pn, info=info, place_vars=X, **options)
+        assert count == len(expected)
+        assert bdd_markings(bdd, X) == expected
+        assert sorted(info["order"]) == list(range(len(pn.place_ids)))
+        assert info["final_nodes"] <= info["peak_nodes"]
+
+
+def test_compare_variable_orders():
+    pn = philosophers(3)
+    report = compare_variable_orders(pn)
+    assert set(report) == set(ORDER_METHODS)
+    assert {r["count"] for r in report.values()} == {len(reference(pn))}
+
+
+def test_returned_bdd_keeps_variable_order():
+    """The returned BDD has the shape of the encoding's final BDD."""
+    for order in ("pnml", "force", "dfs"):
+        pn = philosophers(6)
+        info = {}
+        bdd, count = bdd_reachable_counting(pn, order=order, info=info)
+        assert count == len(reference(pn))
+        assert bdd_node_count(bdd) == info["final_nodes"] <= info["peak_nodes"]
+
+
+def test_order_independent_of_earlier_runs():
+    """Earlier runs on the same places change neither the result's size nor the variable count."""
+    pn = philosophers(9)
+    sizes = {}
+    for order in ("force", "pnml", "force", "dfs", "pnml"):
+        bdd, _ = bdd_reachable_counting(pn, order=order)
+        sizes.setdefault(order, set()).add(bdd_node_count(bdd))
+    assert all(len(s) == 1 for s in sizes.values())
+    assert sizes["force"] != sizes["pnml"]
+    created = len(pyeda_bdd._VARS)
+    bdd_reachable_counting(pn, order="dfs", interleave=False, reorder_threshold=1)
+    assert len(pyeda_bdd._VARS) == created
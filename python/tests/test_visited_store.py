@@ -0,0 +1,121 @@
+import os
+import random
+
+import pytest
+
+from src import BFS, Deadlock
+from src.BFS import bfs_reachable_store, bfs_reachable_traversal, iter_bfs_reachable
+from src.DFS import dfs_reachable_traversal
+from src.Deadlock import explicit_deadlock_detector
+from src.VisitedStore import BudgetedStore, CompactStore, DiskStore, ParentLog, SetStore, VisitedStore, make_store
+
+from reference import dead_markings, make_net, philosophers, random_net, reference, replay
+
+
+def random_keys(seed, num_bits, n):
+    rng = random.Random(seed)
+    # Nhiều key trùng lặp để kiểm tra dedup
+    return [rng.getrandbits(num_bits) for _ in range(n)] + [0, (1 << num_bits) - 1] * 3
+
+
+@pytest.mark.parametrize("num_bits", [1, 9, 70])
+@pytest.mark.parametrize("make", [
+    SetStore,
+    lambda bits: CompactStore(bits, capacity=4),
+    lambda bits: DiskStore(bits, buffer_keys=16, merge_chunk=8),
+], ids=["set", "compact", "disk"])
+def test_backends_behave_like_a_set(make, num_bits):
+    keys = random_keys(num_bits, num_bits, 500)
+    with make(num_bits) as store:
+        seen = set()
+        for i, k in enumerate(keys):
+            if i % 2:
+                assert store.add(k) == (k not in seen)
+                seen.add(k)
+        batch = keys[::2]
+        new = store.add_batch(batch)
+        assert new == [k for k in dict.fromkeys(batch) if k not in seen]
+        seen.update(batch)
+        assert len(store) == len(seen) and set(store) == seen
+        assert all(k in store for k in seen)
+        assert all(k + (1 << num_bits) not in store for k in list(seen)[:10])
+
+
+def test_disk_store_runs_and_cleanup(tmp_path):
+    store = DiskStore(20, buffer_keys=8, spill_dir=str(tmp_path), merge_chunk=4)
+    keys = random_keys(1, 20, 1000)
+    for i in range(0, len(keys), 10):
+        store.add_batch(keys[i:i + 10])
+    assert set(store) == set(keys)
+    # Các run cỡ gần nhau được gộp: số run tăng theo log
+    assert 1 < store.num_runs < 20
+    assert os.listdir(store.directory)
+    store.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_budgeted_store_migrates(tmp_path):
+    store = BudgetedStore(24, memory_budget=1 << 15, spill_dir=str(tmp_path))
+    store._check_every = 64
+    keys = random_keys(2, 24, 20000)
+    backends = []
+    for i in range(0, len(keys), 100):
+        store.add_batch(keys[i:i + 100])
+        if type(store.backend) not in backends:
+            backends.append(type(store.backend))
+    assert backends == [SetStore, CompactStore, DiskStore]
+    assert set(store) == set(keys)
+    store.close()
+    assert os.listdir(tmp_path) == []
+    assert isinstance(make_store(8), SetStore)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_budgeted_search_matches_reference(seed, tmp_path):
+    pn = random_net(seed)
+    dist = reference(pn)
+    kwargs = dict(memory_budget=1, spill_dir=str(tmp_path))
+    assert bfs_reachable_traversal(pn, **kwargs) == set(dist)
+    assert dfs_reachable_traversal(pn, **kwargs) == set(dist)
+    assert explicit_deadlock_detector(pn, **kwargs) == dead_markings(pn, dist)
+
+
+def test_bfs_reachable_store(tmp_path):
+    pn = philosophers(5)
+    net, store = bfs_reachable_store(pn, memory_budget=1 << 12, spill_dir=str(tmp_path))
+    with store:
+        assert {net.decode(m) for m in store} == set(reference(pn))
+    with pytest.raises(ValueError):
+        bfs_reachable_store(make_net(1, [[0]], [[]], [2]))
+
+
+def test_visited_store_is_abstract():
+    with pytest.raises(TypeError):
+        VisitedStore()
+
+    class Partial(VisitedStore):
+        def add(self, key):
+            return True
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.parametrize("batch", [1, 3])
+@pytest.mark.parametrize("seed", range(20))
+def test_successor_batches(seed, batch, monkeypatch):
+    # Lô successor nhỏ: cùng tập marking, cùng khoảng cách, cùng deadlock
+    monkeypatch.setattr(BFS, "ADD_BATCH_KEYS", batch)
+    monkeypatch.setattr(Deadlock, "ADD_BATCH_KEYS", batch)
+    pn = random_net(seed)
+    dist = reference(pn)
+    log = ParentLog()
+    found = list(iter_bfs_reachable(pn, parents=log))
+    assert sorted(found) == sorted(dist)
+    for i, M in enumerate(found):
+        trace = log.trace(i)
+        assert replay(pn, trace) == tuple(M) and len(trace) == dist[tuple(M)]
+    pairs = explicit_deadlock_detector(pn, traces=True)
+    assert [M for M, _ in pairs] == dead_markings(pn, dist)
+    for M, trace in pairs:
+        assert replay(pn, trace) == tuple(M) and len(trace) == dist[tuple(M)]